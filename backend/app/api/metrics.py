@@ -0,0 +1,16 @@
+"""
+Metrics API endpoints
+"""
+from fastapi import APIRouter
+
+from app.core import metrics
+
+router = APIRouter(prefix="/api/metrics", tags=["Metrics"])
+
+@router.get("")
+async def get_metrics():
+    """Get in-process counters and gauges"""
+    return {
+        "success": True,
+        "metrics": metrics.snapshot()
+    }
@@ -0,0 +1,53 @@
+"""
+LLM usage API endpoints
+"""
+import hmac
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+from app.api.auth import get_current_user
+from app.core.config import settings
+from app.services.llm_usage import llm_usage
+from database.mongodb_connection import USAGE_KEY_FIELDS, get_llm_usage_summary
+
+router = APIRouter(prefix="/api/usage", tags=["Usage"])
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Check the X-Admin-Key header (admin endpoints are disabled without ADMIN_API_KEY)"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled (ADMIN_API_KEY not set)")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=403, detail="Admin key required")
+
+@router.get("", dependencies=[Depends(require_admin)])
+async def get_usage(
+    group_by: str = Query("lecture_id", description="lecture_id, user_id, stage, model or outcome"),
+    days: int = Query(1, ge=1, le=90)
+):
+    """Get LLM token usage totals over the last days, plus what is not yet flushed"""
+    if group_by not in USAGE_KEY_FIELDS or group_by == "day":
+        raise HTTPException(status_code=400, detail=f"Cannot group by {group_by}")
+
+    since_day = (datetime.utcnow() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    totals = await get_llm_usage_summary(group_by, since_day)
+
+    return {
+        "success": True,
+        "group_by": group_by,
+        "since_day": since_day,
+        "totals": [{group_by: row.pop("_id"), **row} for row in totals],
+        "live": llm_usage.snapshot()
+    }
+
+@router.get("/me")
+async def get_my_usage(current_user: dict = Depends(get_current_user)):
+    """Get today's LLM tokens and the daily budget of the current user"""
+    used = await llm_usage.user_tokens_today(current_user["user_id"])
+
+    return {
+        "success": True,
+        "tokens_today": used,
+        "daily_budget": settings.LLM_USER_DAILY_TOKENS
+    }
@@ -26,22 +26,97 @@ class Settings(BaseSettings):
     WHISPER_COMPUTE_TYPE: str = "int8"
     
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    CHUNK_MAX_TOKENS: Optional[int] = None  # word-pieces per chunk (default: model's max_seq_length)
+    CHUNK_OVERLAP_TOKENS: int = 32  # word-pieces repeated between consecutive chunks
+    INGESTION_WORKERS: int = 2  # documents ingested in parallel by background jobs
+    EMBEDDING_BATCH_SIZE: int = 64  # chunks embedded and inserted per batch during ingestion
+    EXTRACTION_PROCESSES: int = 2  # worker processes extracting large PDFs
+    PDF_PAGES_PER_TASK: int = 16  # PDF pages per extraction task (smaller PDFs use one thread)
+    EMBEDDING_PROCESSES: Optional[int] = None  # bulk ingestion embedding workers (default: half the CPUs)
+    EMBEDDING_POOL_TASK_SIZE: int = 32  # length-sorted chunks per embedding worker task
+    EMBEDDING_POOL_TASKS_PER_PROCESS: int = 4  # worker tasks per process in each pool call (chunks are sorted across all of them)
+    MAX_DOCUMENT_UPLOAD_BYTES: int = 150 * 1024 * 1024  # per uploaded document
+    MAX_AUDIO_CHUNK_BYTES: int = 25 * 1024 * 1024  # per uploaded audio chunk
+    MAX_UPLOAD_REQUEST_BYTES: int = 500 * 1024 * 1024  # whole multipart request (checked before parsing)
+    CONTENT_CLAIM_SECONDS: int = 300  # lease on content being ingested (renewed while it runs)
+    CONTENT_CLAIM_POLL: float = 2.0  # seconds between checks while another process ingests the same content
     
     # LLM Settings
     GROQ_API_KEY: Optional[str] = os.getenv("GROQ_API_KEY")
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
     LLM_MODEL: str = "llama-3.1-8b-instant"
+    LLM_FAST_MODEL: str = "llama-3.1-8b-instant"  # first tier of live notes (LIVE_NOTES_TIERING="model")
+    LLM_QUALITY_MODEL: str = "llama-3.3-70b-versatile"  # upgrades tiered live notes in the background
+    LLM_BASE_URL: Optional[str] = os.getenv("LLM_BASE_URL")  # e.g. http://localhost:8090 for mock_llm_server.py
+    LLM_MAX_CONCURRENCY: int = 8  # LLM calls in flight across all lectures
+    LLM_MAX_CONNECTIONS: int = 16  # pooled HTTP connections to the LLM API
+    LLM_KEEPALIVE_EXPIRY: float = 120.0  # seconds an idle connection is kept open
+    LLM_TIMEOUT: float = 30.0  # seconds per LLM request
+    LLM_CONNECT_TIMEOUT: float = 5.0
+    LLM_MAX_RETRIES: int = 0  # SDK-level retries (the client retries with backoff instead)
+    LLM_TOKENS_PER_MINUTE: int = 6000  # provider TPM limit (prompt + completion)
+    LLM_REQUESTS_PER_MINUTE: int = 30  # provider RPM limit
+    LLM_RATE_LIMIT_REQUEUES: int = 3  # times a 429'd call is re-queued before failing
+    LLM_RETRY_ATTEMPTS: int = 2  # retries of a call after connection errors, timeouts and 5xx
+    LLM_BACKOFF_BASE: float = 0.5  # seconds; backoff ceiling doubles per retry (full jitter)
+    LLM_BACKOFF_MAX: float = 8.0  # seconds
+    LLM_FINAL_DEADLINE: float = 120.0  # seconds per final-notes call (live calls get CHUNK_DURATION)
+    LLM_HEDGING: bool = False  # send a duplicate request when a call runs past the p95 latency
+    LLM_HEDGE_MIN_DELAY: float = 1.0  # seconds before a hedge is sent, at the earliest
+    LLM_HEDGE_MAX_PRIORITY: int = 1  # hedge live (0) and synthesis (1) calls only
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_TEMPERATURE: float = 0.3  # only calls at or below this temperature are cached
+    LLM_CACHE_SIZE: int = 512  # in-memory LRU entries (Mongo keeps the rest)
+    LLM_CACHE_TTL: int = 7 * 24 * 3600  # seconds a cached response stays valid
+    LLM_USAGE_FLUSH_INTERVAL: float = 30.0  # seconds between batched writes of token usage to Mongo
+    LLM_USER_DAILY_TOKENS: Optional[int] = None  # per-user daily token budget (None: unlimited)
+    ADMIN_API_KEY: Optional[str] = os.getenv("ADMIN_API_KEY")  # admin endpoints are disabled until set
+    PROMPT_BUDGET_LIVE_NOTES: int = 1000  # prompt tokens for per-chunk notes
+    PROMPT_BUDGET_SYNTHESIS: int = 1200  # prompt tokens for periodic structured notes
+    PROMPT_BUDGET_FINAL_SECTION: int = 1000  # prompt tokens per final-notes section
+    PROMPT_BUDGET_FINAL_SUMMARY: int = 600  # prompt tokens for glossary / takeaways
     
     # Audio Processing
     AUDIO_SAMPLE_RATE: int = 16000
     CHUNK_DURATION: int = 20  # seconds (optimized for better transcription)
     SYNTHESIS_INTERVAL: int = 60  # seconds (3 chunks for structured notes)
+    PIPELINE_MODE: str = "separate"  # "separate": notes per chunk + synthesis; "combined": one LLM call per window
+    LIVE_NOTES_TIERING: str = "off"  # "model": LLM_FAST_MODEL first, "extractive": transcript bullets first; then upgraded by LLM_QUALITY_MODEL
+    FINAL_NOTES_MODE: str = "full"  # "full" / "map_reduce": built at stop; "incremental": maintained during the lecture
+    RUNNING_NOTES_UPDATE_DEADLINE: float = 30.0  # seconds per incremental update, queueing included
+    FINAL_NOTES_FINALIZE_TIMEOUT: float = 10.0  # seconds stop waits for pending incremental updates
+    MAP_REDUCE_GROUP_TOKENS: int = 1500  # structured-notes tokens condensed per map call
+    MAP_REDUCE_SUMMARY_TOKENS: int = 300  # output tokens per group summary
     
     # RAG Settings
     FAISS_TOP_K: int = 3
     IMPORTANCE_THRESHOLD: float = 0.0
     HISTORY_CHUNKS: int = 4
-    
+    LECTURE_MEMORY_TOKENS: int = 200  # topics and key terms covered so far, per prompt
+    LECTURE_MEMORY_MAX_TERMS: int = 30  # covered key terms remembered per lecture
+    LECTURE_MEMORY_TERM_TOKENS: int = 60  # share of LECTURE_MEMORY_TOKENS the key terms may use
+    DUPLICATE_DETECTION_ENABLED: bool = True  # reuse notes of near-duplicate transcript chunks
+    DUPLICATE_SIMILARITY: float = 0.8  # estimated Jaccard similarity of word shingles
+    DUPLICATE_WINDOW_CHUNKS: int = 4  # recent chunks compared against
+    MINHASH_PERMUTATIONS: int = 64
+
+    # Vector search backend selection
+    VECTOR_SEARCH_FAILURE_THRESHOLD: int = 3  # failures before routing to fallback
+    VECTOR_SEARCH_REPROBE_INTERVAL: int = 300  # seconds between capability re-probes
+
+    # Hybrid (BM25 + vector) retrieval
+    LEXICAL_CANDIDATES: int = 300  # BM25 candidates; larger lectures are pre-filtered to this many
+    HYBRID_LEXICAL_WEIGHT: float = 1.0  # weight of the BM25 ranking in rank fusion
+    HYBRID_RRF_K: int = 60
+    LEXICAL_SHARD_CHUNKS: int = 256  # chunks per stored postings document (keeps each well under 16 MB)
+    LEXICAL_MISSING_TTL: int = 60  # seconds a lecture without a BM25 index is remembered as such
+    LEXICAL_INDEX_CACHE_LECTURES: int = 32  # merged lecture indexes kept in memory (least recently used evicted)
+
+    # Extractive compression of retrieved context before prompting
+    CONTEXT_COMPRESSION_ENABLED: bool = True
+    CONTEXT_COMPRESSION_TOKENS: int = 350  # document tokens kept per prompt (most relevant sentences)
+    CONTEXT_SENTENCE_CACHE_SIZE: int = 4096  # sentence embeddings kept in memory
+
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
@@ -0,0 +1,38 @@
+"""
+Lightweight in-process metrics registry for EduScribe backend.
+Counters and gauges live in memory and are exposed via /api/metrics.
+"""
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+_gauges: Dict[str, Any] = {}
+
+
+def increment(name: str, value: float = 1.0) -> None:
+    """Increment a counter by value."""
+    with _lock:
+        _counters[name] += value
+
+
+def set_gauge(name: str, value: Any) -> None:
+    """Set a gauge to its current value."""
+    with _lock:
+        _gauges[name] = value
+
+
+def get_counter(name: str) -> float:
+    """Read a single counter (0 if never incremented)."""
+    with _lock:
+        return _counters.get(name, 0.0)
+
+
+def snapshot() -> Dict[str, Any]:
+    """Return a copy of all counters and gauges."""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges)
+        }
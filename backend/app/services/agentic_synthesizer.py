@@ -2,27 +2,43 @@
 Agentic Note Synthesizer for EduScribe
 Combines multiple transcription chunks into structured, coherent notes
 """
-import asyncio
-from typing import List, Dict, Any, Optional
+import json
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Tuple
+from app.core import metrics
 from app.core.config import settings
+from app.services.context_compressor import compress_context
+from app.services.llm_client import llm_client
+from app.services.llm_scheduler import Priority
+from app.services.prompt_budget import PromptBudget
+from app.services.rag_generator import extractive_raw_notes
 
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except Exception:
-    GROQ_AVAILABLE = False
+# Tokens of the previous window's notes kept for continuity
+PREVIOUS_NOTES_TOKENS = 150
 
-# Initialize Groq client
-groq_client = None
-if GROQ_AVAILABLE and settings.GROQ_API_KEY:
-    groq_client = Groq(api_key=settings.GROQ_API_KEY)
+SYNTHESIS_PROMPT_TEMPLATE = """Fix transcription errors and create clear lecture notes.
+
+TRANSCRIPTION (has errors):
+{transcription}
+
+REFERENCE MATERIAL:
+{context}
+
+COVERED EARLIER IN THE LECTURE (do not repeat):
+{covered}
+
+PREVIOUS NOTES:
+{previous}
+
+Create organized notes with ## headers, ### subheaders, and bullet points. Fix all errors."""
 
 
 async def synthesize_structured_notes(
     transcriptions: List[Dict[str, Any]],
     rag_context: List[str],
     lecture_id: str,
-    previous_structured_notes: Optional[str] = None
+    previous_structured_notes: Optional[str] = None,
+    on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+    lecture_summary: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Synthesize multiple transcription chunks into structured, coherent notes.
@@ -32,6 +48,8 @@ async def synthesize_structured_notes(
         rag_context: Relevant document chunks from FAISS
         lecture_id: Current lecture ID
         previous_structured_notes: Previously generated structured notes
+        on_delta: Optional callback receiving the notes text as it streams in
+        lecture_summary: Topics and terms covered so far (LectureMemory.summary)
     
     Returns:
         Dict with structured notes and metadata
@@ -45,15 +63,8 @@ async def synthesize_structured_notes(
             "error": "No transcription content to synthesize"
         }
     
-    # Run synthesis in executor to avoid blocking
-    loop = asyncio.get_event_loop()
-    result = await loop.run_in_executor(
-        None,
-        _synthesize_sync,
-        full_transcription,
-        rag_context,
-        previous_structured_notes
-    )
+    result = await _synthesize(full_transcription, rag_context, previous_structured_notes, on_delta,
+                               lecture_summary)
     
     return {
         "success": True,
@@ -63,22 +74,20 @@ async def synthesize_structured_notes(
     }
 
 
-def _synthesize_sync(
+async def _synthesize(
     full_transcription: str,
     rag_context: List[str],
-    previous_notes: Optional[str]
+    previous_notes: Optional[str],
+    on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+    lecture_summary: Optional[str] = None
 ) -> str:
-    """Synchronous synthesis function."""
+    """Call the shared LLM client to synthesize notes."""
     
-    if not groq_client:
+    if not llm_client.available:
         print("⚠️  WARNING: GROQ client not available! Using fallback (will copy transcription errors)")
         print("⚠️  Please set GROQ_API_KEY in .env file!")
         return _fallback_synthesis(full_transcription)
     
-    # Build context
-    context_text = "\n\n".join(rag_context[:5]) if rag_context else "No additional context available."
-    previous_text = previous_notes if previous_notes else "This is the first set of notes for this lecture."
-    
     # Concise system prompt to avoid token limits
     system_prompt = """You are an expert note-taker. Fix transcription errors and create clear, accurate lecture notes.
 
@@ -89,37 +98,40 @@ Rules:
 4. Use ## for topics, ### for subtopics, bullets for details
 5. Use **bold** for key terms"""
 
-    # Concise user prompt to avoid token limits
-    # Limit context to avoid payload too large errors
-    limited_context = "\n".join(rag_context[:2]) if rag_context else "No context"
-    limited_previous = previous_notes[:300] if previous_notes else "First notes"
-    
-    user_prompt = f"""Fix transcription errors and create clear lecture notes.
+    # Only the document sentences that match this window
+    rag_context = await compress_context(full_transcription, rag_context)
 
-TRANSCRIPTION (has errors):
-{full_transcription}
-
-REFERENCE MATERIAL:
-{limited_context}
+    # Fit transcription, document context and lecture history into the prompt budget
+    budget = PromptBudget("synthesis", settings.PROMPT_BUDGET_SYNTHESIS)
+    budget.charge(system_prompt, SYNTHESIS_PROMPT_TEMPLATE)
+    budget.add("transcript", full_transcription, priority=0)
+    # The end of the previous notes is what this window continues from
+    budget.add("previous", previous_notes or "", priority=1, max_tokens=PREVIOUS_NOTES_TOKENS, keep_tail=True)
+    budget.add("covered", lecture_summary or "", priority=1, max_tokens=settings.LECTURE_MEMORY_TOKENS)
+    budget.add("context", rag_context or [], priority=2, separator="\n")
+    parts = budget.fit()
 
-PREVIOUS NOTES:
-{limited_previous}
-
-Create organized notes with ## headers, ### subheaders, and bullet points. Fix all errors."""
+    user_prompt = SYNTHESIS_PROMPT_TEMPLATE.format(
+        transcription=parts["transcript"],
+        context=parts["context"] or "No context",
+        covered=parts["covered"] or "Nothing yet",
+        previous=parts["previous"] or "First notes"
+    )
 
     try:
         print(f"🤖 Calling GROQ API for synthesis...")
-        response = groq_client.chat.completions.create(
-            model=settings.LLM_MODEL,
+        result = await llm_client.chat(
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
             temperature=0.3,
             max_tokens=800,  # Reduced to avoid rate limits
+            priority=Priority.SYNTHESIS,
+            on_delta=on_delta,
+            stage="synthesis",
         )
         
-        result = response.choices[0].message.content.strip()
         print(f"✅ GROQ API synthesis successful! Generated {len(result)} characters")
         return result
         
@@ -137,8 +149,162 @@ Create organized notes with ## headers, ### subheaders, and bullet points. Fix a
         return _fallback_synthesis(full_transcription)
 
 
+COMBINED_PROMPT_TEMPLATE = """Fix transcription errors and write lecture notes for this window.
+
+TRANSCRIPTION CHUNKS (have errors):
+{chunks}
+
+REFERENCE MATERIAL:
+{context}
+
+COVERED EARLIER IN THE LECTURE (do not repeat):
+{covered}
+
+PREVIOUS NOTES:
+{previous}
+
+Return a JSON object with exactly these keys:
+{{
+  "chunks": [{{"chunk": <chunk number>, "bullets": ["8-15 word bullet", ...]}}],
+  "structured_notes": "<markdown notes for the whole window>"
+}}
+
+- "chunks": 3-5 bullets for each of chunks {pending} only
+- "structured_notes": organized notes with ## headers, ### subheaders, bullet points and **bold** key terms
+Fix all errors. Return only JSON."""
+
+# Output tokens per chunk's bullets on top of the structured notes
+COMBINED_TOKENS_PER_CHUNK = 120
+
+
+async def synthesize_window_notes(
+    transcriptions: List[Dict[str, Any]],
+    rag_context: List[str],
+    lecture_id: str,
+    previous_structured_notes: Optional[str] = None,
+    lecture_summary: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Per-chunk bullets and structured notes for a window in one LLM call.
+    
+    Chunks that already have "enhanced_notes" (kept from the previous
+    window for context) are not given new bullets. Chunks the LLM gave no
+    bullets (failed call, truncated transcript) get extractive bullets.
+    
+    Returns:
+        Dict with structured notes, chunk_notes mapping the position of
+        each transcription in the window to its bullets, and
+        fallback_chunks listing the positions given extractive bullets
+    """
+    full_transcription = "\n".join([t.get("text", "") for t in transcriptions])
+    
+    if not full_transcription.strip():
+        return {
+            "success": False,
+            "error": "No transcription content to synthesize"
+        }
+    
+    pending = [i for i, t in enumerate(transcriptions) if not t.get("enhanced_notes")]
+    chunk_notes: Dict[int, str] = {}
+    structured_notes = None
+    
+    if llm_client.available:
+        try:
+            chunk_notes, structured_notes = await _synthesize_combined(
+                transcriptions, pending, rag_context, previous_structured_notes, lecture_summary
+            )
+        except Exception as e:
+            print(f"❌ Error in combined synthesis: {e}")
+    
+    if not structured_notes:
+        print(f"⚠️  Falling back to simple synthesis")
+        structured_notes = _fallback_synthesis(full_transcription)
+    
+    fallback_chunks = [i for i in pending if i not in chunk_notes]
+    for i in fallback_chunks:
+        chunk_notes[i] = extractive_raw_notes(transcriptions[i].get("text", ""))
+    if fallback_chunks:
+        metrics.increment("llm.fallbacks", len(fallback_chunks))
+        print(f"⚠️  Extractive bullets for {len(fallback_chunks)} chunks without LLM notes")
+    
+    return {
+        "success": True,
+        "structured_notes": structured_notes,
+        "chunk_notes": chunk_notes,
+        "fallback_chunks": fallback_chunks,
+        "transcription_count": len(transcriptions),
+        "lecture_id": lecture_id
+    }
+
+
+async def _synthesize_combined(
+    transcriptions: List[Dict[str, Any]],
+    pending: List[int],
+    rag_context: List[str],
+    previous_notes: Optional[str],
+    lecture_summary: Optional[str] = None
+) -> Tuple[Dict[int, str], str]:
+    """One JSON call returning chunk bullets and the window's structured notes"""
+    system_prompt = """You are an expert note-taker. Fix transcription errors and create clear, accurate lecture notes.
+Use document context for correct terminology. Output MUST be a valid JSON object."""
+
+    numbered = "\n\n".join(
+        f"[CHUNK {i + 1}]\n{t.get('text', '')}" for i, t in enumerate(transcriptions)
+    )
+    pending_numbers = ", ".join(str(i + 1) for i in pending) or "none"
+    
+    rag_context = await compress_context(
+        "\n".join(t.get("text", "") for t in transcriptions), rag_context
+    )
+    
+    budget = PromptBudget("combined window", settings.PROMPT_BUDGET_SYNTHESIS)
+    budget.charge(system_prompt, COMBINED_PROMPT_TEMPLATE, pending_numbers)
+    budget.add("transcript", numbered, priority=0)
+    budget.add("previous", previous_notes or "", priority=1, max_tokens=PREVIOUS_NOTES_TOKENS, keep_tail=True)
+    budget.add("covered", lecture_summary or "", priority=1, max_tokens=settings.LECTURE_MEMORY_TOKENS)
+    budget.add("context", rag_context or [], priority=2, separator="\n")
+    parts = budget.fit()
+    
+    user_prompt = COMBINED_PROMPT_TEMPLATE.format(
+        chunks=parts["transcript"],
+        context=parts["context"] or "No context",
+        covered=parts["covered"] or "Nothing yet",
+        previous=parts["previous"] or "First notes",
+        pending=pending_numbers
+    )
+    
+    print(f"🤖 Calling GROQ API for combined window notes ({len(pending)} new chunks)...")
+    result = await llm_client.chat(
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        temperature=0.3,
+        max_tokens=800 + COMBINED_TOKENS_PER_CHUNK * len(pending),
+        priority=Priority.SYNTHESIS,
+        response_format={"type": "json_object"},
+        stage="combined",
+    )
+    
+    data = json.loads(result)
+    chunk_notes = {}
+    for entry in data.get("chunks", []):
+        try:
+            position = int(entry.get("chunk")) - 1
+        except (TypeError, ValueError):
+            continue
+        bullets = [str(b).strip() for b in entry.get("bullets", []) if str(b).strip()]
+        if position in pending and bullets:
+            chunk_notes[position] = "\n".join(f"- {b.lstrip('-• ').strip()}" for b in bullets)
+    
+    structured_notes = str(data.get("structured_notes", "")).strip()
+    print(f"✅ Combined synthesis: {len(chunk_notes)} chunk notes, {len(structured_notes)} characters")
+    return chunk_notes, structured_notes
+
+
 def _fallback_synthesis(transcription: str) -> str:
     """Simple fallback if Groq is unavailable - creates basic formatted notes."""
+    metrics.increment("llm.fallbacks")
     # Split into sentences and clean
     sentences = [s.strip() for s in transcription.split('.') if s.strip()]
     
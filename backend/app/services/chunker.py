@@ -0,0 +1,154 @@
+"""
+Token-aware document chunker for EduScribe backend.
+Packs sentences into chunks that fit the embedding model's real
+sequence limit, so no chunk text is silently truncated before embedding.
+"""
+import re
+from typing import Any, Dict, List, Tuple
+
+# Sentence ends, or line breaks (slide bullets, headings)
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Start a fresh chunk at a page break once the current chunk is this full
+PAGE_BREAK_MIN_FILL = 0.5
+
+# [CLS] and [SEP] added by the embedding tokenizer
+SPECIAL_TOKENS = 2
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences / lines, dropping empty pieces."""
+    return [s.strip() for s in _SENTENCE_SPLIT_RE.split(text) if s and s.strip()]
+
+
+def get_chunk_token_limit(embedder) -> int:
+    """Word-piece budget per chunk for a SentenceTransformer model."""
+    return int(embedder.max_seq_length) - SPECIAL_TOKENS
+
+
+def count_tokens(tokenizer, text: str) -> int:
+    """Word-piece count of text (without special tokens)."""
+    return len(tokenizer.tokenize(text))
+
+
+def _split_long_sentence(tokenizer, sentence: str, max_tokens: int) -> List[Tuple[str, int]]:
+    """Split a sentence longer than max_tokens on word boundaries."""
+    pieces = []
+    words = []
+    word_tokens = 0
+
+    for word in sentence.split():
+        tokens = count_tokens(tokenizer, word)
+        if words and word_tokens + tokens > max_tokens:
+            pieces.append((" ".join(words), word_tokens))
+            words, word_tokens = [], 0
+        words.append(word)
+        word_tokens += tokens
+
+    if words:
+        pieces.append((" ".join(words), word_tokens))
+    return pieces
+
+
+class TokenChunker:
+    """
+    Incremental token-aware chunker.
+
+    Pages are fed one at a time with add_page(), which returns the chunks
+    completed so far; finish() returns the last one. Sentences are never
+    split unless a single sentence exceeds max_tokens. A page break starts
+    a new chunk once the current one is reasonably full, and the last
+    sentences of each chunk (up to overlap_tokens) are repeated at the
+    start of the next.
+    """
+
+    def __init__(self, tokenizer, max_tokens: int, overlap_tokens: int = 0):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+        self._current: List[Tuple[str, int, int]] = []  # (sentence, tokens, page)
+        self._current_tokens = 0
+        self._has_new_text = False  # current holds more than carried-over overlap
+
+    def add_page(self, page_number: int, page_text: str) -> List[Dict[str, Any]]:
+        """Add one page of text; returns chunks completed by it"""
+        completed = []
+
+        # Prefer to break at page boundaries once the chunk is reasonably full
+        if self._has_new_text and self._current_tokens >= self.max_tokens * PAGE_BREAK_MIN_FILL:
+            completed.append(self._flush())
+
+        for sentence in split_sentences(page_text):
+            tokens = count_tokens(self.tokenizer, sentence)
+            if tokens <= self.max_tokens:
+                pieces = [(sentence, tokens)]
+            else:
+                pieces = _split_long_sentence(self.tokenizer, sentence, self.max_tokens)
+
+            for piece, piece_tokens in pieces:
+                if self._has_new_text and self._current_tokens + piece_tokens > self.max_tokens:
+                    completed.append(self._flush())
+                # Trim overlap that would leave no room for this piece
+                while self._current and self._current_tokens + piece_tokens > self.max_tokens:
+                    _, dropped, _ = self._current.pop(0)
+                    self._current_tokens -= dropped
+                self._current.append((piece, piece_tokens, page_number))
+                self._current_tokens += piece_tokens
+                self._has_new_text = True
+
+        return completed
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Return the final partial chunk, if any"""
+        if self._has_new_text:
+            return [self._flush()]
+        return []
+
+    def _flush(self) -> Dict[str, Any]:
+        chunk = {
+            "text": " ".join(sentence for sentence, _, _ in self._current),
+            "token_count": self._current_tokens,
+            "page_start": self._current[0][2],
+            "page_end": self._current[-1][2]
+        }
+
+        # Carry trailing sentences forward as overlap
+        carried = []
+        carried_tokens = 0
+        for sentence, tokens, page in reversed(self._current):
+            if carried_tokens + tokens > self.overlap_tokens:
+                break
+            carried.insert(0, (sentence, tokens, page))
+            carried_tokens += tokens
+
+        self._current = carried
+        self._current_tokens = carried_tokens
+        self._has_new_text = False
+        return chunk
+
+
+def chunk_pages(
+    pages: List[Tuple[int, str]],
+    tokenizer,
+    max_tokens: int,
+    overlap_tokens: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Pack page text into token-bounded chunks (see TokenChunker).
+
+    Args:
+        pages: (page_number, text) pairs in document order
+        tokenizer: Hugging Face tokenizer of the embedding model
+        max_tokens: Word-piece budget per chunk
+        overlap_tokens: Word-piece overlap between consecutive chunks
+
+    Returns:
+        List of dicts with text, token_count, page_start and page_end
+    """
+    chunker = TokenChunker(tokenizer, max_tokens, overlap_tokens)
+    chunks = []
+    for page_number, page_text in pages:
+        chunks.extend(chunker.add_page(page_number, page_text))
+    chunks.extend(chunker.finish())
+    return chunks
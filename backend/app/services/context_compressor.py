@@ -0,0 +1,148 @@
+"""
+Extractive compression of retrieved document context for EduScribe
+Retrieved chunks are split into sentences, scored against the transcript
+with the retrieval embedding model, and only the most relevant sentences
+are kept up to a token budget.
+"""
+import asyncio
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.prompt_budget import count_tokens
+
+# Fragments shorter than this (page numbers, stray headings) are never kept
+MIN_SENTENCE_WORDS = 4
+
+# Sentence ends, blank lines and bullet starts
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9$(\"'])|\n\s*\n|\n(?=\s*[-•*]\s)")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of a document chunk, with PDF line breaks collapsed"""
+    sentences = []
+    for piece in _SENTENCE_SPLIT_RE.split(text):
+        sentence = " ".join(piece.split())
+        if len(sentence.split()) >= MIN_SENTENCE_WORDS:
+            sentences.append(sentence)
+    return sentences
+
+
+class SentenceEmbeddingCache:
+    """
+    LRU of normalized sentence embeddings.
+
+    The same document chunks are retrieved window after window, so most
+    sentences only need to be embedded once per process.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed(self, query: str, sentences: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Normalized (query vector, sentence matrix); blocking"""
+        from app.services.document_processor_mongodb import get_embedder
+
+        with self._lock:
+            vectors = {s: self._entries[s] for s in sentences if s in self._entries}
+        missing = list(dict.fromkeys(s for s in sentences if s not in vectors))
+
+        encoded = get_embedder().encode(
+            [query] + missing,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        metrics.increment("context.sentences_embedded", len(missing))
+
+        vectors.update(zip(missing, encoded[1:]))
+
+        with self._lock:
+            for sentence in sentences:
+                self._entries[sentence] = vectors[sentence]
+                self._entries.move_to_end(sentence)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return encoded[0], np.stack([vectors[s] for s in sentences])
+
+
+def _select(chunk_sentences: List[List[str]], scores: np.ndarray, max_tokens: int) -> List[str]:
+    """Best-scoring sentences within max_tokens, regrouped by chunk in reading order"""
+    flat = [(c, i) for c, sentences in enumerate(chunk_sentences) for i in range(len(sentences))]
+    kept = set()
+    used = 0
+    for index in np.argsort(-scores):
+        c, i = flat[index]
+        tokens = count_tokens(chunk_sentences[c][i]) + 1
+        if used + tokens > max_tokens:
+            continue
+        kept.add((c, i))
+        used += tokens
+
+    compressed = []
+    for c, sentences in enumerate(chunk_sentences):
+        text = " ".join(s for i, s in enumerate(sentences) if (c, i) in kept)
+        if text:
+            compressed.append(text)
+    return compressed
+
+
+async def compress_context(query: str, chunks: List[str], max_tokens: Optional[int] = None) -> List[str]:
+    """
+    Keep the sentences of chunks most similar to query, up to max_tokens.
+
+    Chunks keep their retrieval order and sentences their order within a
+    chunk. Context that already fits, or that can't be embedded, is
+    returned unchanged.
+
+    Args:
+        query: Text the context should support (transcript window, section notes)
+        chunks: Retrieved document chunks, most relevant first
+        max_tokens: Token budget (default CONTEXT_COMPRESSION_TOKENS)
+
+    Returns:
+        Compressed chunks, suitable for PromptBudget.add
+    """
+    max_tokens = max_tokens or settings.CONTEXT_COMPRESSION_TOKENS
+    if not settings.CONTEXT_COMPRESSION_ENABLED or not chunks or not query.strip():
+        return chunks
+
+    original_tokens = sum(count_tokens(chunk) for chunk in chunks)
+    if original_tokens <= max_tokens:
+        return chunks
+
+    chunk_sentences = [split_sentences(chunk) for chunk in chunks]
+    sentences = [s for group in chunk_sentences for s in group]
+    if not sentences:
+        return chunks
+
+    try:
+        loop = asyncio.get_event_loop()
+        query_vector, matrix = await loop.run_in_executor(
+            None, _sentence_cache.embed, query, sentences
+        )
+    except Exception as e:
+        print(f"⚠️  Context compression skipped: {e}")
+        return chunks
+
+    # Rows are normalized, so the dot product is the cosine similarity
+    scores = matrix @ query_vector
+    compressed = _select(chunk_sentences, scores, max_tokens)
+
+    compressed_tokens = sum(count_tokens(chunk) for chunk in compressed)
+    metrics.increment("context.tokens_in", original_tokens)
+    metrics.increment("context.tokens_out", compressed_tokens)
+    print(f"🗜️  Context compressed: {original_tokens} → {compressed_tokens} tokens "
+          f"({len(chunks)} chunks → {len(compressed)})")
+    return compressed
+
+
+# Process-wide sentence embedding cache
+_sentence_cache = SentenceEmbeddingCache(settings.CONTEXT_SENTENCE_CACHE_SIZE)
@@ -4,83 +4,97 @@ Replaces FAISS with MongoDB Atlas Vector Search
 """
 import os
 import asyncio
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
 from sentence_transformers import SentenceTransformer
-from PyPDF2 import PdfReader
-from pptx import Presentation
-import docx
 import numpy as np
 
+from app.core import metrics
 from app.core.config import settings
+from app.services.vector_search_backend import vector_search_breaker, ATLAS, FALLBACK
+from app.services.embedding_pool import EmbeddingPool
+from app.services.chunker import TokenChunker, chunk_pages, get_chunk_token_limit
+from app.services.page_extraction import (
+    extract_pages_from_pdf,
+    extract_pages_from_ppt,
+    extract_pages_from_docx,
+    extract_pages_from_txt,
+    get_file_type,
+    stream_document_pages
+)
+from app.services.upload_storage import hash_file
 from database.mongodb_connection import (
-    save_document,
+    get_document_content,
+    claim_document_content,
+    renew_document_content_claim,
+    release_document_content_claim,
+    save_document_content,
+    save_document_pages,
+    clear_document_content_chunks,
+    mark_document_content_processed,
+    link_document,
+    get_lecture_content_hashes,
     save_document_embeddings,
     vector_search,
     simple_vector_search,
-    mark_document_processed
+    get_chunks,
+    save_lexical_index
+)
+from app.services.lexical_index import (
+    DocumentIndexBuilder,
+    get_lecture_index,
+    invalidate_lecture_index,
+    reciprocal_rank_fusion
 )
 
-# Global embedder (lazy loaded)
+# Global embedder (lazy loaded, shared by request handlers and ingestion threads)
 _embedder = None
+_embedder_lock = threading.Lock()
+
+# Blocking extraction / embedding work runs here, off the event loop
+_ingestion_executor = ThreadPoolExecutor(
+    max_workers=settings.INGESTION_WORKERS,
+    thread_name_prefix="ingestion"
+)
 
 def get_embedder():
     """Get or create the sentence transformer model."""
     global _embedder
     if _embedder is None:
-        _embedder = SentenceTransformer(settings.EMBEDDING_MODEL)
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = SentenceTransformer(settings.EMBEDDING_MODEL)
     return _embedder
 
+def is_supported_document(filename: str) -> bool:
+    """Whether process_document can extract text from this file type."""
+    return get_file_type(filename) is not None
+
+def _join_pages(pages: List[Tuple[int, str]]) -> str:
+    return "\n".join(text for _, text in pages)
+
 def extract_text_from_pdf(pdf_path: str) -> str:
     """Extract text from PDF file."""
-    try:
-        reader = PdfReader(pdf_path)
-        text = []
-        for page in reader.pages:
-            content = page.extract_text()
-            if content:
-                text.append(content)
-        return "\n".join(text)
-    except Exception as e:
-        print(f"Error extracting PDF {pdf_path}: {e}")
-        return ""
+    return _join_pages(extract_pages_from_pdf(pdf_path))
 
 def extract_text_from_ppt(ppt_path: str) -> str:
     """Extract text from PPTX file."""
-    try:
-        prs = Presentation(ppt_path)
-        text = []
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if hasattr(shape, "text"):
-                    if shape.text.strip():
-                        text.append(shape.text.strip())
-        return "\n".join(text)
-    except Exception as e:
-        print(f"Error extracting PPT {ppt_path}: {e}")
-        return ""
+    return _join_pages(extract_pages_from_ppt(ppt_path))
 
 def extract_text_from_docx(docx_path: str) -> str:
     """Extract text from DOCX file."""
-    try:
-        doc = docx.Document(docx_path)
-        text = []
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                text.append(paragraph.text.strip())
-        return "\n".join(text)
-    except Exception as e:
-        print(f"Error extracting DOCX {docx_path}: {e}")
-        return ""
+    return _join_pages(extract_pages_from_docx(docx_path))
 
 def extract_text_from_txt(txt_path: str) -> str:
     """Extract text from TXT file."""
-    try:
-        with open(txt_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    except Exception as e:
-        print(f"Error extracting TXT {txt_path}: {e}")
-        return ""
+    return _join_pages(extract_pages_from_txt(txt_path))
 
 def chunk_text(text: str, chunk_size: int = 300) -> List[str]:
     """Split text into word chunks."""
@@ -92,102 +106,350 @@ def chunk_text(text: str, chunk_size: int = 300) -> List[str]:
             chunks.append(chunk.strip())
     return chunks
 
+def _chunk_token_limit(embedder) -> int:
+    """CHUNK_MAX_TOKENS, capped at what the embedding model can encode."""
+    limit = get_chunk_token_limit(embedder)
+    return min(settings.CHUNK_MAX_TOKENS or limit, limit)
+
+def chunk_document_pages(pages: List[Tuple[int, str]]) -> List[Dict[str, Any]]:
+    """
+    Split pages into chunks sized to the embedding model's token limit.
+    
+    Returns:
+        List of dicts with text, token_count, page_start and page_end
+    """
+    embedder = get_embedder()
+    return chunk_pages(
+        pages,
+        tokenizer=embedder.tokenizer,
+        max_tokens=_chunk_token_limit(embedder),
+        overlap_tokens=settings.CHUNK_OVERLAP_TOKENS
+    )
+
+def new_document_chunker() -> TokenChunker:
+    """Incremental chunker sized to the embedding model's token limit."""
+    embedder = get_embedder()
+    return TokenChunker(
+        embedder.tokenizer,
+        max_tokens=_chunk_token_limit(embedder),
+        overlap_tokens=settings.CHUNK_OVERLAP_TOKENS
+    )
+
+def _embed_chunks(chunk_records: List[Dict[str, Any]]) -> np.ndarray:
+    """Embed a batch of chunks (blocking, runs in the ingestion pool)."""
+    embedder = get_embedder()
+    return embedder.encode(
+        [c["text"] for c in chunk_records],
+        batch_size=settings.EMBEDDING_BATCH_SIZE,
+        show_progress_bar=False
+    )
+
+# Progress callback: receives a stage name ("extracting", "embedding", ...)
+ProgressCallback = Callable[[str], Awaitable[None]]
+
+async def _report(on_progress: Optional[ProgressCallback], stage: str) -> None:
+    if on_progress:
+        try:
+            await on_progress(stage)
+        except Exception as e:
+            print(f"⚠️  Progress callback failed: {e}")
+
+# Extracted pages are written to MongoDB in batches of this many
+PAGE_BATCH_SIZE = 32
+
+# One in-flight ingestion per content hash within this process: [lock, users].
+# Entries are dropped when the last user leaves; other processes are kept
+# out by the claim on the content document.
+_content_locks: Dict[str, List] = {}
+
+@asynccontextmanager
+async def _content_lock(content_hash: str):
+    entry = _content_locks.setdefault(content_hash, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _content_locks[content_hash]
+
+@asynccontextmanager
+async def _content_claim(content_hash: str):
+    """
+    Wait for the database claim on content, or for another process to
+    finish it. Yields the processed content document if it was ingested
+    meanwhile, else None with the claim held (renewed until exit).
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    while True:
+        existing = await get_document_content(content_hash)
+        if existing and existing.get("processed"):
+            yield existing
+            return
+        if await claim_document_content(content_hash, owner):
+            break
+        await asyncio.sleep(settings.CONTENT_CLAIM_POLL)
+
+    async def renew():
+        while True:
+            await asyncio.sleep(settings.CONTENT_CLAIM_SECONDS / 3)
+            await renew_document_content_claim(content_hash, owner)
+
+    renewer = asyncio.ensure_future(renew())
+    try:
+        yield None
+    finally:
+        renewer.cancel()
+        await release_document_content_claim(content_hash, owner)
+
 async def process_document(
     file_path: str,
     lecture_id: str,
-    filename: str
+    filename: str,
+    content_hash: Optional[str] = None,
+    file_size: Optional[int] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    embedding_pool: Optional[EmbeddingPool] = None
 ) -> Dict[str, Any]:
     """
     Process a document and store in MongoDB with embeddings.
     
+    Extracted text, embeddings and the BM25 index are stored once per
+    content hash; re-uploads of the same bytes only link the lecture.
+    
     Args:
         file_path: Path to the document file
         lecture_id: ID of the lecture this document belongs to
         filename: Original filename
+        content_hash: SHA-256 of the file (computed if not given)
+        file_size: Size of the file in bytes (read from disk if not given)
+        on_progress: Optional async callback notified at each ingestion stage
+        embedding_pool: Optional multi-process pool used instead of the
+            in-process embedder (bulk ingestion)
     
     Returns:
-        Dict with document_id, chunk_count, and status
+        Dict with document_id, content_hash, chunk_count, stage_seconds and status
     """
     print(f"📄 Processing document: {filename}")
     
-    # Extract text based on file type
-    file_ext = Path(file_path).suffix.lower()
-    
-    if file_ext == '.pdf':
-        text = extract_text_from_pdf(file_path)
-        file_type = 'pdf'
-    elif file_ext in ['.ppt', '.pptx']:
-        text = extract_text_from_ppt(file_path)
-        file_type = 'pptx'
-    elif file_ext in ['.doc', '.docx']:
-        text = extract_text_from_docx(file_path)
-        file_type = 'docx'
-    elif file_ext == '.txt':
-        text = extract_text_from_txt(file_path)
-        file_type = 'txt'
-    else:
-        return {
-            "success": False,
-            "error": f"Unsupported file type: {file_ext}"
-        }
+    loop = asyncio.get_event_loop()
     
-    if not text or len(text.strip()) < 50:
-        return {
-            "success": False,
-            "error": "No text extracted or text too short"
-        }
+    if content_hash is None:
+        content_hash = await loop.run_in_executor(_ingestion_executor, hash_file, file_path)
+    if file_size is None:
+        file_size = os.path.getsize(file_path)
     
-    print(f"✅ Extracted {len(text)} characters from {filename}")
+    async with _content_lock(content_hash), _content_claim(content_hash) as existing:
+        deduplicated = existing is not None
+        
+        if deduplicated:
+            print(f"♻️  {filename} already ingested ({content_hash[:12]}), linking to lecture")
+            file_type = existing["file_type"]
+            chunk_count = existing["chunk_count"]
+            text_length = existing["text_length"]
+            stage_seconds = {}
+        else:
+            result = await _ingest_content(file_path, filename, content_hash, on_progress, embedding_pool)
+            if not result["success"]:
+                return result
+            file_type = result["file_type"]
+            chunk_count = result["chunk_count"]
+            text_length = result["text_length"]
+            stage_seconds = result["stage_seconds"]
     
-    # Save document metadata to MongoDB
-    document_id = await save_document(
+    # Link the lecture to the shared content
+    document_id = await link_document(
         lecture_id=lecture_id,
         filename=filename,
         file_type=file_type,
         file_path=file_path,
-        content=text
+        content_hash=content_hash,
+        file_size=file_size
     )
+    invalidate_lecture_index(lecture_id)
+    print(f"✅ Linked document to lecture {lecture_id}: {document_id}")
     
-    print(f"✅ Saved document to MongoDB: {document_id}")
+    return {
+        "success": True,
+        "document_id": document_id,
+        "content_hash": content_hash,
+        "deduplicated": deduplicated,
+        "chunk_count": chunk_count,
+        "text_length": text_length,
+        "stage_seconds": stage_seconds
+    }
+
+async def _ingest_content(
+    file_path: str,
+    filename: str,
+    content_hash: str,
+    on_progress: Optional[ProgressCallback] = None,
+    embedding_pool: Optional[EmbeddingPool] = None
+) -> Dict[str, Any]:
+    """
+    Extract, chunk, embed and index new content under its hash.
     
-    # Chunk the text
-    chunks = chunk_text(text, chunk_size=300)
-    print(f"✅ Created {len(chunks)} chunks")
+    Pages are streamed from the extractor and chunked as they arrive;
+    chunks are embedded in batches of EMBEDDING_BATCH_SIZE (or the pool's
+    chunks_per_call, so every worker process is busy) and inserted in
+    batches of EMBEDDING_BATCH_SIZE, so memory stays bounded regardless
+    of document size. Wall time spent in each stage is returned as
+    stage_seconds.
+    """
+    loop = asyncio.get_event_loop()
     
-    # Generate embeddings
-    embedder = get_embedder()
-    embeddings = embedder.encode(chunks, show_progress_bar=False)
-    print(f"✅ Generated embeddings: {embeddings.shape}")
+    file_type = get_file_type(file_path)
+    if file_type is None:
+        return {
+            "success": False,
+            "error": f"Unsupported file type: {Path(file_path).suffix.lower()}"
+        }
+    
+    # Drop anything left behind by an interrupted ingestion of the same bytes
+    await clear_document_content_chunks(content_hash)
+    await save_document_content(content_hash, file_type)
+    
+    await _report(on_progress, "extracting")
+    chunker = await loop.run_in_executor(_ingestion_executor, new_document_chunker)
+    index_builder = DocumentIndexBuilder()
+    pending_pages: List[Tuple[int, str]] = []
+    pending_chunks: List[Dict[str, Any]] = []
+    chunk_count = 0
+    page_count = 0
+    text_length = 0
+    stage_seconds: Dict[str, float] = defaultdict(float)
+    embed_batch_size = embedding_pool.chunks_per_call if embedding_pool else settings.EMBEDDING_BATCH_SIZE
+    
+    try:
+        # Extraction threads/processes are separate from the ingestion pool,
+        # so a blocked page producer never starves chunking or embedding
+        waiting_since = time.perf_counter()
+        async for page_number, page_text in stream_document_pages(file_path):
+            started = time.perf_counter()
+            stage_seconds["extract"] += started - waiting_since
+            
+            page_count += 1
+            text_length += len(page_text)
+            pending_pages.append((page_number, page_text))
+            pending_chunks.extend(await loop.run_in_executor(
+                _ingestion_executor, chunker.add_page, page_number, page_text
+            ))
+            stage_seconds["chunk"] += time.perf_counter() - started
+            
+            if len(pending_pages) >= PAGE_BATCH_SIZE:
+                started = time.perf_counter()
+                await save_document_pages(content_hash, pending_pages)
+                stage_seconds["store"] += time.perf_counter() - started
+                pending_pages = []
+            
+            if len(pending_chunks) >= embed_batch_size:
+                if chunk_count == 0:
+                    await _report(on_progress, "embedding")
+                chunk_count += await _store_chunk_batch(
+                    content_hash, filename, file_type, pending_chunks, chunk_count,
+                    index_builder, embedding_pool, stage_seconds
+                )
+                pending_chunks = []
+            waiting_since = time.perf_counter()
+        stage_seconds["extract"] += time.perf_counter() - waiting_since
+        
+        pending_chunks.extend(chunker.finish())
+        
+        if text_length < 50:
+            await clear_document_content_chunks(content_hash)
+            return {
+                "success": False,
+                "error": "No text extracted or text too short"
+            }
+        
+        print(f"✅ Extracted {text_length} characters from {page_count} pages of {filename}")
+        
+        started = time.perf_counter()
+        await save_document_pages(content_hash, pending_pages)
+        stage_seconds["store"] += time.perf_counter() - started
+        if chunk_count == 0:
+            await _report(on_progress, "embedding")
+        chunk_count += await _store_chunk_batch(
+            content_hash, filename, file_type, pending_chunks, chunk_count,
+            index_builder, embedding_pool, stage_seconds
+        )
+        print(f"✅ Saved {chunk_count} embeddings to MongoDB")
+        
+        # Persist the BM25 index next to the embeddings
+        await _report(on_progress, "indexing")
+        started = time.perf_counter()
+        await save_lexical_index(content_hash, index_builder.build_shards(settings.LEXICAL_SHARD_CHUNKS))
+        stage_seconds["index"] += time.perf_counter() - started
+        print(f"✅ Saved lexical index for {chunk_count} chunks")
+    except Exception:
+        await clear_document_content_chunks(content_hash)
+        raise
+    
+    # Mark content as processed so later uploads can reuse it
+    await mark_document_content_processed(content_hash, chunk_count, text_length, page_count)
+    
+    return {
+        "success": True,
+        "file_type": file_type,
+        "chunk_count": chunk_count,
+        "text_length": text_length,
+        "page_count": page_count,
+        "stage_seconds": dict(stage_seconds)
+    }
+
+async def _store_chunk_batch(
+    content_hash: str,
+    filename: str,
+    file_type: str,
+    chunk_records: List[Dict[str, Any]],
+    first_index: int,
+    index_builder: DocumentIndexBuilder,
+    embedding_pool: Optional[EmbeddingPool] = None,
+    stage_seconds: Optional[Dict[str, float]] = None
+) -> int:
+    """Embed a batch of chunks and insert it in EMBEDDING_BATCH_SIZE slices; returns how many were stored."""
+    if not chunk_records:
+        return 0
+    if stage_seconds is None:
+        stage_seconds = defaultdict(float)
     
-    # Prepare data for MongoDB
+    started = time.perf_counter()
+    if embedding_pool is not None:
+        embeddings = await embedding_pool.embed([c["text"] for c in chunk_records])
+    else:
+        loop = asyncio.get_event_loop()
+        embeddings = await loop.run_in_executor(_ingestion_executor, _embed_chunks, chunk_records)
+    stage_seconds["embed"] += time.perf_counter() - started
+    
+    # Shared content is keyed by its hash
     embedding_data = [
         {
-            'lecture_id': lecture_id,
-            'document_id': document_id,
-            'chunk_text': chunk,
-            'chunk_index': i,
+            'document_id': content_hash,
+            'chunk_text': record["text"],
+            'chunk_index': first_index + i,
             'embedding': embedding,
             'metadata': {
                 'filename': filename,
-                'file_type': file_type
+                'file_type': file_type,
+                'token_count': record["token_count"],
+                'page_start': record["page_start"],
+                'page_end': record["page_end"]
             }
         }
-        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+        for i, (record, embedding) in enumerate(zip(chunk_records, embeddings))
     ]
+    started = time.perf_counter()
+    for start in range(0, len(embedding_data), settings.EMBEDDING_BATCH_SIZE):
+        await save_document_embeddings(embedding_data[start:start + settings.EMBEDDING_BATCH_SIZE])
+    stage_seconds["store"] += time.perf_counter() - started
     
-    # Save embeddings to MongoDB
-    await save_document_embeddings(embedding_data)
-    print(f"✅ Saved {len(chunks)} embeddings to MongoDB")
-    
-    # Mark document as processed
-    await mark_document_processed(document_id)
+    started = time.perf_counter()
+    for i, record in enumerate(chunk_records):
+        index_builder.add(first_index + i, record["text"])
+    stage_seconds["index"] += time.perf_counter() - started
     
-    return {
-        "success": True,
-        "document_id": document_id,
-        "chunk_count": len(chunks),
-        "text_length": len(text)
-    }
+    return len(chunk_records)
 
 async def query_documents(
     query_text: str,
@@ -196,43 +458,140 @@ async def query_documents(
     use_atlas_search: bool = True
 ) -> List[str]:
     """
-    Query documents using vector similarity search.
+    Query documents using hybrid lexical (BM25) + vector similarity search.
     
     Args:
         query_text: The query text (transcription)
         lecture_id: ID of the lecture
         top_k: Number of top results to return
-        use_atlas_search: Try Atlas Vector Search first, fallback to simple search
+        use_atlas_search: Allow Atlas Vector Search when the probe reports it available
     
     Returns:
         List of relevant text chunks
     """
+    chunks = await query_document_chunks(query_text, lecture_id, top_k, use_atlas_search)
+    return [c['chunk_text'] for c in chunks]
+
+async def query_document_chunks(
+    query_text: str,
+    lecture_id: str,
+    top_k: int = 10,
+    use_atlas_search: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Like query_documents, but returns chunk dicts with their stored
+    metadata (token_count, page_start, page_end).
+    
+    Args:
+        query_text: The query text (transcription)
+        lecture_id: ID of the lecture
+        top_k: Number of top results to return
+        use_atlas_search: Allow Atlas Vector Search when the probe reports it available
+    
+    Returns:
+        List of chunk dicts (chunk_text, document_id, chunk_index, metadata)
+    """
     # Generate query embedding
     embedder = get_embedder()
     query_embedding = embedder.encode(query_text, show_progress_bar=False)
     
-    # Try Atlas Vector Search first
-    if use_atlas_search:
+    # Shared documents linked to this lecture (resolved once per query)
+    content_hashes = await get_lecture_content_hashes(lecture_id)
+    
+    # BM25 candidates: exact terms (formula names, acronyms) the vectors miss
+    lexical_index = await get_lecture_index(lecture_id, content_hashes)
+    lexical_hits = []
+    if lexical_index:
+        lexical_hits = lexical_index.search(query_text, settings.LEXICAL_CANDIDATES)
+    
+    # Large course packs: only score the lexical candidates with vectors
+    if lexical_hits and lexical_index.chunk_count > settings.LEXICAL_CANDIDATES:
+        candidates: Dict[str, List[int]] = {}
+        for (document_id, chunk_index), _ in lexical_hits:
+            candidates.setdefault(document_id, []).append(chunk_index)
+        
+        vector_results = await simple_vector_search(
+            query_embedding=query_embedding,
+            lecture_id=lecture_id,
+            top_k=len(lexical_hits),
+            candidates=candidates
+        )
+        metrics.increment("retrieval.lexical_prefilter_queries")
+        print(f"✅ Lexical pre-filter narrowed {lexical_index.chunk_count} chunks to {len(lexical_hits)} candidates")
+    else:
+        vector_results = await _vector_search_with_fallback(
+            query_embedding, lecture_id, top_k, use_atlas_search, content_hashes
+        )
+    
+    if not lexical_hits:
+        return vector_results[:top_k]
+    
+    return await _fuse_results(vector_results, lexical_hits, top_k)
+
+async def _vector_search_with_fallback(
+    query_embedding: np.ndarray,
+    lecture_id: str,
+    top_k: int,
+    use_atlas_search: bool,
+    content_hashes: List[str]
+) -> List[Dict[str, Any]]:
+    """Run vector search on the backend chosen by the circuit breaker."""
+    # Route to Atlas only while the capability probe and circuit breaker allow it
+    backend = vector_search_breaker.select_backend() if use_atlas_search else FALLBACK
+    
+    if backend == ATLAS:
         try:
             results = await vector_search(
                 query_embedding=query_embedding,
                 lecture_id=lecture_id,
-                top_k=top_k
+                top_k=top_k,
+                content_hashes=content_hashes
             )
+            vector_search_breaker.record_success()
+            metrics.increment("retrieval.atlas_queries")
             print(f"✅ Atlas Vector Search returned {len(results)} results")
-            return [r['chunk_text'] for r in results]
+            return results
         except Exception as e:
+            vector_search_breaker.record_failure(e)
             print(f"⚠️  Atlas Vector Search failed, using fallback: {e}")
     
     # Fallback to simple cosine similarity
     results = await simple_vector_search(
         query_embedding=query_embedding,
         lecture_id=lecture_id,
-        top_k=top_k
+        top_k=top_k,
+        content_hashes=content_hashes
     )
+    metrics.increment("retrieval.fallback_queries")
     
     print(f"✅ Simple vector search returned {len(results)} results")
-    return [r['chunk_text'] for r in results]
+    return results
+
+async def _fuse_results(
+    vector_results: List[Dict[str, Any]],
+    lexical_hits: List,
+    top_k: int
+) -> List[Dict[str, Any]]:
+    """Fuse vector and BM25 rankings with weighted reciprocal rank fusion."""
+    chunks = {
+        (r['document_id'], r['chunk_index']): r
+        for r in vector_results
+    }
+    
+    fused = reciprocal_rank_fusion(
+        rankings=[list(chunks.keys()), [key for key, _ in lexical_hits]],
+        weights=[1.0, settings.HYBRID_LEXICAL_WEIGHT],
+        k=settings.HYBRID_RRF_K
+    )
+    top_keys = [key for key, _ in fused[:top_k]]
+    
+    # Lexical-only hits were never loaded by the vector search
+    missing = [key for key in top_keys if key not in chunks]
+    if missing:
+        chunks.update(await get_chunks(missing))
+    
+    metrics.increment("retrieval.hybrid_queries")
+    return [chunks[key] for key in top_keys if key in chunks]
 
 # Backward compatibility: Keep the old function name
 async def query_documents_faiss(query_text: str, lecture_id: str, top_k: int = 10) -> List[str]:
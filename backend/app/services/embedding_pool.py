@@ -0,0 +1,106 @@
+"""
+Multi-process embedding pool for bulk document ingestion
+Chunk batches are spread across worker processes that each load the
+embedding model once; chunks are sorted by length to minimise padding.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+from app.core import metrics
+from app.core.config import settings
+
+# Model loaded once per worker process by _init_worker
+_worker_model = None
+
+
+def _init_worker(model_name: str, torch_threads: int) -> None:
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # Split the cores between workers instead of oversubscribing them
+    torch.set_num_threads(torch_threads)
+    _worker_model = SentenceTransformer(model_name)
+
+
+def _encode_batch(texts: List[str], batch_size: int) -> np.ndarray:
+    return _worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+
+
+class EmbeddingPool:
+    """
+    Embeds chunk texts across a pool of worker processes.
+
+    embed() sorts texts by length, splits them into tasks of task_size
+    texts (so each task pads to similar lengths), runs the tasks in
+    parallel and returns embeddings in the original order. Callers should
+    pass about chunks_per_call texts at a time so every worker gets
+    several tasks.
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        model_name: Optional[str] = None,
+        task_size: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ):
+        cpu_count = os.cpu_count() or 1
+        self.processes = processes or settings.EMBEDDING_PROCESSES or max(1, cpu_count // 2)
+        self.model_name = model_name or settings.EMBEDDING_MODEL
+        self.task_size = task_size or settings.EMBEDDING_POOL_TASK_SIZE
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self._torch_threads = max(1, cpu_count // self.processes)
+        self.chunks_per_call = self.processes * self.task_size * settings.EMBEDDING_POOL_TASKS_PER_PROCESS
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: workers must not inherit the parent's event loop,
+                    # Mongo client threads or torch state
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.processes,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(self.model_name, self._torch_threads)
+                    )
+                    print(f"✅ Embedding pool started: {self.processes} processes "
+                          f"x {self._torch_threads} threads")
+        return self._executor
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in parallel; rows match the order of texts."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        loop = asyncio.get_event_loop()
+        executor = self._get_executor()
+
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        tasks = [order[start:start + self.task_size] for start in range(0, len(order), self.task_size)]
+
+        results = await asyncio.gather(*[
+            loop.run_in_executor(executor, _encode_batch, [texts[i] for i in task], self.batch_size)
+            for task in tasks
+        ])
+
+        embeddings = np.empty((len(texts), results[0].shape[1]), dtype=results[0].dtype)
+        for task, task_embeddings in zip(tasks, results):
+            embeddings[task] = task_embeddings
+
+        metrics.increment("ingestion.pool_chunks_embedded", len(texts))
+        return embeddings
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
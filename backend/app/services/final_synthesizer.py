@@ -10,22 +10,22 @@ comprehensive, humanized final notes with:
 - Further reading from documents
 """
 
+import asyncio
 import json
 import re
 import textwrap
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from collections import Counter
 import os
 
 # Import from existing services
+from app.core import metrics
 from app.core.config import settings
-
-# Try to import Groq
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except Exception:
-    GROQ_AVAILABLE = False
+from app.services.context_compressor import compress_context
+from app.services.llm_client import llm_client
+from app.services.llm_scheduler import Priority
+from app.services.prompt_budget import PromptBudget, count_tokens, trim_to_tokens
+from app.services.task_graph import run_task_graph
 
 # Try to import FAISS
 try:
@@ -42,23 +42,43 @@ except Exception:
     ST_AVAILABLE = False
 
 
+# Tokens of transcription notes per section; document context gets the rest
+SECTION_NOTES_TOKENS = 300
+
+# Most relevant document sentences kept per section (before budgeting)
+SECTION_CONTEXT_TOKENS = 450
+
+# Reduce levels before giving up on shrinking further (5^6 groups is far beyond any lecture)
+MAX_REDUCE_LEVELS = 6
+
+MAP_PROMPT_TEMPLATE = """Condense these lecture notes (part {part} of {parts}) to at most {words} words.
+
+NOTES:
+{notes}
+
+Rules:
+- Keep EVERY topic as a ## heading with its most important points as bullets
+- Keep **bold** key terms and $$LaTeX$$ formulas
+- Merge repeated points, drop filler
+- Do NOT add information"""
+
+# (section index, section title, text delta) while sections stream in
+SectionDeltaCallback = Callable[[int, str, str], Awaitable[None]]
+
+
 class FinalSynthesizer:
     """Synthesizes final comprehensive notes from accumulated structured notes"""
     
     def __init__(self, lecture_id: str):
         self.lecture_id = lecture_id
-        self.groq_client = None
-        
-        if GROQ_AVAILABLE and settings.GROQ_API_KEY:
-            try:
-                self.groq_client = Groq(api_key=settings.GROQ_API_KEY)
-            except Exception as e:
-                print(f"Failed to initialize Groq: {e}")
+        # Shared, pooled client (no per-lecture connection setup)
+        self.llm = llm_client
     
-    def synthesize(
+    async def synthesize(
         self,
         structured_notes_list: List[str],
-        rag_context: Optional[List[str]] = None
+        rag_context: Optional[List[str]] = None,
+        on_section_delta: Optional[SectionDeltaCallback] = None
     ) -> Dict[str, Any]:
         """
         Synthesize final comprehensive notes
@@ -66,6 +86,7 @@ class FinalSynthesizer:
         Args:
             structured_notes_list: List of structured note strings (markdown)
             rag_context: Optional document context from FAISS
+            on_section_delta: Optional callback receiving section text as it streams in
             
         Returns:
             Dict with final notes, glossary, takeaways, etc.
@@ -76,17 +97,20 @@ class FinalSynthesizer:
         # Combine all structured notes
         combined_notes = "\n\n---\n\n".join(structured_notes_list)
         
-        # Build outline
-        outline = self._build_outline(combined_notes)
-        
-        # Extract sections
-        sections = self._extract_sections(combined_notes, outline, rag_context)
-        
-        # Build glossary
-        glossary = self._build_glossary(combined_notes, rag_context)
-        
-        # Extract key takeaways
-        takeaways = self._extract_takeaways(sections)
+        # Outline -> sections (in parallel) -> takeaways, with the glossary
+        # running alongside from the start
+        results = await run_task_graph({
+            "outline": ([], lambda: self._build_outline(combined_notes)),
+            "glossary": ([], lambda: self._build_glossary(combined_notes, rag_context)),
+            "sections": (["outline"], lambda outline: self._extract_sections(
+                combined_notes, outline, rag_context, on_section_delta
+            )),
+            "takeaways": (["sections"], lambda sections: self._extract_takeaways(sections))
+        })
+        outline = results["outline"]
+        sections = results["sections"]
+        glossary = results["glossary"]
+        takeaways = results["takeaways"]
         
         # Generate final markdown
         final_markdown = self._assemble_markdown(
@@ -106,10 +130,103 @@ class FinalSynthesizer:
             "lecture_id": self.lecture_id
         }
     
-    def _build_outline(self, combined_notes: str) -> Dict[str, Any]:
+    async def synthesize_map_reduce(
+        self,
+        structured_notes_list: List[str],
+        rag_context: Optional[List[str]] = None,
+        on_section_delta: Optional[SectionDeltaCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Final notes for long lectures via hierarchical summaries.
+        
+        Structured notes are packed into groups of MAP_REDUCE_GROUP_TOKENS
+        and condensed in parallel; the summaries are grouped and condensed
+        again until they fit a single call, so every part of the lecture
+        reaches the outline, sections and glossary. Latency grows with the
+        number of levels (logarithmic in lecture length).
+        """
+        if not structured_notes_list:
+            return self._empty_result()
+        
+        summaries = list(structured_notes_list)
+        level = 0
+        while sum(count_tokens(s) for s in summaries) > settings.MAP_REDUCE_GROUP_TOKENS:
+            if level >= MAX_REDUCE_LEVELS:
+                print(f"⚠️  Map-reduce stopped after {level} levels ({len(summaries)} summaries)")
+                break
+            groups = self._group_by_tokens(summaries, settings.MAP_REDUCE_GROUP_TOKENS)
+            summaries = await asyncio.gather(*[
+                self._condense_group(group, index + 1, len(groups))
+                for index, group in enumerate(groups)
+            ])
+            level += 1
+            print(f"🗜️  Map-reduce level {level}: {len(groups)} groups -> "
+                  f"{sum(count_tokens(s) for s in summaries)} tokens")
+        
+        return await self.synthesize(summaries, rag_context, on_section_delta)
+    
+    def _group_by_tokens(self, texts: List[str], max_tokens: int) -> List[List[str]]:
+        """Pack consecutive texts into groups of at most max_tokens (order preserved)"""
+        groups: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for text in texts:
+            tokens = count_tokens(text)
+            if current and current_tokens + tokens > max_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+        return groups
+    
+    async def _condense_group(self, group: List[str], part: int, parts: int) -> str:
+        """Map step: condense one group of notes to MAP_REDUCE_SUMMARY_TOKENS"""
+        notes = "\n\n".join(group)
+        summary_tokens = settings.MAP_REDUCE_SUMMARY_TOKENS
+        if count_tokens(notes) <= summary_tokens:
+            return notes
+        
+        if self.llm.available:
+            # A single oversized note is trimmed (and logged) rather than overflowing the call
+            notes = trim_to_tokens(notes, settings.MAP_REDUCE_GROUP_TOKENS)
+            user_prompt = MAP_PROMPT_TEMPLATE.format(
+                part=part,
+                parts=parts,
+                words=int(summary_tokens * 0.7),
+                notes=notes
+            )
+            try:
+                return await self.llm.chat(
+                    messages=[
+                        {"role": "system", "content": "You condense lecture notes without losing any topic."},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.15,
+                    max_tokens=summary_tokens,
+                    priority=Priority.FINAL,
+                    stage="map"
+                )
+            except Exception as e:
+                print(f"Group summary failed: {e}")
+                metrics.increment("llm.fallbacks")
+        
+        # Fallback: keep each topic heading with its first points
+        return self._outline_digest(notes, summary_tokens)
+    
+    def _outline_digest(self, notes: str, max_tokens: int) -> str:
+        """Headings plus leading bullets of each topic, within max_tokens"""
+        topics = re.split(r'(?=^##\s)', notes, flags=re.MULTILINE)
+        per_topic = max(max_tokens // max(len(topics), 1), 16)
+        return "\n\n".join(
+            trim_to_tokens(topic.strip(), per_topic) for topic in topics if topic.strip()
+        )
+    
+    async def _build_outline(self, combined_notes: str) -> Dict[str, Any]:
         """Build clean outline from messy structured notes"""
         
-        if not self.groq_client:
+        if not self.llm.available:
             return {"title": "Lecture Notes", "sections": ["Introduction", "Main Content"]}
         
         # Extract headings from markdown
@@ -126,9 +243,9 @@ class FinalSynthesizer:
         system_prompt = """You are an expert at organizing educational content. 
 Create a clean, concise outline. Merge similar topics. NO repetition."""
 
-        user_prompt = f"""Lecture headings (may have duplicates):
+        user_template = """Lecture headings (may have duplicates):
 
-{chr(10).join(unique_headings[:15])}
+{headings}
 
 Create outline with:
 1. ONE concise title (4-6 words, topic-focused)
@@ -140,18 +257,26 @@ Return ONLY JSON:
 Example:
 {{"title": "Machine Learning Fundamentals", "sections": ["Core Concepts", "Learning Types", "Neural Networks"]}}"""
 
+        # As many headings as the budget allows (in lecture order)
+        budget = PromptBudget("outline", settings.PROMPT_BUDGET_FINAL_SUMMARY)
+        budget.charge(system_prompt, user_template)
+        budget.add("headings", unique_headings, priority=0, separator="\n")
+        parts = budget.fit()
+        
+        user_prompt = user_template.format(headings=parts["headings"])
+
         try:
-            response = self.groq_client.chat.completions.create(
-                model=settings.LLM_MODEL,
+            result = await self.llm.chat(
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.15,
-                max_tokens=150
+                max_tokens=150,
+                priority=Priority.FINAL,
+                stage="outline"
             )
             
-            result = response.choices[0].message.content.strip()
             result = self._strip_code_fences(result)
             outline = json.loads(result)
             
@@ -161,6 +286,7 @@ Example:
                 return outline
         except Exception as e:
             print(f"Outline generation failed: {e}")
+            metrics.increment("llm.fallbacks")
         
         # Fallback
         return {
@@ -168,11 +294,12 @@ Example:
             "sections": unique_headings[1:4] if len(unique_headings) > 1 else ["Main Content"]
         }
     
-    def _extract_sections(
+    async def _extract_sections(
         self,
         combined_notes: str,
         outline: Dict[str, Any],
-        rag_context: Optional[List[str]]
+        rag_context: Optional[List[str]],
+        on_section_delta: Optional[SectionDeltaCallback] = None
     ) -> List[Dict[str, Any]]:
         """Extract and enhance sections with RAG context"""
         
@@ -182,17 +309,23 @@ Example:
         # Split combined notes into chunks
         note_chunks = combined_notes.split("---")
         
-        for section_name in section_names:
-            # Find relevant content for this section
-            relevant_content = self._find_relevant_content(section_name, note_chunks)
-            
-            # Enhance with RAG if available
-            enhanced_text = self._enhance_section(
+        def section_delta(index: int, section_name: str):
+            if on_section_delta is None:
+                return None
+            return lambda delta: on_section_delta(index, section_name, delta)
+        
+        # Enhance all sections concurrently (with RAG if available)
+        enhanced_texts = await asyncio.gather(*[
+            self._enhance_section(
                 section_name,
-                relevant_content,
-                rag_context
+                self._find_relevant_content(section_name, note_chunks),
+                rag_context,
+                section_delta(index, section_name)
             )
-            
+            for index, section_name in enumerate(section_names)
+        ])
+        
+        for section_name, enhanced_text in zip(section_names, enhanced_texts):
             # Extract formulas
             formulas = self._extract_formulas(enhanced_text)
             
@@ -221,20 +354,18 @@ Example:
         
         return "\n\n".join(relevant)
     
-    def _enhance_section(
+    async def _enhance_section(
         self,
         section_name: str,
         content: str,
-        rag_context: Optional[List[str]]
+        rag_context: Optional[List[str]],
+        on_delta: Optional[Callable[[str], Awaitable[None]]] = None
     ) -> str:
         """Enhance section with RAG context - CONCISE bullet points with PDF integration"""
         
-        if not self.groq_client:
+        if not self.llm.available:
             return content[:800]
         
-        # Use MORE context from PDF
-        context_text = "\n\n".join(rag_context[:5]) if rag_context else "No document context"
-        
         system_prompt = """You are creating CONCISE, STRUCTURED lecture notes.
 
 CRITICAL RULES:
@@ -252,13 +383,13 @@ FORMAT:
 - Formula: $$LaTeX$$
 - Example if relevant"""
 
-        user_prompt = f"""Topic: {section_name}
+        user_template = """Topic: {section_name}
 
 TRANSCRIPTION NOTES (what teacher said):
-{content[:1000]}
+{content}
 
 DOCUMENT CONTENT (PDF/PPT - USE THIS HEAVILY):
-{context_text[:2000]}
+{context}
 
 Create CONCISE notes:
 1. Extract KEY points from BOTH sources
@@ -274,20 +405,39 @@ Output format:
 - Formula: $$x = y$$
 - Point 3"""
 
+        # Each section keeps the document sentences that match its own notes
+        rag_context = await compress_context(
+            f"{section_name}\n{content}", rag_context or [], max_tokens=SECTION_CONTEXT_TOKENS
+        )
+        
+        # Use MORE context from PDF: notes are capped, documents fill the rest
+        budget = PromptBudget(f"final section '{section_name}'", settings.PROMPT_BUDGET_FINAL_SECTION)
+        budget.charge(system_prompt, user_template, section_name)
+        budget.add("notes", content, priority=0, max_tokens=SECTION_NOTES_TOKENS)
+        budget.add("context", rag_context or [], priority=1)
+        parts = budget.fit()
+        
+        user_prompt = user_template.format(
+            section_name=section_name,
+            content=parts["notes"],
+            context=parts["context"] or "No document context"
+        )
+
         try:
-            response = self.groq_client.chat.completions.create(
-                model=settings.LLM_MODEL,
+            return await self.llm.chat(
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.2,
-                max_tokens=500  # Shorter output
+                max_tokens=500,  # Shorter output
+                priority=Priority.FINAL,
+                on_delta=on_delta,
+                stage="section"
             )
-            
-            return response.choices[0].message.content.strip()
         except Exception as e:
             print(f"Section enhancement failed: {e}")
+            metrics.increment("llm.fallbacks")
             return content[:800]
     
     def _extract_formulas(self, text: str) -> List[str]:
@@ -318,7 +468,7 @@ Output format:
         
         return unique_formulas[:5]  # Max 5 formulas per section
     
-    def _build_glossary(
+    async def _build_glossary(
         self,
         combined_notes: str,
         rag_context: Optional[List[str]]
@@ -332,19 +482,16 @@ Output format:
         term_counts = Counter(terms)
         top_terms = [term for term, _ in term_counts.most_common(6)]  # Reduced to 6
         
-        if not top_terms or not self.groq_client:
+        if not top_terms or not self.llm.available:
             return {}
         
-        # Use MORE context from PDF
-        context_text = "\n\n".join(rag_context[:5]) if rag_context else ""
-        
         system_prompt = "Create SHORT, PRECISE definitions using document content."
         
-        user_prompt = f"""Define these terms:
-{json.dumps(top_terms)}
+        user_template = """Define these terms:
+{terms}
 
 DOCUMENT CONTEXT (use this for definitions):
-{context_text[:1500]}
+{context}
 
 Return JSON: {{"definitions": {{"Term": "One sentence definition (15-20 words max)", ...}}}}
 
@@ -353,39 +500,49 @@ Rules:
 - Max 20 words per definition
 - Focus on key concept only"""
 
+        # Use MORE context from PDF, as much as the budget allows
+        terms = json.dumps(top_terms)
+        budget = PromptBudget("glossary", settings.PROMPT_BUDGET_FINAL_SUMMARY)
+        budget.charge(system_prompt, user_template, terms)
+        budget.add("context", rag_context or [], priority=0)
+        parts = budget.fit()
+        
+        user_prompt = user_template.format(terms=terms, context=parts["context"])
+
         try:
-            response = self.groq_client.chat.completions.create(
-                model=settings.LLM_MODEL,
+            result = await self.llm.chat(
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.15,
-                max_tokens=250
+                max_tokens=250,
+                priority=Priority.FINAL,
+                stage="glossary"
             )
             
-            result = response.choices[0].message.content.strip()
             result = self._strip_code_fences(result)
             data = json.loads(result)
             return data.get("definitions", {})
         except Exception as e:
             print(f"Glossary generation failed: {e}")
+            metrics.increment("llm.fallbacks")
             return {}
     
-    def _extract_takeaways(self, sections: List[Dict[str, Any]]) -> List[str]:
+    async def _extract_takeaways(self, sections: List[Dict[str, Any]]) -> List[str]:
         """Extract key takeaways - CONCISE, actionable points"""
         
         all_content = "\n\n".join([s["content"] for s in sections])
         
-        if not self.groq_client:
+        if not self.llm.available:
             # Simple fallback: extract bullet points
             bullets = re.findall(r'^[-•]\s*(.+)$', all_content, re.MULTILINE)
             return bullets[:4]
         
         system_prompt = "Extract 4 CONCISE key takeaways. Each: 12-18 words max."
         
-        user_prompt = f"""LECTURE CONTENT:
-{all_content[:1500]}
+        user_template = """LECTURE CONTENT:
+{content}
 
 Extract 4 key takeaways:
 - Most important concepts
@@ -395,23 +552,31 @@ Extract 4 key takeaways:
 
 Return JSON: {{"takeaways": ["Concise point 1", "Concise point 2", ...]}}"""
 
+        budget = PromptBudget("takeaways", settings.PROMPT_BUDGET_FINAL_SUMMARY)
+        budget.charge(system_prompt, user_template)
+        budget.add("sections", [s["content"] for s in sections], priority=0)
+        parts = budget.fit()
+        
+        user_prompt = user_template.format(content=parts["sections"])
+
         try:
-            response = self.groq_client.chat.completions.create(
-                model=settings.LLM_MODEL,
+            result = await self.llm.chat(
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.15,
-                max_tokens=200
+                max_tokens=200,
+                priority=Priority.FINAL,
+                stage="takeaways"
             )
             
-            result = response.choices[0].message.content.strip()
             result = self._strip_code_fences(result)
             data = json.loads(result)
             return data.get("takeaways", [])[:4]  # Max 4
         except Exception as e:
             print(f"Takeaways extraction failed: {e}")
+            metrics.increment("llm.fallbacks")
             return []
     
     def _assemble_markdown(
@@ -494,7 +659,8 @@ Return JSON: {{"takeaways": ["Concise point 1", "Concise point 2", ...]}}"""
 async def synthesize_final_notes(
     lecture_id: str,
     structured_notes_list: List[str],
-    rag_context: Optional[List[str]] = None
+    rag_context: Optional[List[str]] = None,
+    on_section_delta: Optional[SectionDeltaCallback] = None
 ) -> Dict[str, Any]:
     """
     Async wrapper for final synthesis
@@ -503,21 +669,12 @@ async def synthesize_final_notes(
         lecture_id: ID of the lecture
         structured_notes_list: List of structured note strings
         rag_context: Optional document context
+        on_section_delta: Optional callback receiving section text as it streams in
         
     Returns:
         Dict with final notes and metadata
     """
-    import asyncio
-    
     synthesizer = FinalSynthesizer(lecture_id)
-    
-    # Run in executor to avoid blocking
-    loop = asyncio.get_event_loop()
-    result = await loop.run_in_executor(
-        None,
-        synthesizer.synthesize,
-        structured_notes_list,
-        rag_context
-    )
-    
-    return result
+    if settings.FINAL_NOTES_MODE == "map_reduce":
+        return await synthesizer.synthesize_map_reduce(structured_notes_list, rag_context, on_section_delta)
+    return await synthesizer.synthesize(structured_notes_list, rag_context, on_section_delta)
@@ -0,0 +1,168 @@
+"""
+Background document ingestion jobs for EduScribe
+Uploads return a job id immediately; files are ingested in parallel by
+a bounded worker pool and progress is pushed to the lecture WebSocket.
+"""
+import asyncio
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.document_processor_mongodb import process_document
+
+# How long finished jobs stay queryable via the status endpoint
+FINISHED_JOB_TTL = 3600  # seconds
+
+# Notifier: (lecture_id, message) -> None, e.g. WebSocket send
+Notifier = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+class IngestionJobManager:
+    """Tracks ingestion jobs and runs their files on a bounded worker pool"""
+
+    def __init__(self, max_workers: int):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._notifier: Optional[Notifier] = None
+
+    def set_notifier(self, notifier: Notifier) -> None:
+        """Register where progress events are sent"""
+        self._notifier = notifier
+
+    def create_job(self, lecture_id: str, files: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Queue files for ingestion and start the job in the background.
+
+        Args:
+            lecture_id: Lecture the documents belong to
+            files: Dicts with filename, file_path, content_hash, file_size
+        """
+        self._evict_finished()
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "lecture_id": lecture_id,
+            "status": "queued",
+            "created_at": time.time(),
+            "finished_at": None,
+            "total_files": len(files),
+            "completed_files": 0,
+            "files": [
+                {
+                    "filename": f["filename"],
+                    "file_path": f["file_path"],
+                    "content_hash": f["content_hash"],
+                    "file_size": f["file_size"],
+                    "status": "queued",
+                    "stage": None,
+                    "document_id": None,
+                    "deduplicated": False,
+                    "chunk_count": 0,
+                    "error": None
+                }
+                for f in files
+            ]
+        }
+        self.jobs[job_id] = job
+        self._tasks[job_id] = asyncio.create_task(self._run(job))
+        metrics.increment("ingestion.jobs_created")
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    def get_lecture_jobs(self, lecture_id: str, active_only: bool = False) -> List[Dict[str, Any]]:
+        jobs = [job for job in self.jobs.values() if job["lecture_id"] == lecture_id]
+        if active_only:
+            jobs = [job for job in jobs if job["status"] in ("queued", "running")]
+        return jobs
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        job["status"] = "running"
+        await self._notify(job, {"type": "ingestion_started"})
+
+        await asyncio.gather(*[self._run_file(job, entry) for entry in job["files"]])
+
+        failed = sum(1 for entry in job["files"] if entry["status"] == "failed")
+        job["status"] = "completed" if not failed else ("failed" if failed == job["total_files"] else "partial")
+        job["finished_at"] = time.time()
+        self._tasks.pop(job["job_id"], None)
+
+        await self._notify(job, {"type": "ingestion_complete", "failed_files": failed})
+        print(f"✅ Ingestion job {job['job_id']} {job['status']}: "
+              f"{job['total_files'] - failed}/{job['total_files']} files")
+
+    async def _run_file(self, job: Dict[str, Any], entry: Dict[str, Any]) -> None:
+        async with self._semaphore:
+            entry["status"] = "processing"
+
+            async def on_progress(stage: str) -> None:
+                entry["stage"] = stage
+                await self._notify(job, {"type": "ingestion_progress", "file": entry["filename"], "stage": stage})
+
+            try:
+                result = await process_document(
+                    file_path=entry["file_path"],
+                    lecture_id=job["lecture_id"],
+                    filename=entry["filename"],
+                    content_hash=entry["content_hash"],
+                    file_size=entry["file_size"],
+                    on_progress=on_progress
+                )
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+
+            if result.get("success"):
+                entry["status"] = "success"
+                entry["document_id"] = result.get("document_id")
+                entry["deduplicated"] = result.get("deduplicated", False)
+                entry["chunk_count"] = result.get("chunk_count", 0)
+                metrics.increment("ingestion.files_succeeded")
+            else:
+                entry["status"] = "failed"
+                entry["error"] = result.get("error")
+                metrics.increment("ingestion.files_failed")
+                print(f"❌ Ingestion failed for {entry['filename']}: {entry['error']}")
+
+            entry["stage"] = None
+            job["completed_files"] += 1
+            await self._notify(job, {"type": "ingestion_progress", "file": entry["filename"], "stage": entry["status"]})
+
+    async def _notify(self, job: Dict[str, Any], message: Dict[str, Any]) -> None:
+        if not self._notifier:
+            return
+        message.update({
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "completed_files": job["completed_files"],
+            "total_files": job["total_files"]
+        })
+        try:
+            await self._notifier(job["lecture_id"], message)
+        except Exception as e:
+            # No connected client (or it went away) - status endpoint still works
+            print(f"⚠️  Could not send ingestion progress for {job['lecture_id']}: {e}")
+
+    def _evict_finished(self) -> None:
+        cutoff = time.time() - FINISHED_JOB_TTL
+        for job_id in [job_id for job_id, job in self.jobs.items()
+                       if job["finished_at"] and job["finished_at"] < cutoff]:
+            del self.jobs[job_id]
+
+
+def public_job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job status without server-side file paths"""
+    view = {key: value for key, value in job.items() if key != "files"}
+    view["files"] = [
+        {key: value for key, value in entry.items() if key != "file_path"}
+        for entry in job["files"]
+    ]
+    return view
+
+
+# Process-wide job manager
+ingestion_jobs = IngestionJobManager(max_workers=settings.INGESTION_WORKERS)
@@ -0,0 +1,117 @@
+"""
+Rolling lecture memory for EduScribe prompts
+Keeps a compact, token-bounded summary of what a lecture has covered so
+far (topics, key terms, latest notes) so note prompts can avoid repetition
+without carrying ever-growing history.
+"""
+import re
+from collections import OrderedDict, deque
+from typing import Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.prompt_budget import count_tokens, trim_to_tokens
+
+# Tokens of the first point kept next to a topic heading
+TOPIC_DETAIL_TOKENS = 24
+
+_HEADING_RE = re.compile(r"^#{2,3}\s+(.+)$", re.MULTILINE)
+_BULLET_RE = re.compile(r"^\s*[-•*]\s+(.+)$", re.MULTILINE)
+_BOLD_TERM_RE = re.compile(r"\*\*([^*\n]{2,40})\*\*")
+
+
+class LectureMemory:
+    """
+    What a lecture has covered so far, bounded in tokens.
+
+    Structured notes add their topic headings (with the first point under
+    each) and bold key terms; live notes are kept as a short window of
+    recent bullets. Key terms are capped at their own share of the
+    budget (oldest dropped first); when the summary still outgrows it,
+    the oldest topics lose their detail first and are then dropped, so
+    the summary stays the same size however long the lecture runs.
+    """
+
+    def __init__(self, lecture_id: str):
+        self.lecture_id = lecture_id
+        self.topics: "OrderedDict[str, str]" = OrderedDict()  # heading -> first point, oldest first
+        self.terms: "OrderedDict[str, None]" = OrderedDict()  # covered key terms, most recent last
+        self.recent_notes = deque(maxlen=settings.HISTORY_CHUNKS)
+        self.dropped_topics = 0
+
+    def add_live_notes(self, notes: Optional[str]) -> None:
+        """Remember a chunk's bullets as recent notes"""
+        if notes and notes.strip():
+            self.recent_notes.append(notes.strip())
+
+    def add_structured_notes(self, notes: str) -> None:
+        """Fold a structured-notes window into the topic summary and key terms"""
+        for heading, body in self._split_topics(notes):
+            if heading.lower() == "lecture notes":
+                continue
+            bullet = _BULLET_RE.search(body)
+            detail = trim_to_tokens(_BOLD_TERM_RE.sub(r"\1", bullet.group(1)), TOPIC_DETAIL_TOKENS) if bullet else ""
+            existing = next((t for t in self.topics if t.lower() == heading.lower()), None)
+            if existing is not None:
+                # Revisited topic: keep its first point, mark it as recent
+                self.topics.move_to_end(existing)
+            else:
+                self.topics[heading] = detail
+
+        self.add_terms(_BOLD_TERM_RE.findall(notes))
+        self._compact()
+
+    def add_terms(self, terms: Iterable[str]) -> None:
+        for term in terms:
+            term = " ".join(str(term).split())
+            if not term:
+                continue
+            known = next((t for t in self.terms if t.lower() == term.lower()), None)
+            if known is not None:
+                self.terms.move_to_end(known)
+            else:
+                self.terms[term] = None
+        # Terms have their own share of the budget so they never crowd out topics
+        while self.terms and (len(self.terms) > settings.LECTURE_MEMORY_MAX_TERMS
+                              or count_tokens(self._terms_line()) > settings.LECTURE_MEMORY_TERM_TOKENS):
+            self.terms.popitem(last=False)
+
+    def summary(self) -> str:
+        """Topics and key terms covered so far ("" before anything is known)"""
+        lines = []
+        if self.topics:
+            topics = [f"{heading}: {detail}" if detail else heading for heading, detail in self.topics.items()]
+            if self.dropped_topics:
+                topics.insert(0, f"({self.dropped_topics} earlier topics)")
+            lines.append("Topics covered: " + "; ".join(topics))
+        if self.terms:
+            lines.append(self._terms_line())
+        return "\n".join(lines)
+
+    def _terms_line(self) -> str:
+        return "Key terms already explained: " + ", ".join(self.terms)
+
+    def _compact(self) -> None:
+        """Shrink the summary to LECTURE_MEMORY_TOKENS, oldest topics first"""
+        while count_tokens(self.summary()) > settings.LECTURE_MEMORY_TOKENS:
+            if not self.topics:
+                # Only if the term share is set above the whole budget
+                if not self.terms:
+                    break
+                self.terms.popitem(last=False)
+                continue
+            detailed = next((t for t, detail in self.topics.items() if detail), None)
+            if detailed is not None and detailed != next(reversed(self.topics)):
+                self.topics[detailed] = ""
+            else:
+                self.topics.popitem(last=False)
+                self.dropped_topics += 1
+
+    @staticmethod
+    def _split_topics(notes: str) -> List[Tuple[str, str]]:
+        """(heading, body) pairs of ## / ### sections"""
+        matches = list(_HEADING_RE.finditer(notes))
+        return [
+            (m.group(1).strip().strip("*").strip(),
+             notes[m.end():matches[i + 1].start() if i + 1 < len(matches) else len(notes)])
+            for i, m in enumerate(matches)
+        ]
@@ -0,0 +1,214 @@
+"""
+Lexical BM25 index for EduScribe lecture documents
+Built per document during ingestion, merged per lecture at query time.
+Used as a candidate pre-filter and fused with vector scores.
+"""
+import math
+import re
+import time
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from app.core.config import settings
+from database.mongodb_connection import get_lecture_content_hashes, get_lexical_indexes
+
+# BM25 parameters (standard defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Words that carry no retrieval signal in lecture speech or slides
+STOPWORDS = set([
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "can", "do", "for",
+    "from", "has", "have", "he", "her", "his", "how", "i", "if", "in", "into",
+    "is", "it", "its", "just", "let", "like", "me", "my", "no", "not", "now",
+    "of", "okay", "on", "one", "or", "our", "over", "so", "some", "that", "the",
+    "their", "them", "then", "there", "these", "they", "this", "those", "to",
+    "uh", "um", "up", "us", "very", "was", "we", "well", "were", "what", "when",
+    "where", "which", "who", "why", "will", "with", "would", "yeah", "you", "your"
+])
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_'][a-z0-9]+)*")
+
+ChunkKey = Tuple[str, int]  # (document_id, chunk_index)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; hyphenated terms are kept whole and also split."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        parts = re.split(r"[-_']", token)
+        candidates = [token] + parts if len(parts) > 1 else [token]
+        for candidate in candidates:
+            if candidate in STOPWORDS:
+                continue
+            if len(candidate) < 2 and not candidate.isdigit():
+                continue
+            tokens.append(candidate)
+    return tokens
+
+
+class DocumentIndexBuilder:
+    """Accumulates BM25 postings for one document, chunk by chunk"""
+
+    def __init__(self):
+        self.postings = defaultdict(list)
+        self.chunk_lengths: List[int] = []
+
+    def add(self, chunk_index: int, chunk: str) -> None:
+        tokens = tokenize(chunk)
+        # Chunks arrive in order; pad in case one was skipped
+        while len(self.chunk_lengths) < chunk_index:
+            self.chunk_lengths.append(0)
+        self.chunk_lengths.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            self.postings[term].append([chunk_index, tf])
+
+    def build(self) -> Dict:
+        return {
+            "chunk_lengths": self.chunk_lengths,
+            "postings": dict(self.postings)
+        }
+
+    def build_shards(self, shard_chunks: int) -> List[Dict]:
+        """
+        Split the postings into shards of shard_chunks consecutive chunks.
+
+        Each shard is stored as its own Mongo document, so a large PDF never
+        runs into the 16 MB document limit.
+        """
+        shard_count = max(math.ceil(len(self.chunk_lengths) / shard_chunks), 1)
+        shard_postings = [defaultdict(list) for _ in range(shard_count)]
+        for term, entries in self.postings.items():
+            for entry in entries:
+                shard_postings[entry[0] // shard_chunks][term].append(entry)
+
+        shards = []
+        for shard, postings in enumerate(shard_postings):
+            chunk_start = shard * shard_chunks
+            shards.append({
+                "shard": shard,
+                "chunk_start": chunk_start,
+                "chunk_lengths": self.chunk_lengths[chunk_start:chunk_start + shard_chunks],
+                "postings": dict(postings)
+            })
+        return shards
+
+
+def build_document_index(chunks: List[str]) -> Dict:
+    """
+    Build the postings for one document.
+
+    Returns:
+        Dict with per-chunk token lengths and term -> [[chunk_index, tf], ...]
+    """
+    builder = DocumentIndexBuilder()
+    for chunk_index, chunk in enumerate(chunks):
+        builder.add(chunk_index, chunk)
+    return builder.build()
+
+
+class LexicalIndex:
+    """BM25 index over all document chunks of one lecture"""
+
+    def __init__(self, document_indexes: List[Dict]):
+        self.postings: Dict[str, List[Tuple[ChunkKey, int]]] = defaultdict(list)
+        self.chunk_lengths: Dict[ChunkKey, int] = {}
+
+        for doc in document_indexes:
+            document_id = doc["document_id"]
+            chunk_start = doc.get("chunk_start", 0)
+            for offset, length in enumerate(doc["chunk_lengths"]):
+                self.chunk_lengths[(document_id, chunk_start + offset)] = length
+            for term, entries in doc["postings"].items():
+                for chunk_index, tf in entries:
+                    self.postings[term].append(((document_id, chunk_index), tf))
+
+        self.chunk_count = len(self.chunk_lengths)
+        total_length = sum(self.chunk_lengths.values())
+        self.avg_length = (total_length / self.chunk_count) if self.chunk_count else 0.0
+
+    def _idf(self, term: str) -> float:
+        df = len(self.postings.get(term, []))
+        return math.log(1 + (self.chunk_count - df + 0.5) / (df + 0.5))
+
+    def search(self, query_text: str, top_k: int) -> List[Tuple[ChunkKey, float]]:
+        """Return the top_k chunks by BM25 score (only chunks sharing a term)"""
+        if not self.chunk_count:
+            return []
+
+        scores: Dict[ChunkKey, float] = defaultdict(float)
+
+        for term in set(tokenize(query_text)):
+            entries = self.postings.get(term)
+            if not entries:
+                continue
+            idf = self._idf(term)
+            for key, tf in entries:
+                length_norm = 1 - BM25_B + BM25_B * self.chunk_lengths[key] / (self.avg_length or 1.0)
+                scores[key] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:top_k]
+
+
+# Per-lecture cache of merged indexes, least recently used first. Each entry
+# remembers the content hashes it was built from, so documents linked by
+# another process (bulk ingest) trigger a rebuild on the next query.
+_lecture_indexes: "OrderedDict[str, Tuple[FrozenSet[str], LexicalIndex]]" = OrderedDict()
+
+# Lectures whose documents have no index yet (ingestion still running
+# elsewhere), with the content hashes seen and until when to trust that
+_missing_until: Dict[str, Tuple[FrozenSet[str], float]] = {}
+
+
+async def get_lecture_index(
+    lecture_id: str,
+    content_hashes: Optional[List[str]] = None
+) -> Optional[LexicalIndex]:
+    """Load (or reuse) the merged BM25 index for a lecture's documents"""
+    if content_hashes is None:
+        content_hashes = await get_lecture_content_hashes(lecture_id)
+    key = frozenset(content_hashes)
+    if not key:
+        return None
+
+    cached = _lecture_indexes.get(lecture_id)
+    if cached and cached[0] == key:
+        _lecture_indexes.move_to_end(lecture_id)
+        return cached[1]
+    missing = _missing_until.get(lecture_id)
+    if missing and missing[0] == key and missing[1] > time.monotonic():
+        return None
+
+    document_indexes = await get_lexical_indexes(lecture_id, list(key))
+    if not document_indexes:
+        _lecture_indexes.pop(lecture_id, None)
+        _missing_until[lecture_id] = (key, time.monotonic() + settings.LEXICAL_MISSING_TTL)
+        return None
+
+    index = LexicalIndex(document_indexes)
+    _lecture_indexes[lecture_id] = (key, index)
+    _lecture_indexes.move_to_end(lecture_id)
+    while len(_lecture_indexes) > settings.LEXICAL_INDEX_CACHE_LECTURES:
+        _lecture_indexes.popitem(last=False)
+    _missing_until.pop(lecture_id, None)
+    return index
+
+
+def invalidate_lecture_index(lecture_id: str) -> None:
+    """Drop the cached index so the next query reloads it"""
+    _lecture_indexes.pop(lecture_id, None)
+    _missing_until.pop(lecture_id, None)
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[ChunkKey]],
+    weights: List[float],
+    k: int = 60
+) -> List[Tuple[ChunkKey, float]]:
+    """Fuse several ranked lists of chunk keys with weighted RRF"""
+    fused: Dict[ChunkKey, float] = defaultdict(float)
+    for ranking, weight in zip(rankings, weights):
+        for rank, key in enumerate(ranking):
+            fused[key] += weight / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,90 @@
+"""
+LLM response cache for EduScribe
+Responses are keyed by model, parameters and a hash of the normalized
+messages; an in-memory LRU sits in front of the Mongo llm_cache collection.
+"""
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.core import metrics
+from app.core.config import settings
+from database.mongodb_connection import get_llm_cache_entry, save_llm_cache_entry
+
+_WHITESPACE_RE = re.compile(r"[ \t]+")
+
+
+def _normalize(content: str) -> str:
+    """Ignore trailing spaces and runs of blanks that don't change the prompt"""
+    lines = [_WHITESPACE_RE.sub(" ", line).strip() for line in content.strip().splitlines()]
+    return "\n".join(lines)
+
+
+def cache_key(model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+    """Stable key for a chat completion request"""
+    payload = {
+        "model": model,
+        "params": params,
+        "messages": [{"role": m["role"], "content": _normalize(m.get("content", ""))} for m in messages]
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(temperature: float) -> bool:
+    """Only near-deterministic completions are worth replaying"""
+    return settings.LLM_CACHE_ENABLED and temperature <= settings.LLM_CACHE_MAX_TEMPERATURE
+
+
+class LLMResponseCache:
+    """In-memory LRU in front of the persistent Mongo store"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        response = self._entries.get(key)
+        if response is not None:
+            self._entries.move_to_end(key)
+        else:
+            try:
+                response = await get_llm_cache_entry(key)
+            except Exception as e:
+                print(f"⚠️  LLM cache lookup failed: {e}")
+                response = None
+            if response is not None:
+                self._remember(key, response)
+
+        self._record(hit=response is not None)
+        return response
+
+    async def put(self, key: str, model: str, response: str) -> None:
+        self._remember(key, response)
+        try:
+            await save_llm_cache_entry(key, model, response)
+        except Exception as e:
+            print(f"⚠️  LLM cache write failed: {e}")
+
+    def _remember(self, key: str, response: str) -> None:
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+            metrics.increment("llm.cache_hits")
+        else:
+            self.misses += 1
+            metrics.increment("llm.cache_misses")
+        metrics.set_gauge("llm.cache_hit_rate", self.hits / (self.hits + self.misses))
+
+
+# Process-wide cache
+llm_cache = LLMResponseCache(max_entries=settings.LLM_CACHE_SIZE)
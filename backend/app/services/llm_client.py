@@ -0,0 +1,432 @@
+"""
+Shared async LLM client for EduScribe
+One process-wide AsyncGroq client over a pooled httpx connection
+(keep-alive, HTTP/2 when h2 is installed) with bounded concurrency.
+Every call is admitted by the global rate scheduler.
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.llm_cache import cache_key, is_cacheable, llm_cache
+from app.services.llm_resilience import (
+    RetryPolicy, deadline_for, is_rate_limit, latency_tracker, outcome_of, retry_after
+)
+from app.services.llm_scheduler import Priority, estimate_tokens, llm_scheduler
+from app.services.llm_usage import llm_usage
+
+try:
+    from groq import AsyncGroq
+    GROQ_AVAILABLE = True
+except Exception:
+    GROQ_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401  (enables httpx HTTP/2)
+    HTTP2_AVAILABLE = True
+except Exception:
+    HTTP2_AVAILABLE = False
+
+
+class LLMClient:
+    """Process-wide chat completion client shared by all note generators"""
+
+    def __init__(self):
+        self._client = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @property
+    def available(self) -> bool:
+        """Whether LLM calls can be made (SDK installed and a key or stand-in server set)"""
+        return GROQ_AVAILABLE and bool(settings.GROQ_API_KEY or settings.LLM_BASE_URL)
+
+    def _get_client(self):
+        if self._client is None:
+            self._http_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+                    keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(settings.LLM_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT)
+            )
+            self._client = AsyncGroq(
+                # The offline stand-in server accepts any key
+                api_key=settings.GROQ_API_KEY or "offline",
+                base_url=settings.LLM_BASE_URL,
+                http_client=self._http_client,
+                max_retries=settings.LLM_MAX_RETRIES
+            )
+            self._semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+            print(f"✅ LLM client ready (HTTP/{'2' if HTTP2_AVAILABLE else '1.1'}, "
+                  f"{settings.LLM_MAX_CONCURRENCY} concurrent calls"
+                  f"{', base URL ' + settings.LLM_BASE_URL if settings.LLM_BASE_URL else ''})")
+        return self._client
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.2,
+        max_tokens: int = 500,
+        model: Optional[str] = None,
+        priority: Priority = Priority.SYNTHESIS,
+        cache: bool = True,
+        on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+        deadline: Optional[float] = None,
+        stage: str = "other",
+        **kwargs: Any
+    ) -> str:
+        """
+        Run a chat completion and return the stripped message text.
+
+        With on_delta the completion is streamed and each text delta is
+        passed to it as it arrives (see chat_stream). Low-temperature calls
+        are answered from the response cache when an identical request was
+        made before (pass cache=False to opt out), and identical calls
+        already in flight share one request. Others wait in the scheduler
+        queue (by priority) until the token and request budgets allow them;
+        a 429 pauses the scheduler and the call is re-queued up to
+        LLM_RATE_LIMIT_REQUEUES times.
+
+        Connection errors, timeouts and 5xx are retried up to
+        LLM_RETRY_ATTEMPTS times with jittered exponential backoff, all
+        within deadline seconds (by default derived from the priority, see
+        llm_resilience.deadline_for). With LLM_HEDGING a duplicate request
+        is sent when the call runs past the p95 latency.
+
+        Tokens, latency and outcome are recorded under stage (raw_notes,
+        synthesis, outline, ...) for the lecture the caller is bound to
+        (see llm_usage).
+
+        Raises:
+            RuntimeError: If no LLM is configured
+            asyncio.TimeoutError: If the deadline passed
+            LLMBudgetExceeded: If the user's daily token budget is used up
+            Exception: API errors are passed through for callers' fallbacks
+        """
+        if not self.available:
+            raise RuntimeError("LLM client not available (groq missing, or neither GROQ_API_KEY nor LLM_BASE_URL set)")
+
+        if on_delta is not None:
+            parts = []
+            async for delta in self.chat_stream(messages, temperature, max_tokens, model,
+                                                priority, cache, deadline, stage, **kwargs):
+                parts.append(delta)
+                await on_delta(delta)
+            return "".join(parts).strip()
+
+        model = model or settings.LLM_MODEL
+        if not (cache and is_cacheable(temperature)):
+            return await self._complete(model, messages, temperature, max_tokens, priority, kwargs,
+                                        deadline, stage)
+
+        key = cache_key(model, messages, {"temperature": temperature, "max_tokens": max_tokens, **kwargs})
+
+        task = self._inflight.get(key)
+        if task is None:
+            cached = await llm_cache.get(key)
+            if cached is not None:
+                llm_usage.record(stage, model, 0, 0, 0.0, "cached")
+                return cached
+            task = asyncio.ensure_future(
+                self._complete_and_cache(key, model, messages, temperature, max_tokens, priority,
+                                         kwargs, deadline, stage)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            metrics.increment("llm.inflight_joins")
+            llm_usage.record(stage, model, 0, 0, 0.0, "joined")
+
+        # One caller giving up must not cancel the shared request, and a
+        # caller joining it still waits no longer than its own deadline
+        timeout = deadline_for(priority) if deadline is None else deadline
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=timeout or None)
+        except asyncio.TimeoutError:
+            metrics.increment("llm.deadline_exceeded")
+            raise
+
+    async def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.2,
+        max_tokens: int = 500,
+        model: Optional[str] = None,
+        priority: Priority = Priority.SYNTHESIS,
+        cache: bool = True,
+        deadline: Optional[float] = None,
+        stage: str = "other",
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding text deltas as they arrive.
+
+        Shares the cache with chat(): a cached response is yielded whole,
+        and a completed stream is stored under the same key.
+        """
+        if not self.available:
+            raise RuntimeError("LLM client not available (groq missing, or neither GROQ_API_KEY nor LLM_BASE_URL set)")
+
+        model = model or settings.LLM_MODEL
+        key = None
+        if cache and is_cacheable(temperature):
+            key = cache_key(model, messages, {"temperature": temperature, "max_tokens": max_tokens, **kwargs})
+            cached = await llm_cache.get(key)
+            if cached is not None:
+                llm_usage.record(stage, model, 0, 0, 0.0, "cached")
+                yield cached
+                return
+
+        parts = []
+        async for delta in self._stream(model, messages, temperature, max_tokens, priority, kwargs,
+                                        deadline, stage):
+            parts.append(delta)
+            yield delta
+
+        if key is not None:
+            await llm_cache.put(key, model, "".join(parts).strip())
+
+    async def _complete_and_cache(self, key: str, model: str, messages: List[Dict[str, str]],
+                                  temperature: float, max_tokens: int, priority: Priority,
+                                  kwargs: Dict[str, Any], deadline: Optional[float], stage: str) -> str:
+        response = await self._complete(model, messages, temperature, max_tokens, priority, kwargs,
+                                        deadline, stage)
+        await llm_cache.put(key, model, response)
+        return response
+
+    async def _complete(self, model: str, messages: List[Dict[str, str]], temperature: float,
+                        max_tokens: int, priority: Priority, kwargs: Dict[str, Any],
+                        deadline: Optional[float] = None, stage: str = "other") -> str:
+        """Send one completion through the scheduler, retrying transient errors (no caching)"""
+        policy = RetryPolicy(deadline_for(priority) if deadline is None else deadline)
+        request = dict(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, **kwargs)
+        reserved = estimate_tokens(messages) + max_tokens
+
+        while True:
+            try:
+                return await self._with_deadline(self._send_hedged(request, reserved, priority, stage), policy)
+            except Exception as e:
+                delay = self._retry_delay(e, policy)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    async def _send_hedged(self, request: Dict[str, Any], reserved: int, priority: Priority,
+                           stage: str) -> str:
+        """
+        Send a request, plus a duplicate if it runs past the p95 latency.
+
+        The first successful response wins and the other request is
+        cancelled. Hedges go through the scheduler like any other call.
+        """
+        hedge_after = latency_tracker.hedge_delay(priority)
+        if hedge_after is None:
+            return await self._send(request, reserved, priority, stage)
+
+        sent = asyncio.Event()
+        primary = asyncio.ensure_future(self._send(request, reserved, priority, stage, sent))
+        waiter = asyncio.ensure_future(sent.wait())
+        pending = {primary, waiter}
+        try:
+            # Time the hedge from when the request went out, not from when it was queued
+            await asyncio.wait({primary, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+            if done:
+                return primary.result()
+
+            metrics.increment("llm.hedges")
+            hedge = asyncio.ensure_future(self._send(request, reserved, priority, stage))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            metrics.increment("llm.hedge_wins")
+                        return task.result()
+            # Both failed: report the original request's error
+            return primary.result()
+        finally:
+            waiter.cancel()
+            for task in pending:
+                task.cancel()
+
+    async def _send(self, request: Dict[str, Any], reserved: int, priority: Priority, stage: str,
+                    sent: Optional[asyncio.Event] = None) -> str:
+        """One request through the scheduler and the concurrency limit"""
+        client = self._get_client()
+        await llm_scheduler.acquire(reserved, priority)
+        used = 0  # failed, timed out and cancelled (lost hedge) calls give the whole reservation back
+        try:
+            async with self._semaphore:
+                metrics.increment("llm.calls")
+                if sent is not None:
+                    sent.set()
+                started = time.monotonic()
+                try:
+                    response = await client.chat.completions.create(**request)
+                except BaseException as e:
+                    llm_usage.record(stage, request["model"], 0, 0, time.monotonic() - started, outcome_of(e))
+                    raise
+                latency = time.monotonic() - started
+                latency_tracker.record(priority, latency)
+
+            usage = getattr(response, "usage", None)
+            _record_usage(usage, stage, request["model"], latency)
+            used = usage.total_tokens if usage else reserved
+            return response.choices[0].message.content.strip()
+        finally:
+            llm_scheduler.settle(reserved, used)
+
+    async def _stream(self, model: str, messages: List[Dict[str, str]], temperature: float,
+                      max_tokens: int, priority: Priority, kwargs: Dict[str, Any],
+                      deadline: Optional[float] = None, stage: str = "other") -> AsyncIterator[str]:
+        """
+        Stream one completion through the scheduler (no caching).
+
+        Errors before the stream opens are retried like chat(); once text
+        has been yielded a failure is passed through, since it can't be
+        taken back. The deadline covers the whole stream: a stalled body
+        raises asyncio.TimeoutError and the response is closed.
+        """
+        policy = RetryPolicy(deadline_for(priority) if deadline is None else deadline)
+        request = dict(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens,
+                       stream=True, **kwargs)
+        prompt_tokens = estimate_tokens(messages)
+        reserved = prompt_tokens + max_tokens
+
+        while True:
+            try:
+                stream, started = await self._open_stream_within(request, reserved, priority, stage, policy)
+                break
+            except Exception as e:
+                delay = self._retry_delay(e, policy)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+        generated = 0
+        usage = None
+        try:
+            while True:
+                # The deadline covers the whole body, not just opening the stream
+                try:
+                    chunk = await self._with_deadline(stream.__anext__(), policy)
+                except StopAsyncIteration:
+                    break
+                # Groq reports usage on the last chunk
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                if not generated:
+                    metrics.set_gauge("llm.stream_first_delta_seconds", time.monotonic() - started)
+                generated += len(delta)
+                yield delta
+        except Exception as e:
+            metrics.increment("llm.errors")
+            llm_usage.record(stage, model, 0, 0, time.monotonic() - started, outcome_of(e))
+            raise
+        finally:
+            self._semaphore.release()
+            # Also when the stream fails or the consumer stops early: only what was sent is kept
+            llm_scheduler.settle(reserved, usage.total_tokens if usage else prompt_tokens + generated // 4)
+            await stream.close()
+
+        _record_usage(usage, stage, model, time.monotonic() - started)
+
+    async def _open_stream_within(self, request: Dict[str, Any], reserved: int, priority: Priority,
+                                  stage: str, policy: RetryPolicy):
+        """Open a stream before the policy's deadline; one that opens too late is closed again"""
+        opening = asyncio.ensure_future(self._open_stream(request, reserved, priority, stage))
+        try:
+            return await self._with_deadline(asyncio.shield(opening), policy)
+        except BaseException:
+            opening.cancel()
+            opening.add_done_callback(lambda task: self._discard_stream(task, reserved))
+            raise
+
+    def _discard_stream(self, opening: asyncio.Future, reserved: int) -> None:
+        """Release a stream whose caller stopped waiting just as it opened"""
+        if opening.cancelled() or opening.exception() is not None:
+            return
+        stream, _ = opening.result()
+        self._semaphore.release()
+        llm_scheduler.settle(reserved, 0)
+        asyncio.ensure_future(stream.close())
+
+    async def _open_stream(self, request: Dict[str, Any], reserved: int, priority: Priority, stage: str):
+        """Admit and open a streaming request; the caller releases the semaphore and settles when done"""
+        client = self._get_client()
+        await llm_scheduler.acquire(reserved, priority)
+        try:
+            await self._semaphore.acquire()
+        except BaseException:
+            llm_scheduler.settle(reserved, 0)
+            raise
+        try:
+            metrics.increment("llm.calls")
+            started = time.monotonic()
+            return await client.chat.completions.create(**request), started
+        except BaseException as e:
+            self._semaphore.release()
+            llm_scheduler.settle(reserved, 0)
+            llm_usage.record(stage, request["model"], 0, 0, 0.0, outcome_of(e))
+            raise
+
+    @staticmethod
+    async def _with_deadline(call: Awaitable[Any], policy: RetryPolicy) -> Any:
+        """Await call within the time left before the policy's deadline"""
+        remaining = policy.remaining()
+        if remaining is None:
+            return await call
+        try:
+            return await asyncio.wait_for(call, timeout=remaining)
+        except asyncio.TimeoutError:
+            metrics.increment("llm.deadline_exceeded")
+            raise
+
+    def _retry_delay(self, error: Exception, policy: RetryPolicy) -> Optional[float]:
+        """Seconds to wait before retrying a failed call, or None if it should fail"""
+        if is_rate_limit(error):
+            metrics.increment("llm.rate_limited")
+            llm_scheduler.pause(retry_after(error))
+
+        delay = policy.next_delay(error)
+        if delay is None:
+            metrics.increment("llm.errors")
+            return None
+
+        metrics.increment("llm.retries")
+        reason = "rate limited" if is_rate_limit(error) else type(error).__name__
+        print(f"⚠️  LLM call failed ({reason}), retrying in {delay:.1f}s "
+              f"(retry {policy.retries + policy.requeues})")
+        return delay
+
+    async def aclose(self) -> None:
+        """Close pooled connections (app shutdown)"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self._client = None
+        self._http_client = None
+
+
+def _record_usage(usage, stage: str, model: str, latency: float) -> None:
+    """Actual prompt / completion tokens reported by the provider"""
+    prompt_tokens = usage.prompt_tokens if usage is not None else 0
+    completion_tokens = usage.completion_tokens if usage is not None else 0
+    metrics.increment("llm.prompt_tokens", prompt_tokens)
+    metrics.increment("llm.completion_tokens", completion_tokens)
+    llm_usage.record(stage, model, prompt_tokens, completion_tokens, latency, "ok")
+
+
+# Process-wide client
+llm_client = LLMClient()
@@ -0,0 +1,158 @@
+"""
+Retry, deadline and hedging policy for EduScribe LLM calls
+Transient provider errors are retried with jittered exponential backoff
+(honouring retry-after) inside a per-call deadline derived from the
+lecture's real-time budget; slow calls can be hedged past the p95 latency.
+"""
+import asyncio
+import random
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.llm_scheduler import Priority
+
+try:
+    from groq import APIConnectionError, RateLimitError
+except Exception:
+    class APIConnectionError(Exception):
+        pass
+
+    class RateLimitError(Exception):
+        pass
+
+# Pause used when a 429 carries no retry-after header
+DEFAULT_RATE_LIMIT_PAUSE = 5.0  # seconds
+
+# Provider statuses worth another attempt (429 is handled by the scheduler)
+RETRYABLE_STATUS = {408, 409, 500, 502, 503, 504}
+
+# Successful calls remembered per priority for the latency percentile
+LATENCY_WINDOW = 200
+
+# Samples needed before hedging kicks in
+MIN_HEDGE_SAMPLES = 20
+
+
+def retry_after(error: Exception, default: Optional[float] = DEFAULT_RATE_LIMIT_PAUSE) -> Optional[float]:
+    """Seconds the provider asked us to wait before retrying"""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def is_rate_limit(error: Exception) -> bool:
+    return isinstance(error, RateLimitError) or getattr(error, "status_code", None) == 429
+
+
+def outcome_of(error: BaseException) -> str:
+    """Short outcome label of a failed request (usage accounting)"""
+    if isinstance(error, asyncio.CancelledError):
+        return "cancelled"
+    if is_rate_limit(error):
+        return "rate_limited"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    status = getattr(error, "status_code", None)
+    return f"error_{status}" if status else "error"
+
+
+def is_retryable(error: Exception) -> bool:
+    """Transient failures: connection problems, timeouts and 5xx"""
+    if isinstance(error, (APIConnectionError, httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS
+
+
+def backoff_delay(attempt: int, retry_after_seconds: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's retry-after"""
+    ceiling = min(settings.LLM_BACKOFF_MAX, settings.LLM_BACKOFF_BASE * (2 ** attempt))
+    delay = random.uniform(0, ceiling)
+    return max(delay, retry_after_seconds or 0.0)
+
+
+def deadline_for(priority: Priority) -> Optional[float]:
+    """
+    Seconds a call may take end to end (queueing and retries included).
+
+    Live notes must land before the next audio chunk is transcribed and
+    periodic synthesis before the next window; offline work has no limit.
+    """
+    if priority == Priority.LIVE:
+        return float(settings.CHUNK_DURATION)
+    if priority == Priority.SYNTHESIS:
+        return float(settings.SYNTHESIS_INTERVAL)
+    if priority == Priority.FINAL:
+        return settings.LLM_FINAL_DEADLINE
+    return None
+
+
+class RetryPolicy:
+    """Retry decisions for one logical call"""
+
+    def __init__(self, deadline: Optional[float]):
+        self.deadline_at = time.monotonic() + deadline if deadline else None
+        self.requeues = 0
+        self.retries = 0
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline_at is None:
+            return None
+        return max(self.deadline_at - time.monotonic(), 0.0)
+
+    def next_delay(self, error: Exception) -> Optional[float]:
+        """Seconds to wait before retrying after error, or None to give up"""
+        if is_rate_limit(error):
+            if self.requeues >= settings.LLM_RATE_LIMIT_REQUEUES:
+                return None
+            self.requeues += 1
+            # The scheduler pause already covers retry-after
+            delay = 0.0
+        elif is_retryable(error):
+            if self.retries >= settings.LLM_RETRY_ATTEMPTS:
+                return None
+            delay = backoff_delay(self.retries, retry_after(error, default=None))
+            self.retries += 1
+        else:
+            return None
+
+        remaining = self.remaining()
+        if remaining is not None and delay >= remaining:
+            return None
+        return delay
+
+
+class LatencyTracker:
+    """Rolling provider latency per priority, for the hedging threshold"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: Dict[Priority, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, priority: Priority, seconds: float) -> None:
+        self._samples[priority].append(seconds)
+
+    def percentile(self, priority: Priority, fraction: float) -> Optional[float]:
+        samples = self._samples[priority]
+        if len(samples) < MIN_HEDGE_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def hedge_delay(self, priority: Priority) -> Optional[float]:
+        """When to send a duplicate request, or None if hedging doesn't apply"""
+        if not settings.LLM_HEDGING or priority > settings.LLM_HEDGE_MAX_PRIORITY:
+            return None
+        p95 = self.percentile(priority, 0.95)
+        if p95 is None:
+            return None
+        return max(p95, settings.LLM_HEDGE_MIN_DELAY)
+
+
+# Process-wide latency statistics
+latency_tracker = LatencyTracker()
@@ -0,0 +1,161 @@
+"""
+Global LLM rate scheduler for EduScribe
+Token and request buckets keep every LLM call within the provider's
+per-minute limits; callers queue by priority instead of hitting 429s.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from typing import Dict, List, Optional
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.llm_usage import llm_usage
+from app.services.prompt_budget import count_message_tokens
+
+
+class Priority(IntEnum):
+    """Lower value is served first"""
+    LIVE = 0        # per-chunk notes while a lecture is recording
+    SYNTHESIS = 1   # periodic structured notes
+    FINAL = 2       # end-of-lecture final notes
+    BATCH = 3       # offline / bulk work
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """Prompt token count used for the reservation"""
+    return count_message_tokens(messages)
+
+
+class TokenBucket:
+    """Continuously refilling bucket; the level may go negative after under-estimates"""
+
+    def __init__(self, capacity: float, per_minute: float):
+        self.capacity = capacity
+        self.rate = per_minute / 60.0
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount is available (requests above capacity wait for a full bucket)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+    def refund(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+class LLMScheduler:
+    """
+    Admits LLM calls in priority order within token and request budgets.
+
+    acquire() reserves the estimated prompt tokens plus max_tokens and
+    waits until both buckets allow it; settle() corrects the token bucket
+    with the actual usage once the response arrives. A 429 pauses all
+    admissions for the server's retry-after.
+    """
+
+    def __init__(self, tokens_per_minute: int, requests_per_minute: int):
+        self._tokens = TokenBucket(tokens_per_minute, tokens_per_minute)
+        self._requests = TokenBucket(requests_per_minute, requests_per_minute)
+        self._queue: list = []  # (priority, seq, cost, future)
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    async def acquire(self, cost: int, priority: Priority = Priority.SYNTHESIS) -> None:
+        """
+        Wait until a call costing `cost` tokens may be sent.
+
+        Raises:
+            LLMBudgetExceeded: If the user's daily token budget is used up
+        """
+        await llm_usage.check_budget()
+        loop = asyncio.get_event_loop()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch())
+
+        future = loop.create_future()
+        heapq.heappush(self._queue, (int(priority), next(self._seq), cost, future))
+        metrics.set_gauge("llm.queue_depth", len(self._queue))
+        self._wakeup.set()
+
+        queued_at = time.monotonic()
+        try:
+            await future
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # Admitted, but cancelled before the caller resumed: nothing was sent
+                self._tokens.refund(cost)
+                self._requests.refund(1)
+            raise
+        finally:
+            # Cancelled waiters are skipped by the dispatcher
+            future.cancel()
+        metrics.increment("llm.queue_wait_seconds", time.monotonic() - queued_at)
+
+    def settle(self, reserved: int, actual: int) -> None:
+        """Return over-reserved tokens (or record the overrun) after a call"""
+        self._tokens.refund(reserved - actual)
+        metrics.increment("llm.tokens_used", actual)
+
+    def pause(self, seconds: float) -> None:
+        """Stop admitting calls for a while (provider rate limit hit)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _dispatch(self) -> None:
+        while True:
+            while self._queue and self._queue[0][3].done():
+                heapq.heappop(self._queue)
+            metrics.set_gauge("llm.queue_depth", len(self._queue))
+
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            _, _, cost, future = self._queue[0]
+            now = time.monotonic()
+            wait = max(
+                self._paused_until - now,
+                self._tokens.wait_time(cost, now),
+                self._requests.wait_time(1, now)
+            )
+
+            if wait > 0:
+                # Wake early if a higher-priority call arrives
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._queue)
+            self._tokens.consume(cost, now)
+            self._requests.consume(1, now)
+            future.set_result(None)
+
+
+# Process-wide scheduler shared by all LLM calls
+llm_scheduler = LLMScheduler(
+    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE
+)
@@ -0,0 +1,172 @@
+"""
+LLM token accounting for EduScribe
+Every request sent to the LLM is recorded with its tokens, latency and
+outcome, tagged by lecture, user and pipeline stage. Totals are aggregated
+in memory and flushed to Mongo in batches; optional per-user daily budgets
+are checked by the scheduler before a call is admitted.
+"""
+import asyncio
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from app.core import metrics
+from app.core.config import settings
+from database.mongodb_connection import get_lecture_owner, get_user_llm_tokens, save_llm_usage
+
+# (lecture_id, user_id) the current task makes LLM calls for; tasks it
+# starts inherit it
+_scope: ContextVar[Tuple[Optional[str], Optional[str]]] = ContextVar("llm_usage_scope", default=(None, None))
+
+UNTAGGED = "none"
+
+
+class LLMBudgetExceeded(RuntimeError):
+    """The user's daily LLM token budget is used up"""
+
+
+def _today() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+
+class LLMUsageTracker:
+    """
+    In-memory usage totals, flushed to the llm_usage collection.
+
+    Rows are keyed by (day, lecture, user, stage, model, outcome) and only
+    hold sums, so memory stays small however many calls are made between
+    flushes. A failed flush keeps its rows for the next one.
+    """
+
+    def __init__(self):
+        self._pending: Dict[Tuple[str, ...], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self._owners: Dict[str, Optional[str]] = {}
+        self._user_tokens: Dict[str, int] = {}  # tokens used today per user (stored + since loaded)
+        self._day = _today()
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def bind_lecture(self, lecture_id: str) -> None:
+        """Tag LLM calls made from the current task with the lecture and its owner"""
+        if lecture_id not in self._owners:
+            try:
+                self._owners[lecture_id] = await get_lecture_owner(lecture_id)
+            except Exception as e:
+                print(f"⚠️  Could not resolve owner of lecture {lecture_id}: {e}")
+                self._owners[lecture_id] = None
+
+        user_id = self._owners[lecture_id]
+        if user_id:
+            await self.user_tokens_today(user_id)
+        _scope.set((lecture_id, user_id))
+
+    def record(self, stage: str, model: str, prompt_tokens: int, completion_tokens: int,
+               latency: float, outcome: str) -> None:
+        """Account one request (or cache hit) to the current lecture and user"""
+        self._roll_day()
+        lecture_id, user_id = _scope.get()
+        key = (self._day, lecture_id or UNTAGGED, user_id or UNTAGGED, stage, model, outcome)
+        row = self._pending[key]
+        row["calls"] += 1
+        row["prompt_tokens"] += prompt_tokens
+        row["completion_tokens"] += completion_tokens
+        row["latency_seconds"] += latency
+
+        tokens = prompt_tokens + completion_tokens
+        if user_id and user_id in self._user_tokens:
+            self._user_tokens[user_id] += tokens
+        metrics.increment(f"llm.stage.{stage}.tokens", tokens)
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.ensure_future(self._flush_periodically())
+
+    async def check_budget(self) -> None:
+        """
+        Reject calls once the current user has used up their daily budget.
+
+        Calls already admitted may finish, so a user can go over the budget
+        by at most the calls in flight when it ran out.
+
+        Raises:
+            LLMBudgetExceeded: If LLM_USER_DAILY_TOKENS is used up
+        """
+        budget = settings.LLM_USER_DAILY_TOKENS
+        _, user_id = _scope.get()
+        if not budget or not user_id:
+            return
+        used = await self.user_tokens_today(user_id)
+        if used >= budget:
+            metrics.increment("llm.budget_rejections")
+            raise LLMBudgetExceeded(f"Daily LLM token budget ({budget}) used up for user {user_id}")
+
+    async def user_tokens_today(self, user_id: str) -> int:
+        self._roll_day()
+        if user_id not in self._user_tokens:
+            try:
+                stored = await get_user_llm_tokens(user_id, self._day)
+            except Exception as e:
+                print(f"⚠️  Could not load LLM usage of user {user_id}: {e}")
+                stored = 0
+            unflushed = sum(
+                row["prompt_tokens"] + row["completion_tokens"]
+                for key, row in self._pending.items()
+                if key[0] == self._day and key[2] == user_id
+            )
+            self._user_tokens[user_id] = int(stored + unflushed)
+        return self._user_tokens[user_id]
+
+    async def flush(self) -> None:
+        """Write pending totals to Mongo in one batch"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, defaultdict(lambda: defaultdict(float))
+        rows = [_row(key, sums) for key, sums in pending.items()]
+        try:
+            await save_llm_usage(rows)
+            metrics.increment("llm.usage_rows_flushed", len(rows))
+        except Exception as e:
+            print(f"⚠️  LLM usage flush failed, keeping {len(rows)} rows: {e}")
+            for key, sums in pending.items():
+                for field, value in sums.items():
+                    self._pending[key][field] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Unflushed totals and today's per-user tokens (admin endpoint)"""
+        return {
+            "day": self._day,
+            "pending": [_row(key, sums) for key, sums in self._pending.items()],
+            "user_tokens_today": dict(self._user_tokens),
+            "user_daily_budget": settings.LLM_USER_DAILY_TOKENS
+        }
+
+    def _roll_day(self) -> None:
+        today = _today()
+        if today != self._day:
+            # Budgets restart every UTC day
+            self._day = today
+            self._user_tokens.clear()
+
+    async def _flush_periodically(self) -> None:
+        while self._pending:
+            await asyncio.sleep(settings.LLM_USAGE_FLUSH_INTERVAL)
+            await self.flush()
+
+
+def _row(key: Tuple[str, ...], sums: Dict[str, float]) -> Dict[str, Any]:
+    day, lecture_id, user_id, stage, model, outcome = key
+    return {
+        "day": day,
+        "lecture_id": lecture_id,
+        "user_id": user_id,
+        "stage": stage,
+        "model": model,
+        "outcome": outcome,
+        "calls": int(sums["calls"]),
+        "prompt_tokens": int(sums["prompt_tokens"]),
+        "completion_tokens": int(sums["completion_tokens"]),
+        "latency_seconds": round(sums["latency_seconds"], 3)
+    }
+
+
+# Process-wide usage tracker
+llm_usage = LLMUsageTracker()
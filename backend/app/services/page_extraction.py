@@ -0,0 +1,253 @@
+"""
+Page-level text extraction for EduScribe documents
+Large PDFs are split into page ranges and extracted across a process
+pool; pages/slides are streamed in document order as soon as they are
+ready, so chunking and embedding can start before extraction finishes.
+"""
+import asyncio
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Tuple
+
+from PyPDF2 import PdfReader
+from pptx import Presentation
+import docx
+
+from app.core.config import settings
+
+Page = Tuple[int, str]  # (page / slide number, text)
+
+# Pages or slides buffered between a producer thread and the consumer
+STREAM_BUFFER_PAGES = 32
+
+
+# ---------------------------------------------------------------------------
+# Synchronous extractors (one page / slide at a time)
+# ---------------------------------------------------------------------------
+
+def extract_pdf_page_range(pdf_path: str, start: int, end: int) -> List[Page]:
+    """Extract pages [start, end) of a PDF (runs in a worker process)."""
+    reader = PdfReader(pdf_path)
+    pages = []
+    for index in range(start, min(end, len(reader.pages))):
+        content = reader.pages[index].extract_text()
+        if content:
+            pages.append((index + 1, content))
+    return pages
+
+
+def count_pdf_pages(pdf_path: str) -> int:
+    return len(PdfReader(pdf_path).pages)
+
+
+def iter_pages_from_pdf(pdf_path: str) -> Iterator[Page]:
+    reader = PdfReader(pdf_path)
+    for page_number, page in enumerate(reader.pages, 1):
+        content = page.extract_text()
+        if content:
+            yield page_number, content
+
+
+def iter_pages_from_ppt(ppt_path: str) -> Iterator[Page]:
+    prs = Presentation(ppt_path)
+    for slide_number, slide in enumerate(prs.slides, 1):
+        text = []
+        for shape in slide.shapes:
+            if hasattr(shape, "text"):
+                if shape.text.strip():
+                    text.append(shape.text.strip())
+        if text:
+            yield slide_number, "\n".join(text)
+
+
+def iter_pages_from_docx(docx_path: str) -> Iterator[Page]:
+    """Word files carry no page numbers; everything is page 1."""
+    doc = docx.Document(docx_path)
+    text = []
+    for paragraph in doc.paragraphs:
+        if paragraph.text.strip():
+            text.append(paragraph.text.strip())
+    if text:
+        yield 1, "\n".join(text)
+
+
+def iter_pages_from_txt(txt_path: str) -> Iterator[Page]:
+    """Stream a text file, treating form feeds as page breaks."""
+    page_number = 1
+    buffer = []
+    with open(txt_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            while "\f" in line:
+                before, line = line.split("\f", 1)
+                buffer.append(before)
+                page = "".join(buffer)
+                if page.strip():
+                    yield page_number, page
+                page_number += 1
+                buffer = []
+            buffer.append(line)
+    page = "".join(buffer)
+    if page.strip():
+        yield page_number, page
+
+
+def _collect(iter_pages: Callable[[str], Iterator[Page]], path: str, label: str) -> List[Page]:
+    try:
+        return list(iter_pages(path))
+    except Exception as e:
+        print(f"Error extracting {label} {path}: {e}")
+        return []
+
+
+def extract_pages_from_pdf(pdf_path: str) -> List[Page]:
+    """Extract (page_number, text) pairs from a PDF file."""
+    return _collect(iter_pages_from_pdf, pdf_path, "PDF")
+
+
+def extract_pages_from_ppt(ppt_path: str) -> List[Page]:
+    """Extract (slide_number, text) pairs from a PPTX file."""
+    return _collect(iter_pages_from_ppt, ppt_path, "PPT")
+
+
+def extract_pages_from_docx(docx_path: str) -> List[Page]:
+    """Extract text from DOCX file (Word files carry no page numbers)."""
+    return _collect(iter_pages_from_docx, docx_path, "DOCX")
+
+
+def extract_pages_from_txt(txt_path: str) -> List[Page]:
+    """Extract text from TXT file, treating form feeds as page breaks."""
+    return _collect(iter_pages_from_txt, txt_path, "TXT")
+
+
+# File extension -> (page iterator, stored file type)
+PAGE_ITERATORS = {
+    '.pdf': (iter_pages_from_pdf, 'pdf'),
+    '.ppt': (iter_pages_from_ppt, 'pptx'),
+    '.pptx': (iter_pages_from_ppt, 'pptx'),
+    '.doc': (iter_pages_from_docx, 'docx'),
+    '.docx': (iter_pages_from_docx, 'docx'),
+    '.txt': (iter_pages_from_txt, 'txt'),
+}
+
+
+def get_file_type(file_path: str) -> Optional[str]:
+    """Stored file type for a path, or None if unsupported."""
+    entry = PAGE_ITERATORS.get(Path(file_path).suffix.lower())
+    return entry[1] if entry else None
+
+
+# ---------------------------------------------------------------------------
+# Async streaming
+# ---------------------------------------------------------------------------
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """Process pool for PDF page ranges (created on first use)."""
+    global _process_pool
+    if _process_pool is None:
+        with _process_pool_lock:
+            if _process_pool is None:
+                _process_pool = ProcessPoolExecutor(max_workers=settings.EXTRACTION_PROCESSES)
+    return _process_pool
+
+
+async def _stream_pdf_ranges(pdf_path: str, page_count: int) -> AsyncIterator[Page]:
+    """Extract page ranges in parallel, yielding them in page order."""
+    loop = asyncio.get_event_loop()
+    pool = get_extraction_pool()
+    range_size = settings.PDF_PAGES_PER_TASK
+    ranges = [(start, start + range_size) for start in range(0, page_count, range_size)]
+
+    # Bound in-flight ranges so finished-but-unconsumed pages stay small
+    max_in_flight = settings.EXTRACTION_PROCESSES * 2
+    in_flight = []
+    next_range = 0
+
+    while next_range < len(ranges) or in_flight:
+        while next_range < len(ranges) and len(in_flight) < max_in_flight:
+            start, end = ranges[next_range]
+            in_flight.append(loop.run_in_executor(pool, extract_pdf_page_range, pdf_path, start, end))
+            next_range += 1
+
+        pages = await in_flight.pop(0)
+        for page in pages:
+            yield page
+
+
+async def _stream_in_thread(
+    iter_pages: Callable[[str], Iterator[Page]],
+    path: str,
+    executor: Optional[Executor]
+) -> AsyncIterator[Page]:
+    """Run a page iterator in a thread and stream its pages with backpressure."""
+    loop = asyncio.get_event_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_BUFFER_PAGES)
+    done = object()
+    stop = threading.Event()
+
+    def put(item):
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def produce():
+        try:
+            for page in iter_pages(path):
+                if stop.is_set():
+                    break
+                put(page)
+        finally:
+            put(done)
+
+    producer = loop.run_in_executor(executor, produce)
+
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        # Consumer stopped early: let a blocked producer finish
+        stop.set()
+        while not queue.empty():
+            queue.get_nowait()
+
+    # Surface producer errors
+    await producer
+
+
+async def stream_document_pages(
+    file_path: str,
+    executor: Optional[Executor] = None
+) -> AsyncIterator[Page]:
+    """
+    Yield (page_number, text) pairs in document order as they are extracted.
+
+    PDFs larger than PDF_PAGES_PER_TASK pages are split across the
+    extraction process pool; other files stream from a thread in executor.
+    Extraction errors are logged and raised, so a partly extracted
+    document is never stored as complete.
+    """
+    file_ext = Path(file_path).suffix.lower()
+    if file_ext not in PAGE_ITERATORS:
+        return
+
+    iter_pages, file_type = PAGE_ITERATORS[file_ext]
+    loop = asyncio.get_event_loop()
+
+    try:
+        if file_type == 'pdf':
+            page_count = await loop.run_in_executor(executor, count_pdf_pages, file_path)
+            if page_count > settings.PDF_PAGES_PER_TASK:
+                async for page in _stream_pdf_ranges(file_path, page_count):
+                    yield page
+                return
+
+        async for page in _stream_in_thread(iter_pages, file_path, executor):
+            yield page
+    except Exception as e:
+        print(f"Error extracting {file_type.upper()} {file_path}: {e}")
+        raise
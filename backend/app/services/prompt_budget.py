@@ -0,0 +1,212 @@
+"""
+Token budgets for LLM prompts in EduScribe
+Counts tokens with a local tokenizer (tiktoken when installed, otherwise a
+character heuristic) and fills each prompt's variable parts in priority
+order, trimming at sentence boundaries instead of slicing characters.
+"""
+import re
+from typing import Dict, List, Optional, Union
+
+from app.core import metrics
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+    TIKTOKEN_AVAILABLE = True
+except Exception:
+    _ENCODING = None
+    TIKTOKEN_AVAILABLE = False
+
+# Heuristic used without tiktoken (slightly pessimistic for English text)
+CHARS_PER_TOKEN = 4
+
+# Role and separator tokens the chat format adds per message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Don't bother adding a trimmed item to a list part with less room than this
+MIN_ITEM_TOKENS = 24
+
+# Keep the separator with the text before it, so trimmed text keeps its line breaks
+_SENTENCE_RE = re.compile(r".+?(?:[.!?](?=\s)|\n|$)\s*", re.DOTALL)
+
+
+def count_tokens(text: str) -> int:
+    """Token count of text for the LLM prompt"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def count_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """Prompt tokens of a chat message list"""
+    return sum(count_tokens(m.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def _trim_words(text: str, max_tokens: int, keep_tail: bool) -> str:
+    """Cut a single over-long sentence on a word boundary"""
+    words = text.split()
+    if keep_tail:
+        words.reverse()
+    kept = []
+    used = 0
+    for word in words:
+        tokens = count_tokens(word + " ")
+        if used + tokens > max_tokens:
+            break
+        kept.append(word)
+        used += tokens
+    if keep_tail:
+        kept.reverse()
+    return " ".join(kept)
+
+
+def trim_to_tokens(text: str, max_tokens: int, keep_tail: bool = False) -> str:
+    """
+    Trim text to at most max_tokens, keeping whole sentences.
+
+    keep_tail keeps the end of the text (e.g. the most recent notes)
+    instead of the beginning.
+    """
+    if max_tokens <= 0 or not text:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    sentences = _SENTENCE_RE.findall(text)
+    if keep_tail:
+        sentences.reverse()
+
+    kept = []
+    used = 0
+    for sentence in sentences:
+        tokens = count_tokens(sentence)
+        if used + tokens > max_tokens:
+            break
+        kept.append(sentence)
+        used += tokens
+
+    if not kept:
+        return _trim_words(sentences[0], max_tokens, keep_tail)
+    if keep_tail:
+        kept.reverse()
+    return "".join(kept).strip()
+
+
+def pack_items(items: List[str], max_tokens: int, separator: str = "\n\n",
+               keep_tail: bool = False) -> str:
+    """
+    Join as many whole items as fit (e.g. RAG chunks in relevance order).
+
+    The first item that doesn't fit is trimmed at a sentence boundary if
+    there is still useful room; later items are dropped.
+    """
+    ordered = list(reversed(items)) if keep_tail else list(items)
+    separator_tokens = count_tokens(separator)
+    kept = []
+    used = 0
+    for item in ordered:
+        item = item.strip()
+        if not item:
+            continue
+        cost = count_tokens(item) + (separator_tokens if kept else 0)
+        if used + cost <= max_tokens:
+            kept.append(item)
+            used += cost
+            continue
+        room = max_tokens - used - (separator_tokens if kept else 0)
+        if room >= MIN_ITEM_TOKENS:
+            trimmed = trim_to_tokens(item, room, keep_tail)
+            if trimmed:
+                kept.append(trimmed)
+        break
+
+    if keep_tail:
+        kept.reverse()
+    return separator.join(kept)
+
+
+class PromptPart:
+    """A variable part of a prompt (transcript, document context, history, ...)"""
+
+    def __init__(self, name: str, content: Union[str, List[str]], priority: int,
+                 max_tokens: Optional[int] = None, keep_tail: bool = False,
+                 separator: str = "\n\n"):
+        self.name = name
+        self.content = content
+        self.priority = priority
+        self.max_tokens = max_tokens
+        self.keep_tail = keep_tail
+        self.separator = separator
+
+    def fit(self, max_tokens: int) -> str:
+        if isinstance(self.content, str):
+            return trim_to_tokens(self.content, max_tokens, self.keep_tail)
+        return pack_items(self.content, max_tokens, self.separator, self.keep_tail)
+
+    def full_tokens(self) -> int:
+        if isinstance(self.content, str):
+            return count_tokens(self.content)
+        return count_tokens(self.separator.join(self.content))
+
+
+class PromptBudget:
+    """
+    Token budget for one LLM call.
+
+    Fixed text (system prompt, instructions, template) is charged first;
+    the variable parts then share what is left, lowest priority value
+    first, each up to its own max_tokens cap.
+
+    Example:
+        budget = PromptBudget("synthesis", settings.PROMPT_BUDGET_SYNTHESIS)
+        budget.charge(system_prompt, template)
+        budget.add("transcript", transcript, priority=0)
+        budget.add("context", rag_chunks, priority=1)
+        budget.add("history", previous_notes, priority=2, max_tokens=200, keep_tail=True)
+        parts = budget.fit()  # {"transcript": ..., "context": ..., "history": ...}
+    """
+
+    def __init__(self, name: str, total_tokens: int):
+        self.name = name
+        self.total_tokens = total_tokens
+        self.fixed_tokens = 0
+        self.parts: List[PromptPart] = []
+
+    def charge(self, *texts: str) -> None:
+        """Account for text that is always sent in full"""
+        for text in texts:
+            self.fixed_tokens += count_tokens(text) + MESSAGE_OVERHEAD_TOKENS
+
+    def add(self, name: str, content: Union[str, List[str]], priority: int,
+            max_tokens: Optional[int] = None, keep_tail: bool = False,
+            separator: str = "\n\n") -> None:
+        self.parts.append(PromptPart(name, content, priority, max_tokens, keep_tail, separator))
+
+    def fit(self) -> Dict[str, str]:
+        """Trimmed text for every part, keyed by name"""
+        remaining = max(self.total_tokens - self.fixed_tokens, 0)
+        fitted: Dict[str, str] = {}
+        used: Dict[str, int] = {}
+        trimmed = []
+
+        for part in sorted(self.parts, key=lambda p: p.priority):
+            allowance = remaining if part.max_tokens is None else min(remaining, part.max_tokens)
+            text = part.fit(allowance)
+            tokens = count_tokens(text)
+            if tokens < part.full_tokens():
+                trimmed.append(part.name)
+            fitted[part.name] = text
+            used[part.name] = tokens
+            remaining -= tokens
+
+        total = self.fixed_tokens + sum(used.values())
+        metrics.increment("llm.prompt_tokens_budgeted", total)
+        if trimmed:
+            metrics.increment("llm.prompt_trims")
+        details = ", ".join(f"{name} {tokens}" for name, tokens in used.items())
+        print(f"📏 {self.name} prompt: {total}/{self.total_tokens} tokens "
+              f"(fixed {self.fixed_tokens}, {details})"
+              + (f", trimmed {', '.join(trimmed)}" if trimmed else ""))
+        return fitted
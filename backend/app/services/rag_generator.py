@@ -3,27 +3,31 @@ RAG-based note generation service for EduScribe backend.
 Based on your existing rag_raw_notes_with_history.py
 """
 import os
-import asyncio
+import re
 from typing import List, Dict, Any, Optional
+from app.core import metrics
 from app.core.config import settings
+from app.services.llm_client import llm_client
+from app.services.llm_scheduler import Priority
+from app.services.prompt_budget import PromptBudget
 
-# Try to import Groq, otherwise fallback to a simple stub
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except Exception:
-    GROQ_AVAILABLE = False
+# Tokens of recent notes / previous structured sections kept as history
+HISTORY_TOKENS = 200
 
-# Initialize Groq client if available
-groq_client = None
-if GROQ_AVAILABLE and settings.GROQ_API_KEY:
-    groq_client = Groq(api_key=settings.GROQ_API_KEY)
+# Extractive (no LLM) notes: bullets per chunk and words per bullet
+EXTRACTIVE_BULLETS = 5
+EXTRACTIVE_BULLET_WORDS = 15
 
 async def generate_raw_notes(
     transcription_text: str,
     context_chunks: List[str],
     lecture_id: str,
-    previous_notes: List[str] = None
+    previous_notes: List[str] = None,
+    lecture_summary: Optional[str] = None,
+    model: Optional[str] = None,
+    priority: Priority = Priority.LIVE,
+    raise_errors: bool = False,
+    stage: str = "raw_notes"
 ) -> str:
     """
     Generate raw notes from transcription text using RAG context.
@@ -33,6 +37,12 @@ async def generate_raw_notes(
         context_chunks: Relevant document chunks from FAISS
         lecture_id: ID of the current lecture
         previous_notes: Recent notes for context (to avoid repetition)
+        lecture_summary: Topics and terms covered so far (LectureMemory.summary)
+        model: LLM model (default settings.LLM_MODEL)
+        priority: Scheduler priority of the call
+        raise_errors: Raise LLM errors instead of returning fallback notes
+            (when the notes would replace a version already shown)
+        stage: Usage accounting stage of the LLM call
     
     Generated raw notes as string
     """
@@ -48,14 +58,7 @@ async def generate_raw_notes(
         "and provide accurate terminology. Avoid repeating content from recent notes."
     )
     
-    # Limit previous notes to avoid token overflow
-    recent_notes_text = "\n".join(previous_notes[-settings.HISTORY_CHUNKS:])
-    context_text = "\n".join(context_chunks[:3])  # Limit context chunks
-    
-    prompt_user = (
-        f"SPOKEN TRANSCRIPTION (may contain errors):\n\"\"\"\n{transcription_text}\n\"\"\"\n\n"
-        f"SUPPORTING CONTEXT FROM DOCUMENTS (use this to correct errors and add accuracy):\n\"\"\"\n{context_text}\n\"\"\"\n\n"
-        f"RECENT NOTES (do NOT repeat):\n\"\"\"\n{recent_notes_text}\n\"\"\"\n\n"
+    instructions = (
         "YOUR TASK:\n"
         "1. Read the transcription and UNDERSTAND what the speaker meant (even if words are wrong)\n"
         "2. Use the document context to identify correct terminology and concepts\n"
@@ -70,79 +73,94 @@ async def generate_raw_notes(
         "- Do NOT copy transcription errors into notes"
     )
     
+    # Fit transcript, document context and recent notes into the prompt budget
+    budget = PromptBudget("live notes", settings.PROMPT_BUDGET_LIVE_NOTES)
+    budget.charge(prompt_system, instructions)
+    budget.add("transcript", transcription_text, priority=0)
+    budget.add("history", previous_notes[-settings.HISTORY_CHUNKS:], priority=1,
+               max_tokens=HISTORY_TOKENS, keep_tail=True, separator="\n")
+    budget.add("covered", lecture_summary or "", priority=1, max_tokens=settings.LECTURE_MEMORY_TOKENS)
+    budget.add("context", context_chunks, priority=2, separator="\n")
+    parts = budget.fit()
+    
+    prompt_user = (
+        f"SPOKEN TRANSCRIPTION (may contain errors):\n\"\"\"\n{parts['transcript']}\n\"\"\"\n\n"
+        f"SUPPORTING CONTEXT FROM DOCUMENTS (use this to correct errors and add accuracy):\n\"\"\"\n{parts['context']}\n\"\"\"\n\n"
+        f"COVERED EARLIER IN THE LECTURE (do NOT repeat):\n\"\"\"\n{parts['covered']}\n\"\"\"\n\n"
+        f"RECENT NOTES (do NOT repeat):\n\"\"\"\n{parts['history']}\n\"\"\"\n\n"
+        + instructions
+    )
+    
     try:
-        # Run in executor to avoid blocking
-        loop = asyncio.get_event_loop()
-        generated_text = await loop.run_in_executor(
-            None, 
-            _call_llm_for_raw_notes, 
-            prompt_system, 
-            prompt_user
-        )
-        return generated_text
+        return await _call_llm_for_raw_notes(prompt_system, prompt_user, model, priority, raise_errors, stage)
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Error generating raw notes: {e}")
         return f"- Error generating notes: {str(e)}"
 
-def _call_llm_for_raw_notes(prompt_system: str, prompt_user: str) -> str:
-    """Call Groq chat completion; fallback to naive stub if not available."""
-    if groq_client:
+async def _call_llm_for_raw_notes(prompt_system: str, prompt_user: str, model: Optional[str] = None,
+                                  priority: Priority = Priority.LIVE, raise_errors: bool = False,
+                                  stage: str = "raw_notes") -> str:
+    """Call the shared LLM client; fallback to naive stub if not available."""
+    if llm_client.available or raise_errors:
         try:
-            resp = groq_client.chat.completions.create(
-                model=settings.LLM_MODEL,
+            return await llm_client.chat(
                 messages=[
                     {"role": "system", "content": prompt_system},
                     {"role": "user", "content": prompt_user},
                 ],
                 temperature=0.2,  # Slightly higher for better understanding/correction
                 max_tokens=250,  # More tokens for better explanations
+                model=model,
+                priority=priority,
+                stage=stage,
             )
-            return resp.choices[0].message.content.strip()
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Groq API error: {e}")
             return _fallback_note_generation(prompt_user)
     else:
         return _fallback_note_generation(prompt_user)
 
-def _fallback_note_generation(prompt_user: str) -> str:
-    """Simple stub: take first meaningful phrases as bullets."""
-    lines = []
+def extractive_raw_notes(transcription_text: str) -> str:
+    """
+    Bullets cut straight from the transcript, without an LLM call.
     
-    # Extract transcript section
-    transcript_start = prompt_user.find("Transcript chunk:")
-    transcript_end = prompt_user.find('"""', transcript_start + 20)
+    Used as the instant first tier of live notes; long unpunctuated
+    stretches are split every EXTRACTIVE_BULLET_WORDS words.
+    """
+    bullets = []
+    for sentence in re.split(r"(?<=[.!?])\s+", transcription_text.strip()):
+        words = sentence.split()
+        for start in range(0, len(words), EXTRACTIVE_BULLET_WORDS):
+            piece = words[start:start + EXTRACTIVE_BULLET_WORDS]
+            if len(piece) >= 4:
+                bullets.append(" ".join(piece))
+        if len(bullets) >= EXTRACTIVE_BULLETS:
+            break
     
-    if transcript_start != -1 and transcript_end != -1:
-        transcript_section = prompt_user[transcript_start:transcript_end]
-        
-        for line in transcript_section.split("\n"):
-            line = line.strip()
-            if not line or line.startswith("Transcript"):
-                continue
-            
-            # Split into sentences and create bullets
-            sentences = line.split(".")
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if len(sentence) > 10:  # Skip very short fragments
-                    # Take first 80 characters and add as bullet
-                    bullet = "- " + sentence[:80].strip()
-                    if not bullet.endswith("."):
-                        bullet += "..."
-                    lines.append(bullet)
-                    
-                if len(lines) >= 5:  # Limit to 5 bullets
-                    break
-            
-            if len(lines) >= 5:
-                break
+    return "\n".join(f"- {b}" for b in bullets[:EXTRACTIVE_BULLETS]) or "- (listening...)"
+
+def _fallback_note_generation(prompt_user: str) -> str:
+    """Extractive bullets from the transcript section of the prompt."""
+    metrics.increment("llm.fallbacks")
     
-    return "\n".join(lines) if lines else "- No content generated (fallback mode)"
+    # Transcript sits between the triple quotes after its heading
+    heading = prompt_user.find("SPOKEN TRANSCRIPTION")
+    transcript_start = prompt_user.find('"""', heading) if heading != -1 else -1
+    transcript_end = prompt_user.find('"""', transcript_start + 3) if transcript_start != -1 else -1
+    
+    if transcript_end == -1:
+        return "- No content generated (fallback mode)"
+    return extractive_raw_notes(prompt_user[transcript_start + 3:transcript_end])
 
 async def generate_structured_notes(
     raw_notes_list: List[str],
     lecture_id: str,
-    previous_structured: List[Dict] = None
+    previous_structured: List[Dict] = None,
+    lecture_summary: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Generate structured notes from raw notes.
@@ -151,6 +169,7 @@ async def generate_structured_notes(
         raw_notes_list: List of raw note strings
         lecture_id: ID of the current lecture
         previous_structured: Previous structured notes for context
+        lecture_summary: Topics and terms covered so far (LectureMemory.summary)
     
     Returns:
         Structured notes as dict with title, summary, subtopics, etc.
@@ -161,14 +180,9 @@ async def generate_structured_notes(
     # Combine raw notes
     raw_text = "\n\n".join(raw_notes_list)
     
-    # Build context from previous structured notes
-    prev_text = ""
-    if previous_structured:
-        import json
-        prev_text = "\n\n".join([
-            json.dumps(note, ensure_ascii=False) 
-            for note in previous_structured[-3:]  # Last 3 entries
-        ])
+    # Previous structured notes (short memory)
+    import json
+    prev_entries = [json.dumps(note, ensure_ascii=False) for note in previous_structured[-3:]]
     
     prompt_system = (
         "You are an expert note-maker. Your job is to convert raw micro-notes into a well-structured study "
@@ -200,20 +214,26 @@ Rules:
 - Do NOT fabricate facts beyond what's in raw notes.
 """
     
+    # Fit raw notes and previous sections into the prompt budget
+    budget = PromptBudget("structured notes", settings.PROMPT_BUDGET_SYNTHESIS)
+    budget.charge(prompt_system, schema_instructions)
+    budget.add("raw_notes", raw_text, priority=0)
+    budget.add("previous", prev_entries, priority=1, max_tokens=HISTORY_TOKENS, keep_tail=True)
+    budget.add("covered", lecture_summary or "", priority=1, max_tokens=settings.LECTURE_MEMORY_TOKENS)
+    parts = budget.fit()
+    raw_text = parts["raw_notes"]
+    prev_text = parts["previous"]
+    
     context_hint = ""
+    if parts["covered"]:
+        context_hint += f"\n\nCovered earlier in the lecture (do not repeat):\n{parts['covered']}\n\n"
     if prev_text:
-        context_hint = f"\n\nPrevious structured notes (short memory):\n{prev_text}\n\n"
+        context_hint += f"\n\nPrevious structured notes (short memory):\n{prev_text}\n\n"
     
     prompt_user = f"Raw notes (batch):\n\"\"\"\n{raw_text}\n\"\"\"\n\n{context_hint}{schema_instructions}\nReturn only JSON."
     
     try:
-        loop = asyncio.get_event_loop()
-        generated = await loop.run_in_executor(
-            None,
-            _call_llm_for_structured,
-            prompt_system,
-            prompt_user
-        )
+        generated = await _call_llm_for_structured(prompt_system, prompt_user)
         
         # Parse JSON
         import json
@@ -236,20 +256,19 @@ Rules:
             "key_takeaways": []
         }
 
-def _call_llm_for_structured(prompt_system: str, prompt_user: str) -> str:
+async def _call_llm_for_structured(prompt_system: str, prompt_user: str) -> str:
     """Call LLM for structured note generation."""
-    if groq_client:
+    if llm_client.available:
         try:
-            resp = groq_client.chat.completions.create(
-                model=settings.LLM_MODEL,
+            return await llm_client.chat(
                 messages=[
                     {"role": "system", "content": prompt_system},
                     {"role": "user", "content": prompt_user},
                 ],
                 temperature=0.2,
                 max_tokens=600,
+                stage="structured",
             )
-            return resp.choices[0].message.content.strip()
         except Exception as e:
             print(f"Groq API error in structured generation: {e}")
             raise e
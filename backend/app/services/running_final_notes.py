@@ -0,0 +1,239 @@
+"""
+Running final notes for EduScribe
+Keeps the final-notes outline, section bullets, glossary and takeaways up to
+date as each structured-notes window arrives, so stopping a lecture only
+needs a cheap finalization pass instead of a full rebuild.
+"""
+import asyncio
+import json
+import re
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.final_synthesizer import FinalSynthesizer
+from app.services.llm_scheduler import Priority
+from app.services.prompt_budget import PromptBudget
+
+# Bullets added to a section per window
+MAX_WINDOW_BULLETS = 6
+
+# Glossary terms kept in the final notes (most emphasised first)
+GLOSSARY_SIZE = 8
+
+# Document context per update, for glossary definitions
+UPDATE_CONTEXT_TOKENS = 250
+
+_BOLD_TERM_RE = re.compile(r"\*\*([^*\n]{2,40})\*\*")
+
+UPDATE_PROMPT_TEMPLATE = """CURRENT LECTURE TITLE: {title}
+
+CURRENT SECTIONS:
+{sections}
+
+CURRENT KEY TAKEAWAYS:
+{takeaways}
+
+TERMS ALREADY DEFINED: {terms}
+
+NEW NOTES:
+{notes}
+
+DOCUMENT CONTEXT:
+{context}
+
+Update the final notes with the NEW NOTES. Return ONLY JSON:
+{{
+  "title": "<4-6 word lecture title; keep the current one unless the topic clearly changed>",
+  "section": "<an existing section title, or a new one only for a clearly new topic>",
+  "bullets": ["new point for that section, 10-20 words", ...],
+  "glossary": {{"Term": "one sentence definition (15-20 words max)"}},
+  "takeaways": ["up to 4 lecture-level takeaways, 12-18 words each"]
+}}
+
+Rules:
+- At most {max_bullets} bullets, only information not already covered
+- Glossary: only new key terms from the NEW NOTES (max 3)
+- Include formulas in $$LaTeX$$ format"""
+
+
+class RunningFinalNotes(FinalSynthesizer):
+    """
+    Final notes maintained during a lecture.
+
+    submit() queues one structured-notes window; a single background worker
+    folds queued windows into the model in order, one LLM call each (the
+    prompt only carries the outline, never the accumulated content).
+    finalize() waits at most FINAL_NOTES_FINALIZE_TIMEOUT for the queue,
+    files any windows still pending from their own text, and assembles the
+    final notes without further LLM calls.
+    """
+
+    def __init__(self, lecture_id: str):
+        super().__init__(lecture_id)
+        self.title = "Lecture Notes"
+        self.sections: Dict[str, List[str]] = {}  # section title -> bullets, in outline order
+        self.glossary: Dict[str, str] = {}
+        self.term_counts: Counter = Counter()
+        self.takeaways: List[str] = []
+        self.window_count = 0
+        self._queue: Deque[Tuple[str, List[str]]] = deque()  # windows not yet merged, oldest first
+        self._worker: Optional[asyncio.Task] = None
+
+    def submit(self, structured_notes: str, rag_context: Optional[List[str]] = None) -> None:
+        """Fold a new structured-notes window into the running notes (non-blocking)"""
+        self._queue.append((structured_notes, rag_context or []))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._drain())
+
+    async def finalize(self) -> Dict[str, Any]:
+        """Final notes from the running model (waits a bounded time for pending updates)"""
+        if self._worker is not None and not self._worker.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self._worker), settings.FINAL_NOTES_FINALIZE_TIMEOUT)
+            except asyncio.TimeoutError:
+                self._worker.cancel()
+                print(f"⏱️  {len(self._queue)} running-notes updates still pending at stop, "
+                      f"filing them without the LLM")
+        self._worker = None
+        while self._queue:
+            # Windows whose update did not finish in time
+            structured_notes, _ = self._queue.popleft()
+            self._count_window(structured_notes)
+            self._merge(self._fallback_update(structured_notes))
+            metrics.increment("final_notes.unmerged_windows")
+
+        if not self.sections:
+            return self._empty_result()
+
+        sections = []
+        for title, bullets in self.sections.items():
+            content = "\n".join(f"- {b}" for b in bullets)
+            sections.append({
+                "title": title,
+                "content": content,
+                "formulas": self._extract_formulas(content)
+            })
+
+        # Most emphasised terms first (stable, so ties keep the order they were defined in)
+        defined = sorted(self.glossary, key=lambda term: -self.term_counts.get(term, 0))
+        glossary = {term: self.glossary[term] for term in defined[:GLOSSARY_SIZE]}
+
+        takeaways = self.takeaways or [b for bullets in self.sections.values() for b in bullets][:4]
+
+        print(f"✅ Final notes from {self.window_count} windows: {len(sections)} sections, "
+              f"{len(glossary)} terms")
+        return {
+            "success": True,
+            "title": self.title,
+            "markdown": self._assemble_markdown(self.title, sections, glossary, takeaways),
+            "sections": sections,
+            "glossary": glossary,
+            "key_takeaways": takeaways,
+            "lecture_id": self.lecture_id
+        }
+
+    async def _drain(self) -> None:
+        """Merge queued windows in order (the only writer while the lecture runs)"""
+        while self._queue:
+            structured_notes, rag_context = self._queue[0]
+
+            update = None
+            if self.llm.available:
+                try:
+                    update = await self._request_update(structured_notes, rag_context)
+                except Exception as e:
+                    print(f"⚠️  Running final notes update failed: {e}")
+                    metrics.increment("llm.fallbacks")
+            if update is None:
+                update = self._fallback_update(structured_notes)
+
+            # No await from here on: a cancelled update leaves its window queued
+            self._queue.popleft()
+            self._count_window(structured_notes)
+            self._merge(update)
+
+    def _count_window(self, structured_notes: str) -> None:
+        self.window_count += 1
+        for term in _BOLD_TERM_RE.findall(structured_notes):
+            self.term_counts[term.strip()] += 1
+
+    async def _request_update(self, structured_notes: str, rag_context: List[str]) -> Optional[Dict[str, Any]]:
+        system_prompt = """You maintain the final study notes of a lecture while it is running.
+Merge new material into the existing outline. Be concise. NO repetition."""
+
+        state = {
+            "title": self.title,
+            "sections": "\n".join(f"- {title}" for title in self.sections) or "(none yet)",
+            "takeaways": "\n".join(f"- {t}" for t in self.takeaways) or "(none yet)",
+            "terms": ", ".join(self.glossary) or "(none)"
+        }
+
+        budget = PromptBudget("running final notes", settings.PROMPT_BUDGET_FINAL_SECTION)
+        budget.charge(system_prompt, UPDATE_PROMPT_TEMPLATE, *state.values())
+        budget.add("notes", structured_notes, priority=0)
+        budget.add("context", rag_context, priority=1, max_tokens=UPDATE_CONTEXT_TOKENS)
+        parts = budget.fit()
+
+        user_prompt = UPDATE_PROMPT_TEMPLATE.format(
+            notes=parts["notes"],
+            context=parts["context"] or "No document context",
+            max_bullets=MAX_WINDOW_BULLETS,
+            **state
+        )
+
+        result = await self.llm.chat(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.15,
+            max_tokens=500,
+            priority=Priority.FINAL,
+            # Includes time queued behind live traffic; a late update is filed without the LLM
+            deadline=settings.RUNNING_NOTES_UPDATE_DEADLINE,
+            stage="final_update"
+        )
+        update = json.loads(self._strip_code_fences(result))
+        # Malformed output (bullets as a string or null) is filed like a failed call
+        if not isinstance(update, dict) or not isinstance(update.get("bullets"), list):
+            print("⚠️  Running final notes update had no bullet list, filing window as is")
+            return None
+        return update
+
+    def _fallback_update(self, structured_notes: str) -> Dict[str, Any]:
+        """Without the LLM: file the window's bullets under its first heading"""
+        headings = re.findall(r'^##\s+(.+)$', structured_notes, re.MULTILINE)
+        heading = next((h.strip() for h in headings if h.strip().lower() != "lecture notes"), "Main Content")
+        bullets = re.findall(r'^\s*[-•]\s*(.+)$', structured_notes, re.MULTILINE)
+        return {"section": heading, "bullets": bullets[:MAX_WINDOW_BULLETS]}
+
+    def _merge(self, update: Dict[str, Any]) -> None:
+        title = str(update.get("title") or "").strip()
+        if title:
+            self.title = title
+
+        section = str(update.get("section") or "Main Content").strip()
+        # Match existing sections case-insensitively so the outline doesn't fork
+        existing = {name.lower(): name for name in self.sections}
+        section = existing.get(section.lower(), section)
+        known = {b.lower() for b in self.sections.get(section, [])}
+        bullets = self.sections.setdefault(section, [])
+        for bullet in update.get("bullets", [])[:MAX_WINDOW_BULLETS]:
+            bullet = str(bullet).strip().lstrip("-• ").strip()
+            if bullet and bullet.lower() not in known:
+                bullets.append(bullet)
+                known.add(bullet.lower())
+        if not bullets:
+            del self.sections[section]
+
+        glossary = update.get("glossary")
+        if isinstance(glossary, dict):
+            for term, definition in glossary.items():
+                if str(term).strip() and str(definition).strip():
+                    self.glossary.setdefault(str(term).strip(), str(definition).strip())
+
+        takeaways = update.get("takeaways")
+        if isinstance(takeaways, list) and takeaways:
+            self.takeaways = [str(t).strip() for t in takeaways if str(t).strip()][:4]
@@ -0,0 +1,70 @@
+"""
+Minimal async task graph for EduScribe
+Each node starts as soon as the nodes it depends on have finished, so
+independent LLM calls run concurrently and latency follows the critical path.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+# name -> (dependency names, coroutine function called with dependency results as kwargs)
+TaskGraph = Dict[str, Tuple[List[str], Callable[..., Awaitable[Any]]]]
+
+
+def _check_graph(graph: TaskGraph) -> None:
+    """Reject unknown dependencies and cycles (which would never finish)"""
+    for name, (deps, _) in graph.items():
+        missing = [dep for dep in deps if dep not in graph]
+        if missing:
+            raise ValueError(f"Task '{name}' depends on unknown tasks: {missing}")
+
+    done = set()
+    visiting = set()
+
+    def visit(name: str) -> None:
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Task graph has a cycle through '{name}'")
+        visiting.add(name)
+        for dep in graph[name][0]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in graph:
+        visit(name)
+
+
+async def run_task_graph(graph: TaskGraph) -> Dict[str, Any]:
+    """
+    Run every node of the graph and return {name: result}.
+
+    If a node raises, the remaining nodes are cancelled and the error
+    is re-raised.
+    """
+    _check_graph(graph)
+
+    tasks: Dict[str, asyncio.Task] = {}
+    timings: Dict[str, float] = {}
+
+    async def run_node(name: str) -> Any:
+        deps, fn = graph[name]
+        dep_results = {dep: await tasks[dep] for dep in deps}
+        started = time.perf_counter()
+        result = await fn(**dep_results)
+        timings[name] = time.perf_counter() - started
+        return result
+
+    for name in graph:
+        tasks[name] = asyncio.ensure_future(run_node(name))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+
+    print("⏱️  Task graph: " + ", ".join(f"{name} {seconds:.1f}s" for name, seconds in timings.items()))
+    return {name: task.result() for name, task in tasks.items()}
@@ -0,0 +1,112 @@
+"""
+Near-duplicate transcript detection for EduScribe
+Consecutive chunks that say almost the same thing (a repeated explanation,
+a demo, background noise transcribed the same way) are matched by MinHash
+signatures of word shingles, so their notes can be reused instead of
+generated again.
+"""
+import re
+import zlib
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+# Words per shingle
+SHINGLE_WORDS = 3
+
+# Chunks with fewer distinct words than this are never matched (too little to compare)
+MIN_WORDS = 8
+
+# Mersenne prime for the universal hash family (a * x stays below 2^62)
+_PRIME = np.uint64((1 << 31) - 1)
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def shingles(text: str) -> List[int]:
+    """Stable 32-bit hashes of the word n-grams of text (case and punctuation ignored)"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)]
+    return list({zlib.crc32(gram.encode("utf-8")) for gram in grams})
+
+
+class MinHasher:
+    """Fixed set of hash permutations; the share of equal minima estimates Jaccard similarity"""
+
+    def __init__(self, permutations: int, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_PRIME), size=permutations, dtype=np.uint64)
+        self._b = rng.randint(0, int(_PRIME), size=permutations, dtype=np.uint64)
+
+    def signature(self, hashes: List[int]) -> np.ndarray:
+        values = np.asarray(hashes, dtype=np.uint64) % _PRIME
+        permuted = (self._a[:, None] * values[None, :] + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        return float(np.mean(first == second))
+
+
+class DuplicateDetector:
+    """
+    Recent chunks of one lecture, for near-duplicate lookups.
+
+    Only the last DUPLICATE_WINDOW_CHUNKS are kept, so a topic the lecturer
+    comes back to much later still gets fresh notes.
+    """
+
+    def __init__(self):
+        self._recent = deque(maxlen=settings.DUPLICATE_WINDOW_CHUNKS)
+
+    def find(self, text: str) -> Optional[Dict]:
+        """
+        Most similar recent chunk if text is a near-duplicate of it.
+
+        Returns:
+            The matching earlier transcription dict (as passed to add), or None
+        """
+        signature = _signature(text)
+        if signature is None:
+            return None
+
+        best, best_similarity = None, 0.0
+        for other, earlier in self._recent:
+            similarity = MinHasher.similarity(signature, other)
+            if similarity > best_similarity:
+                best, best_similarity = earlier, similarity
+        if best_similarity >= settings.DUPLICATE_SIMILARITY:
+            return best
+        return None
+
+    def add(self, text: str, transcription: Dict) -> None:
+        """
+        Remember a chunk whose notes were generated successfully.
+
+        Args:
+            text: Transcript of the chunk
+            transcription: The chunk's transcription dict (later duplicates
+                reuse its current "enhanced_notes", so keep it up to date)
+        """
+        signature = _signature(text)
+        if signature is not None:
+            self._recent.append((signature, transcription))
+
+
+def _signature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature of text, or None when detection is off or text is too short"""
+    if not settings.DUPLICATE_DETECTION_ENABLED:
+        return None
+    hashes = shingles(text)
+    if len(hashes) < MIN_WORDS - SHINGLE_WORDS + 1:
+        return None
+    return _hasher.signature(hashes)
+
+# Shared permutations (signatures are only comparable under the same ones)
+_hasher = MinHasher(settings.MINHASH_PERMUTATIONS)
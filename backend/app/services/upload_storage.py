@@ -0,0 +1,208 @@
+"""
+Streaming upload storage for EduScribe backend.
+Uploads are written in fixed-size blocks with async file I/O, hashed and
+size-checked as they go, and rejected early if oversized or malformed.
+Documents are content-addressed under storage/uploads/blobs.
+"""
+import hashlib
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+
+from app.core.config import settings
+
+# Read/write block size for streaming uploads
+UPLOAD_BLOCK_SIZE = 1024 * 1024  # 1 MiB
+
+_ZIP = (b"PK\x03\x04",)
+_OLE = (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",)  # legacy .ppt / .doc
+
+# Document extension -> accepted leading bytes (None: plain text)
+DOCUMENT_SIGNATURES: Dict[str, Optional[Tuple[bytes, ...]]] = {
+    '.pdf': (b"%PDF-",),
+    '.pptx': _ZIP,
+    '.docx': _ZIP,
+    '.ppt': _OLE,
+    '.doc': _OLE,
+    '.txt': None,
+}
+
+# Containers the browser recorder may send for audio chunks
+AUDIO_SIGNATURES: Tuple[bytes, ...] = (
+    b"RIFF",                # WAV
+    b"\x1a\x45\xdf\xa3",    # WebM / Matroska
+    b"OggS",                # Ogg / Opus
+    b"ID3",                 # MP3 with ID3 tag
+)
+
+
+def blob_path(content_hash: str, extension: str) -> Path:
+    """Storage path for a content hash (fanned out by hash prefix)."""
+    return Path(settings.UPLOAD_DIR) / "blobs" / content_hash[:2] / f"{content_hash}{extension.lower()}"
+
+
+def _check_signature(first_block: bytes, signatures: Optional[Tuple[bytes, ...]], label: str) -> None:
+    """Reject content whose leading bytes don't match its declared type."""
+    if signatures is None:
+        # Plain text: binary content is almost certainly a mislabelled file
+        if b"\x00" in first_block:
+            raise HTTPException(status_code=415, detail=f"{label} is not a text file")
+        return
+    if not first_block.startswith(signatures):
+        raise HTTPException(status_code=415, detail=f"{label} content does not match its file type")
+
+
+async def stream_upload_to_file(
+    upload: UploadFile,
+    dest_path: Path,
+    max_bytes: int,
+    signatures: Optional[Tuple[bytes, ...]]
+) -> Tuple[str, int]:
+    """
+    Stream an upload to dest_path in UPLOAD_BLOCK_SIZE blocks.
+
+    The first block is checked against signatures (None: plain text, no
+    NUL bytes) and the running size against max_bytes; on rejection the
+    partial file is removed and an HTTPException (413 / 415) is raised.
+
+    Returns:
+        (sha256 hex digest, size in bytes)
+    """
+    label = upload.filename or "upload"
+    hasher = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(dest_path, "wb") as f:
+            while True:
+                block = await upload.read(UPLOAD_BLOCK_SIZE)
+                if not block:
+                    break
+                if size == 0:
+                    _check_signature(block, signatures, label)
+                size += len(block)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"{label} exceeds the {max_bytes // (1024 * 1024)} MB upload limit"
+                    )
+                hasher.update(block)
+                await f.write(block)
+    except BaseException:
+        dest_path.unlink(missing_ok=True)
+        raise
+
+    if size == 0:
+        dest_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail=f"{label} is empty")
+
+    return hasher.hexdigest(), size
+
+
+async def save_upload_content_addressed(upload: UploadFile) -> Tuple[Path, str, int]:
+    """
+    Stream a document upload to content-addressed storage.
+
+    Returns:
+        (stored path, sha256 hex digest, size in bytes)
+    """
+    return (await save_uploads_content_addressed([upload]))[0]
+
+
+async def save_uploads_content_addressed(uploads: List[UploadFile]) -> List[Tuple[Path, str, int]]:
+    """
+    Stream several document uploads to content-addressed storage, all or none.
+
+    Every upload is checked and staged before any is stored, so a rejected
+    file (HTTPException 413 / 415 / 400) leaves no blobs from the others.
+
+    Returns:
+        (stored path, sha256 hex digest, size in bytes) per upload, in order
+    """
+    staged = []
+    try:
+        for upload in uploads:
+            staged.append(await _stage_upload(upload))
+    except BaseException:
+        for tmp_path, _, _, _ in staged:
+            tmp_path.unlink(missing_ok=True)
+        raise
+
+    return [_store_staged(*entry) for entry in staged]
+
+
+async def _stage_upload(upload: UploadFile) -> Tuple[Path, str, int, str]:
+    """Stream an upload to a temporary file; returns (tmp path, hash, size, extension)."""
+    extension = Path(upload.filename or "").suffix.lower()
+    if extension not in DOCUMENT_SIGNATURES:
+        raise HTTPException(status_code=415, detail=f"Unsupported file type: {extension or 'none'}")
+
+    tmp_dir = Path(settings.UPLOAD_DIR) / "blobs" / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = tmp_dir / f"{uuid.uuid4().hex}{extension}"
+
+    content_hash, size = await stream_upload_to_file(
+        upload,
+        tmp_path,
+        max_bytes=settings.MAX_DOCUMENT_UPLOAD_BYTES,
+        signatures=DOCUMENT_SIGNATURES[extension]
+    )
+    return tmp_path, content_hash, size, extension
+
+
+def _store_staged(tmp_path: Path, content_hash: str, size: int, extension: str) -> Tuple[Path, str, int]:
+    """Move a staged upload to its content-addressed path."""
+    final_path = blob_path(content_hash, extension)
+
+    if final_path.exists():
+        # Same bytes already stored - keep the existing blob
+        tmp_path.unlink(missing_ok=True)
+    else:
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, final_path)
+
+    return final_path, content_hash, size
+
+
+async def save_audio_upload(upload: UploadFile, dest_path: Path) -> int:
+    """Stream an audio chunk upload to dest_path; returns its size in bytes."""
+    _, size = await stream_upload_to_file(
+        upload,
+        dest_path,
+        max_bytes=settings.MAX_AUDIO_CHUNK_BYTES,
+        signatures=AUDIO_SIGNATURES
+    )
+    return size
+
+
+def hash_file(file_path: str) -> str:
+    """SHA-256 of a file already on disk."""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(UPLOAD_BLOCK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def store_file_content_addressed(source_path: str) -> Tuple[Path, str, int]:
+    """
+    Copy a local file into content-addressed storage (blocking).
+
+    Returns:
+        (stored path, sha256 hex digest, size in bytes)
+    """
+    content_hash = hash_file(source_path)
+    final_path = blob_path(content_hash, Path(source_path).suffix)
+
+    if not final_path.exists():
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = final_path.with_name(f"{uuid.uuid4().hex}.tmp")
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, final_path)
+
+    return final_path, content_hash, os.path.getsize(final_path)
@@ -0,0 +1,93 @@
+"""
+Vector search backend selection for EduScribe
+Probes Atlas Vector Search once, caches the result and trips a circuit
+breaker to the simple cosine fallback after repeated failures.
+"""
+import asyncio
+import time
+from typing import Optional
+
+from app.core import metrics
+from app.core.config import settings
+from database.mongodb_connection import probe_vector_search
+
+ATLAS = "atlas"
+FALLBACK = "fallback"
+
+
+class VectorSearchCircuitBreaker:
+    """Routes queries to Atlas or the fallback and re-probes on a timer"""
+
+    def __init__(self, failure_threshold: int, reprobe_interval: float):
+        self.failure_threshold = failure_threshold
+        self.reprobe_interval = reprobe_interval
+
+        self.atlas_available = False
+        self.consecutive_failures = 0
+        self.circuit_open = False
+        self.last_probe_time = 0.0
+        self._probe_task: Optional[asyncio.Task] = None
+
+    async def probe(self) -> bool:
+        """Probe Atlas capabilities and reset the circuit on success"""
+        self.last_probe_time = time.time()
+        metrics.increment("retrieval.probes")
+
+        available = await probe_vector_search()
+        self.atlas_available = available
+
+        if available:
+            self.consecutive_failures = 0
+            self.circuit_open = False
+
+        self._publish_backend()
+        print(f"🔎 Vector search backend: {self.backend}")
+        return available
+
+    @property
+    def backend(self) -> str:
+        """Backend queries are currently routed to"""
+        if self.atlas_available and not self.circuit_open:
+            return ATLAS
+        return FALLBACK
+
+    def select_backend(self) -> str:
+        """Pick a backend for the next query, scheduling a re-probe if due"""
+        if self.backend == FALLBACK and self._reprobe_due():
+            self._schedule_probe()
+        return self.backend
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+
+    def record_failure(self, error: Exception) -> None:
+        metrics.increment("retrieval.atlas_failures")
+        self.consecutive_failures += 1
+
+        if not self.circuit_open and self.consecutive_failures >= self.failure_threshold:
+            self.circuit_open = True
+            self.last_probe_time = time.time()
+            metrics.increment("retrieval.circuit_opens")
+            print(f"⚠️  Atlas Vector Search failed {self.consecutive_failures} times, "
+                  f"routing to fallback for {self.reprobe_interval}s: {error}")
+            self._publish_backend()
+
+    def _reprobe_due(self) -> bool:
+        return time.time() - self.last_probe_time >= self.reprobe_interval
+
+    def _schedule_probe(self) -> None:
+        if self._probe_task and not self._probe_task.done():
+            return
+        self.last_probe_time = time.time()
+        self._probe_task = asyncio.create_task(self.probe())
+
+    def _publish_backend(self) -> None:
+        metrics.set_gauge("retrieval.backend", self.backend)
+        metrics.set_gauge("retrieval.circuit_open", self.circuit_open)
+
+
+# Process-wide breaker shared by all lectures
+vector_search_breaker = VectorSearchCircuitBreaker(
+    failure_threshold=settings.VECTOR_SEARCH_FAILURE_THRESHOLD,
+    reprobe_interval=settings.VECTOR_SEARCH_REPROBE_INTERVAL
+)
@@ -0,0 +1,145 @@
+"""
+Synthetic document fixtures for ingestion benchmarks
+Generates PDF / PPTX / DOCX / TXT files of controlled size offline, filled
+with deterministic lecture-like text so runs are comparable.
+"""
+import random
+from pathlib import Path
+from typing import List
+
+from pptx import Presentation
+from pptx.util import Inches
+import docx
+
+_VOCABULARY = (
+    "algorithm gradient descent convergence matrix vector eigenvalue basis "
+    "probability distribution variance estimator likelihood regression model "
+    "training validation overfitting regularization neural network layer "
+    "activation backpropagation loss function optimization stochastic batch "
+    "graph vertex edge traversal complexity recursion dynamic programming "
+    "memory cache latency throughput protocol packet kernel process thread"
+).split()
+
+
+def lecture_sentences(count: int, seed: int) -> List[str]:
+    """Deterministic pseudo-lecture sentences."""
+    rng = random.Random(seed)
+    sentences = []
+    for _ in range(count):
+        words = [rng.choice(_VOCABULARY) for _ in range(rng.randint(8, 22))]
+        words[0] = words[0].capitalize()
+        sentences.append(" ".join(words) + ".")
+    return sentences
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _wrap(text: str, width: int) -> List[str]:
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + len(word) + 1 > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}".strip()
+    if line:
+        lines.append(line)
+    return lines
+
+
+def write_pdf(path: Path, pages: int, sentences_per_page: int, seed: int = 0) -> Path:
+    """Minimal text-only PDF (Helvetica, one content stream per page)."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+
+    for page_index in range(pages):
+        text = " ".join(lecture_sentences(sentences_per_page, seed * 100003 + page_index))
+        lines = _wrap(text, 90)[:60]
+        stream = "BT /F1 10 Tf 12 TL 50 780 Td " + " ".join(
+            f"({_pdf_escape(line)}) Tj T*" for line in lines
+        ) + " ET"
+        data = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(data), data))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+
+    path.write_bytes(bytes(out))
+    return path
+
+
+def write_pptx(path: Path, slides: int, sentences_per_slide: int, seed: int = 0) -> Path:
+    """Slide deck with a title and one text box of bullets per slide."""
+    prs = Presentation()
+    layout = prs.slide_layouts[5]  # title only
+    for slide_index in range(slides):
+        sentences = lecture_sentences(sentences_per_slide, seed * 100003 + slide_index)
+        slide = prs.slides.add_slide(layout)
+        slide.shapes.title.text = f"Slide {slide_index + 1}"
+        box = slide.shapes.add_textbox(Inches(0.5), Inches(1.5), Inches(9), Inches(5))
+        frame = box.text_frame
+        frame.text = sentences[0]
+        for sentence in sentences[1:]:
+            frame.add_paragraph().text = sentence
+    prs.save(str(path))
+    return path
+
+
+def write_docx(path: Path, paragraphs: int, sentences_per_paragraph: int, seed: int = 0) -> Path:
+    document = docx.Document()
+    for paragraph_index in range(paragraphs):
+        sentences = lecture_sentences(sentences_per_paragraph, seed * 100003 + paragraph_index)
+        document.add_paragraph(" ".join(sentences))
+    document.save(str(path))
+    return path
+
+
+def write_txt(path: Path, pages: int, sentences_per_page: int, seed: int = 0) -> Path:
+    """Plain text with form feeds between pages."""
+    pages_text = [
+        "\n".join(lecture_sentences(sentences_per_page, seed * 100003 + page_index))
+        for page_index in range(pages)
+    ]
+    path.write_text("\f".join(pages_text), encoding="utf-8")
+    return path
+
+
+# File type -> writer(path, units, sentences_per_unit, seed)
+WRITERS = {
+    "pdf": write_pdf,
+    "pptx": write_pptx,
+    "docx": write_docx,
+    "txt": write_txt,
+}
+
+
+def build_fixture(directory: Path, file_type: str, units: int,
+                  sentences_per_unit: int, seed: int = 0) -> Path:
+    """Write one fixture; units are pages, slides or paragraphs."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"bench_{units}x{sentences_per_unit}_{seed}.{file_type}"
+    return WRITERS[file_type](path, units, sentences_per_unit, seed)
@@ -0,0 +1,225 @@
+"""
+Document ingestion throughput benchmark
+Runs synthetic PDF / PPTX / DOCX / TXT fixtures through process_document
+against an in-memory stand-in for MongoDB and reports per-stage time,
+pages/s, chunks/s and peak memory.
+
+Usage (from backend/):
+    python -m benchmarks.ingestion_benchmark
+    python -m benchmarks.ingestion_benchmark --types pdf --units 400 --pages-per-task 8
+    python -m benchmarks.ingestion_benchmark --embedding pool --processes 4 --json
+"""
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services import document_processor_mongodb as processor
+from app.services.embedding_pool import EmbeddingPool
+from benchmarks.fixtures import WRITERS, build_fixture
+
+STAGES = ["extract", "chunk", "embed", "store", "index"]
+
+
+class InMemoryStore:
+    """Stand-in for the MongoDB calls made during ingestion"""
+
+    def __init__(self):
+        self.contents: Dict[str, Dict[str, Any]] = {}
+        self.pages: List[Tuple[str, int, str]] = []
+        self.embeddings: List[Dict[str, Any]] = []
+        self.lexical: Dict[str, Dict] = {}
+        self.links: Dict[Tuple[str, str], str] = {}
+
+    async def get_document_content(self, content_hash: str) -> Optional[Dict]:
+        return self.contents.get(content_hash)
+
+    async def claim_document_content(self, content_hash: str, owner: str) -> bool:
+        content = self.contents.setdefault(content_hash, {
+            "text_length": 0, "page_count": 0, "chunk_count": 0, "processed": False
+        })
+        if content["processed"] or content.get("claimed_by") not in (None, owner):
+            return False
+        content["claimed_by"] = owner
+        return True
+
+    async def renew_document_content_claim(self, content_hash: str, owner: str) -> None:
+        pass
+
+    async def release_document_content_claim(self, content_hash: str, owner: str) -> None:
+        if self.contents.get(content_hash, {}).get("claimed_by") == owner:
+            del self.contents[content_hash]["claimed_by"]
+
+    async def save_document_content(self, content_hash: str, file_type: str) -> None:
+        self.contents[content_hash]["file_type"] = file_type
+
+    async def save_document_pages(self, content_hash: str, pages: List[Tuple[int, str]]) -> None:
+        self.pages.extend((content_hash, number, text) for number, text in pages)
+
+    async def clear_document_content_chunks(self, content_hash: str) -> None:
+        self.pages = [p for p in self.pages if p[0] != content_hash]
+        self.embeddings = [e for e in self.embeddings if e["document_id"] != content_hash]
+        self.lexical.pop(content_hash, None)
+
+    async def save_document_embeddings(self, embeddings_data: List[Dict[str, Any]]) -> None:
+        # Same list conversion the real insert pays for
+        for item in embeddings_data:
+            self.embeddings.append({**item, "embedding": np.asarray(item["embedding"]).tolist()})
+
+    async def save_lexical_index(self, document_id: str, shards: List[Dict[str, Any]]) -> None:
+        self.lexical[document_id] = shards
+
+    async def mark_document_content_processed(self, content_hash: str, chunk_count: int,
+                                              text_length: int, page_count: int) -> None:
+        self.contents[content_hash].update({
+            "chunk_count": chunk_count, "text_length": text_length,
+            "page_count": page_count, "processed": True
+        })
+
+    async def link_document(self, lecture_id: str, filename: str, file_type: str,
+                            file_path: str, content_hash: str, file_size: int) -> str:
+        return self.links.setdefault((lecture_id, content_hash), f"bench-{len(self.links)}")
+
+    def install(self) -> None:
+        """Point the ingestion module at this store"""
+        for name in ["get_document_content", "claim_document_content", "renew_document_content_claim",
+                     "release_document_content_claim", "save_document_content", "save_document_pages",
+                     "clear_document_content_chunks", "save_document_embeddings",
+                     "save_lexical_index", "mark_document_content_processed", "link_document"]:
+            setattr(processor, name, getattr(self, name))
+
+
+def _skip_embedding(chunk_records: List[Dict[str, Any]]) -> np.ndarray:
+    """Zero vectors, to time extraction and storage without the model"""
+    return np.zeros((len(chunk_records), 384), dtype=np.float32)
+
+
+async def run_once(path: Path, embedding_pool: Optional[EmbeddingPool],
+                   trace_memory: bool) -> Dict[str, Any]:
+    store = InMemoryStore()
+    store.install()
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = await processor.process_document(
+        file_path=str(path),
+        lecture_id="benchmark",
+        filename=path.name,
+        embedding_pool=embedding_pool
+    )
+    elapsed = time.perf_counter() - start
+    peak_mb = None
+    if trace_memory:
+        peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    if not result.get("success"):
+        raise RuntimeError(f"Ingestion failed for {path.name}: {result.get('error')}")
+
+    pages = store.contents[result["content_hash"]]["page_count"]
+    return {
+        "file": path.name,
+        "file_type": path.suffix.lstrip("."),
+        "size_kb": path.stat().st_size / 1024,
+        "pages": pages,
+        "chunks": result["chunk_count"],
+        "seconds": elapsed,
+        "stage_seconds": {stage: result["stage_seconds"].get(stage, 0.0) for stage in STAGES},
+        "pages_per_s": pages / elapsed if elapsed else 0.0,
+        "chunks_per_s": result["chunk_count"] / elapsed if elapsed else 0.0,
+        "python_peak_mb": peak_mb,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    header = ["file", "pages", "chunks", "total s"] + [f"{s} s" for s in STAGES] + \
+             ["pages/s", "chunks/s", "py peak MB", "max RSS MB"]
+    print(" | ".join(header))
+    for row in rows:
+        cells = [row["file"], str(row["pages"]), str(row["chunks"]), f"{row['seconds']:.2f}"]
+        cells += [f"{row['stage_seconds'][stage]:.2f}" for stage in STAGES]
+        cells += [
+            f"{row['pages_per_s']:.1f}",
+            f"{row['chunks_per_s']:.1f}",
+            f"{row['python_peak_mb']:.1f}" if row["python_peak_mb"] is not None else "-",
+            f"{row['max_rss_mb']:.0f}"
+        ]
+        print(" | ".join(cells))
+
+
+async def main(args) -> int:
+    # Options under comparison
+    if args.batch_size:
+        settings.EMBEDDING_BATCH_SIZE = args.batch_size
+    if args.pages_per_task:
+        settings.PDF_PAGES_PER_TASK = args.pages_per_task
+    if args.extraction_processes:
+        settings.EXTRACTION_PROCESSES = args.extraction_processes
+    if args.embedding == "skip":
+        processor._embed_chunks = _skip_embedding
+
+    embedding_pool = EmbeddingPool(processes=args.processes) if args.embedding == "pool" else None
+
+    fixtures_dir = Path(args.fixtures_dir or tempfile.mkdtemp(prefix="eduscribe_bench_"))
+    fixtures = [
+        build_fixture(fixtures_dir, file_type, args.units, args.sentences)
+        for file_type in args.types
+    ]
+    print(f"📁 Fixtures in {fixtures_dir}: {', '.join(f.name for f in fixtures)}")
+
+    # Load the model (and any worker processes) outside the timed runs
+    if args.embedding == "model":
+        processor.get_embedder()
+    elif embedding_pool is not None:
+        await embedding_pool.embed(["warm up"])
+
+    rows = []
+    try:
+        for path in fixtures:
+            for _ in range(args.repeat):
+                # A fresh store per run, so identical fixtures are never deduplicated
+                rows.append(await run_once(path, embedding_pool, args.memory))
+    finally:
+        if embedding_pool is not None:
+            embedding_pool.shutdown()
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows)
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark document ingestion by file type")
+    parser.add_argument("--types", nargs="+", default=list(WRITERS), choices=list(WRITERS))
+    parser.add_argument("--units", type=int, default=100,
+                        help="Pages / slides / paragraphs per fixture")
+    parser.add_argument("--sentences", type=int, default=20, help="Sentences per unit")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--embedding", choices=["model", "pool", "skip"], default="model",
+                        help="In-process model, multi-process pool, or zero vectors")
+    parser.add_argument("--processes", type=int, default=None, help="Embedding pool processes")
+    parser.add_argument("--batch-size", type=int, default=None, help="EMBEDDING_BATCH_SIZE")
+    parser.add_argument("--pages-per-task", type=int, default=None, help="PDF_PAGES_PER_TASK")
+    parser.add_argument("--extraction-processes", type=int, default=None, help="EXTRACTION_PROCESSES")
+    parser.add_argument("--memory", action="store_true",
+                        help="Trace Python peak memory with tracemalloc (slows the run)")
+    parser.add_argument("--fixtures-dir", default=None, help="Where to write fixtures (default: temp dir)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
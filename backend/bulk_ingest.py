@@ -0,0 +1,161 @@
+"""
+Bulk-ingest a directory of course materials into a subject
+Each sub-directory becomes a lecture (files at the top level go into a
+"<subject> materials" lecture); embeddings run on a multi-process pool.
+
+Usage:
+    python bulk_ingest.py ./materials --user-id USER --subject-id SUBJECT
+    python bulk_ingest.py ./materials --user-id USER --subject-name "Algorithms" --subject-code CS301
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bson import ObjectId
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.core.config import settings
+from app.services.document_processor_mongodb import is_supported_document, process_document
+from app.services.embedding_pool import EmbeddingPool
+from app.services.upload_storage import store_file_content_addressed
+from database.mongodb_connection import init_mongodb, close_mongodb, setup_indexes, get_db, create_lecture
+from database.subject_functions import create_subject, get_subject_by_id
+
+
+def collect_files(root: Path) -> Dict[str, List[Path]]:
+    """Supported files grouped by their top-level sub-directory ("" for the root)."""
+    groups = defaultdict(list)
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.name.startswith(".") or not is_supported_document(path.name):
+            continue
+        relative = path.relative_to(root)
+        group = relative.parts[0] if len(relative.parts) > 1 else ""
+        groups[group].append(path)
+    return groups
+
+
+async def get_or_create_lecture(user_id: str, subject_id: str, title: str) -> str:
+    """Reuse a lecture with the same title so re-runs add to it."""
+    db = get_db()
+    lecture = await db.lectures.find_one({"user_id": user_id, "subject_id": subject_id, "title": title})
+    if lecture:
+        return str(lecture["_id"])
+
+    lecture_id = await create_lecture(user_id, subject_id, title)
+    # Materials-only lectures have no recording to wait for
+    await db.lectures.update_one(
+        {"_id": ObjectId(lecture_id)},
+        {"$set": {"status": "completed", "metadata.source": "bulk_ingest"}}
+    )
+    return lecture_id
+
+
+async def ingest_file(path: Path, lecture_id: str, pool: EmbeddingPool,
+                      semaphore: asyncio.Semaphore, stats: Dict) -> None:
+    async with semaphore:
+        loop = asyncio.get_event_loop()
+        try:
+            stored_path, content_hash, file_size = await loop.run_in_executor(
+                None, store_file_content_addressed, str(path)
+            )
+            result = await process_document(
+                file_path=str(stored_path),
+                lecture_id=lecture_id,
+                filename=path.name,
+                content_hash=content_hash,
+                file_size=file_size,
+                embedding_pool=pool
+            )
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+
+        if result.get("success"):
+            stats["succeeded"] += 1
+            stats["chunks"] += result["chunk_count"]
+            stats["deduplicated"] += int(result["deduplicated"])
+        else:
+            stats["failed"] += 1
+            print(f"❌ {path}: {result.get('error')}")
+
+        done = stats["succeeded"] + stats["failed"]
+        print(f"📊 {done}/{stats['total']} files ({stats['chunks']} chunks)")
+
+
+async def bulk_ingest(args) -> int:
+    root = Path(args.directory)
+    if not root.is_dir():
+        print(f"❌ Not a directory: {root}")
+        return 1
+
+    init_mongodb()
+    await setup_indexes()
+    db = get_db()
+
+    if args.subject_id:
+        subject = await get_subject_by_id(db, args.subject_id, args.user_id)
+        if not subject:
+            print(f"❌ Subject {args.subject_id} not found for user {args.user_id}")
+            return 1
+    else:
+        subject = await create_subject(db, args.user_id, args.subject_name, args.subject_code)
+        print(f"✅ Created subject {subject['name']} ({subject['_id']})")
+
+    groups = collect_files(root)
+    total = sum(len(files) for files in groups.values())
+    if not total:
+        print(f"⚠️  No supported documents under {root}")
+        return 0
+
+    pool = EmbeddingPool(processes=args.processes)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    stats = {"total": total, "succeeded": 0, "failed": 0, "deduplicated": 0, "chunks": 0}
+    start = time.time()
+
+    try:
+        tasks = []
+        for group, files in groups.items():
+            title = group or f"{subject['name']} materials"
+            lecture_id = await get_or_create_lecture(args.user_id, subject["_id"], title)
+            print(f"📚 {title}: {len(files)} files -> lecture {lecture_id}")
+            tasks.extend(ingest_file(path, lecture_id, pool, semaphore, stats) for path in files)
+
+        await asyncio.gather(*tasks)
+    finally:
+        pool.shutdown()
+        close_mongodb()
+
+    elapsed = time.time() - start
+    print(f"✅ Ingested {stats['succeeded']}/{total} files into {subject['name']} in {elapsed:.1f}s "
+          f"({stats['deduplicated']} deduplicated, {stats['chunks']} chunks, "
+          f"{stats['chunks'] / elapsed if elapsed else 0:.1f} chunks/s)")
+    return 1 if stats["failed"] else 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk-ingest course materials into a subject")
+    parser.add_argument("directory", help="Directory tree of PDF / PPTX / DOCX / TXT files")
+    parser.add_argument("--user-id", required=True, help="Owner of the subject")
+    parser.add_argument("--subject-id", help="Existing subject to ingest into")
+    parser.add_argument("--subject-name", help="Name of a new subject to create")
+    parser.add_argument("--subject-code", default="", help="Code of the new subject")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Embedding worker processes (default: EMBEDDING_PROCESSES or half the CPUs)")
+    parser.add_argument("--concurrency", type=int, default=settings.INGESTION_WORKERS * 2,
+                        help="Documents extracted and chunked at the same time")
+    args = parser.parse_args()
+
+    if not args.subject_id and not args.subject_name:
+        parser.error("one of --subject-id or --subject-name is required")
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(bulk_ingest(parse_args())))
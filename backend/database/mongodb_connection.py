@@ -3,10 +3,12 @@ MongoDB Atlas connection with Vector Search support
 Much simpler than PostgreSQL + pgvector!
 """
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import MongoClient, ASCENDING, DESCENDING
-from typing import Optional, List, Dict, Any
+from pymongo import MongoClient, ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
+from typing import Optional, List, Dict, Any, Tuple
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 import time
 from app.core.config import settings
@@ -78,12 +80,24 @@ async def setup_indexes():
     await db.lectures.create_index([("status", ASCENDING)])
     await db.lectures.create_index([("created_at", DESCENDING)])
     
-    # Documents collection
+    # Documents collection (per-lecture references to shared content)
     await db.documents.create_index([("lecture_id", ASCENDING)])
+    await db.documents.create_index([("lecture_id", ASCENDING), ("content_hash", ASCENDING)])
+    await db.documents.create_index([("content_hash", ASCENDING)])
     
     # Document embeddings collection (for vector search)
     await db.document_embeddings.create_index([("lecture_id", ASCENDING)])
     await db.document_embeddings.create_index([("document_id", ASCENDING)])
+    await db.document_embeddings.create_index([("document_id", ASCENDING), ("chunk_index", ASCENDING)])
+    
+    # Extracted page text of shared content
+    await db.document_pages.create_index([("content_hash", ASCENDING), ("page_number", ASCENDING)])
+    
+    # Lexical (BM25) index collection, postings sharded by chunk range
+    if "document_id_1" in await db.lexical_index.index_information():
+        # Unique per-document index of the unsharded layout
+        await db.lexical_index.drop_index("document_id_1")
+    await db.lexical_index.create_index([("document_id", ASCENDING), ("shard", ASCENDING)], unique=True)
     
     # Transcriptions collection
     await db.transcriptions.create_index([("lecture_id", ASCENDING)])
@@ -96,6 +110,17 @@ async def setup_indexes():
     # Final notes collection
     await db.final_notes.create_index([("lecture_id", ASCENDING)], unique=True)
     
+    # LLM response cache (entries expire after LLM_CACHE_TTL)
+    await db.llm_cache.create_index([("created_at", ASCENDING)], expireAfterSeconds=settings.LLM_CACHE_TTL)
+    
+    # LLM usage (daily token totals per lecture, user, stage, model and outcome)
+    await db.llm_usage.create_index(
+        [("day", ASCENDING), ("lecture_id", ASCENDING), ("user_id", ASCENDING),
+         ("stage", ASCENDING), ("model", ASCENDING), ("outcome", ASCENDING)],
+        unique=True
+    )
+    await db.llm_usage.create_index([("user_id", ASCENDING), ("day", ASCENDING)])
+    
     print("✅ MongoDB indexes created successfully!")
 
 # Vector Search Setup (Atlas Search Index)
@@ -171,6 +196,180 @@ async def save_document(lecture_id: str, filename: str, file_type: str,
     result = await db.documents.insert_one(document)
     return str(result.inserted_id)
 
+# Content-addressed document storage
+# Extracted text, embeddings and BM25 postings are stored once per SHA-256
+# content hash (used as their document_id); lectures link to them by reference.
+
+async def get_document_content(content_hash: str) -> Optional[Dict]:
+    """Get shared document content by its hash"""
+    db = get_db()
+    return await db.document_contents.find_one({"_id": content_hash})
+
+async def claim_document_content(content_hash: str, owner: str) -> bool:
+    """
+    Atomically claim unprocessed content for ingestion.
+
+    Succeeds when the content is new, or not processed and not claimed by
+    another ingester (or its claim expired). Claims are shared by every
+    process using the database (server, bulk_ingest).
+    """
+    db = get_db()
+    now = datetime.utcnow()
+    
+    try:
+        await db.document_contents.update_one(
+            {
+                "_id": content_hash,
+                "processed": {"$ne": True},
+                "$or": [
+                    {"claimed_by": None},
+                    {"claimed_by": owner},
+                    {"claim_expires_at": {"$lt": now}}
+                ]
+            },
+            {
+                "$set": {
+                    "claimed_by": owner,
+                    "claim_expires_at": now + timedelta(seconds=settings.CONTENT_CLAIM_SECONDS)
+                },
+                "$setOnInsert": {
+                    "text_length": 0,
+                    "page_count": 0,
+                    "chunk_count": 0,
+                    "processed": False,
+                    "created_at": now
+                }
+            },
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # Processed, or claimed by someone else (the upsert hit the existing _id)
+        return False
+
+async def renew_document_content_claim(content_hash: str, owner: str) -> None:
+    """Extend a held claim while ingestion is still running"""
+    db = get_db()
+    
+    await db.document_contents.update_one(
+        {"_id": content_hash, "claimed_by": owner},
+        {"$set": {"claim_expires_at": datetime.utcnow() + timedelta(seconds=settings.CONTENT_CLAIM_SECONDS)}}
+    )
+
+async def release_document_content_claim(content_hash: str, owner: str) -> None:
+    """Give up a claim (after ingestion finished or failed)"""
+    db = get_db()
+    
+    await db.document_contents.update_one(
+        {"_id": content_hash, "claimed_by": owner},
+        {"$unset": {"claimed_by": "", "claim_expires_at": ""}}
+    )
+
+async def save_document_content(content_hash: str, file_type: str) -> None:
+    """Record the type of claimed content before its pages are streamed in"""
+    db = get_db()
+    
+    await db.document_contents.update_one(
+        {"_id": content_hash},
+        {"$set": {"file_type": file_type}}
+    )
+
+async def save_document_pages(content_hash: str, pages: List[Tuple[int, str]]) -> None:
+    """Save extracted page / slide text for shared content"""
+    if not pages:
+        return
+    db = get_db()
+    
+    await db.document_pages.insert_many([
+        {
+            "content_hash": content_hash,
+            "page_number": page_number,
+            "text": text
+        }
+        for page_number, text in pages
+    ])
+
+async def clear_document_content_chunks(content_hash: str) -> None:
+    """Remove pages, embeddings and postings left by an interrupted ingestion"""
+    db = get_db()
+    
+    await db.document_pages.delete_many({"content_hash": content_hash})
+    await db.document_embeddings.delete_many({"document_id": content_hash})
+    await db.lexical_index.delete_many({"document_id": content_hash})
+
+async def mark_document_content_processed(content_hash: str, chunk_count: int,
+                                          text_length: int, page_count: int) -> None:
+    """Mark shared content as fully embedded and indexed"""
+    db = get_db()
+    
+    await db.document_contents.update_one(
+        {"_id": content_hash},
+        {"$set": {
+            "chunk_count": chunk_count,
+            "text_length": text_length,
+            "page_count": page_count,
+            "processed": True,
+            "processed_at": datetime.utcnow()
+        }}
+    )
+
+async def link_document(lecture_id: str, filename: str, file_type: str,
+                        file_path: str, content_hash: str, file_size: int) -> str:
+    """Link a lecture to shared document content (one link per lecture and hash)"""
+    db = get_db()
+    
+    result = await db.documents.update_one(
+        {"lecture_id": lecture_id, "content_hash": content_hash},
+        {
+            "$set": {
+                "filename": filename,
+                "file_type": file_type,
+                "file_path": file_path,
+                "file_size": file_size,
+                "processed": True,
+                "processed_at": datetime.utcnow()
+            },
+            "$setOnInsert": {
+                "metadata": {},
+                "upload_date": datetime.utcnow()
+            }
+        },
+        upsert=True
+    )
+    
+    if result.upserted_id:
+        return str(result.upserted_id)
+    
+    existing = await db.documents.find_one(
+        {"lecture_id": lecture_id, "content_hash": content_hash},
+        {"_id": 1}
+    )
+    return str(existing["_id"])
+
+async def get_lecture_content_hashes(lecture_id: str) -> List[str]:
+    """Content hashes of all documents linked to a lecture"""
+    db = get_db()
+    return await db.documents.distinct(
+        "content_hash",
+        {"lecture_id": lecture_id, "content_hash": {"$exists": True}}
+    )
+
+def lecture_scope_filter(lecture_id: str, content_hashes: List[str]) -> Dict[str, Any]:
+    """Match chunks owned by a lecture (legacy rows) or linked to it by content hash"""
+    if not content_hashes:
+        return {"lecture_id": lecture_id}
+    return {"$or": [
+        {"lecture_id": lecture_id},
+        {"document_id": {"$in": content_hashes}}
+    ]}
+
+def _candidate_filter(candidates: Dict[str, List[int]]) -> Dict[str, Any]:
+    """Match specific chunks given as {document_id: [chunk_index, ...]}"""
+    return {"$or": [
+        {"document_id": document_id, "chunk_index": {"$in": chunk_indexes}}
+        for document_id, chunk_indexes in candidates.items()
+    ]}
+
 async def save_document_embeddings(embeddings_data: List[Dict[str, Any]]) -> None:
     """
     Save document chunks with embeddings for vector search
@@ -178,8 +377,8 @@ async def save_document_embeddings(embeddings_data: List[Dict[str, Any]]) -> Non
     embeddings_data format:
     [
         {
-            'lecture_id': '...',
-            'document_id': '...',
+            'lecture_id': '...',        # optional (legacy per-lecture rows)
+            'document_id': '...',       # content hash for shared content
             'chunk_text': 'text content',
             'chunk_index': 0,
             'embedding': np.array([...])  # 384-dim vector
@@ -193,7 +392,6 @@ async def save_document_embeddings(embeddings_data: List[Dict[str, Any]]) -> Non
     documents = []
     for item in embeddings_data:
         doc = {
-            "lecture_id": item['lecture_id'],
             "document_id": item['document_id'],
             "chunk_text": item['chunk_text'],
             "chunk_index": item['chunk_index'],
@@ -201,27 +399,18 @@ async def save_document_embeddings(embeddings_data: List[Dict[str, Any]]) -> Non
             "metadata": item.get('metadata', {}),
             "created_at": datetime.utcnow()
         }
+        if item.get('lecture_id'):
+            doc["lecture_id"] = item['lecture_id']
         documents.append(doc)
     
     if documents:
         await db.document_embeddings.insert_many(documents)
         print(f"✅ Saved {len(documents)} document embeddings")
 
-async def vector_search(query_embedding: np.ndarray, lecture_id: str, 
-                       top_k: int = 10) -> List[Dict]:
-    """
-    Perform vector similarity search using MongoDB Atlas Vector Search
-    
-    NOTE: Requires Atlas Search Index to be created first!
-    See create_vector_search_index_config() for setup instructions.
-    """
-    db = get_db()
-    
-    # Convert numpy array to list
-    query_vector = query_embedding.tolist() if isinstance(query_embedding, np.ndarray) else query_embedding
-    
-    # MongoDB Atlas Vector Search aggregation pipeline
-    pipeline = [
+def _vector_search_pipeline(query_vector: List[float], lecture_id: str,
+                            content_hashes: List[str], top_k: int) -> List[Dict]:
+    """Atlas Vector Search aggregation pipeline (shared by vector_search and its probe)"""
+    return [
         {
             "$search": {
                 "index": "vector_search",  # Name of your Atlas Search index
@@ -230,7 +419,13 @@ async def vector_search(query_embedding: np.ndarray, lecture_id: str,
                     "path": "embedding",
                     "k": top_k,
                     "filter": {
-                        "lecture_id": lecture_id
+                        "compound": {
+                            "should": [
+                                {"text": {"path": "lecture_id", "query": lecture_id}},
+                                {"text": {"path": "document_id", "query": content_hashes or [lecture_id]}}
+                            ],
+                            "minimumShouldMatch": 1
+                        }
                     }
                 }
             }
@@ -241,6 +436,7 @@ async def vector_search(query_embedding: np.ndarray, lecture_id: str,
                 "chunk_text": 1,
                 "document_id": 1,
                 "chunk_index": 1,
+                "metadata": 1,
                 "score": {"$meta": "searchScore"}
             }
         },
@@ -248,6 +444,25 @@ async def vector_search(query_embedding: np.ndarray, lecture_id: str,
             "$limit": top_k
         }
     ]
+
+async def vector_search(query_embedding: np.ndarray, lecture_id: str, 
+                       top_k: int = 10,
+                       content_hashes: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Perform vector similarity search using MongoDB Atlas Vector Search
+    
+    NOTE: Requires Atlas Search Index to be created first!
+    See create_vector_search_index_config() for setup instructions.
+    """
+    db = get_db()
+    
+    if content_hashes is None:
+        content_hashes = await get_lecture_content_hashes(lecture_id)
+    
+    # Convert numpy array to list
+    query_vector = query_embedding.tolist() if isinstance(query_embedding, np.ndarray) else query_embedding
+    
+    pipeline = _vector_search_pipeline(query_vector, lecture_id, content_hashes, top_k)
     
     results = []
     async for doc in db.document_embeddings.aggregate(pipeline):
@@ -255,22 +470,60 @@ async def vector_search(query_embedding: np.ndarray, lecture_id: str,
             "chunk_id": str(doc["_id"]),
             "chunk_text": doc["chunk_text"],
             "similarity": doc["score"],
-            "document_id": doc["document_id"]
+            "document_id": doc["document_id"],
+            "chunk_index": doc.get("chunk_index"),
+            "metadata": doc.get("metadata", {})
         })
     
     return results
 
+async def probe_vector_search() -> bool:
+    """
+    Check whether the Atlas "vector_search" index is usable.
+
+    Sends one tiny vector_search query that matches nothing; any server error
+    (no Atlas, missing index) means the backend is unavailable.
+    """
+    db = get_db()
+
+    probe_vector = [0.0] * 384
+    probe_vector[0] = 1.0
+
+    # Same query and filter shape as vector_search, so a passing probe
+    # means real queries work too
+    pipeline = _vector_search_pipeline(probe_vector, "__probe__", ["__probe__"], 1)
+
+    try:
+        async for _ in db.document_embeddings.aggregate(pipeline):
+            pass
+        return True
+    except Exception as e:
+        print(f"⚠️  Atlas Vector Search probe failed: {e}")
+        return False
+
 # Fallback: Simple cosine similarity (if Atlas Search not available)
 async def simple_vector_search(query_embedding: np.ndarray, lecture_id: str, 
-                              top_k: int = 10) -> List[Dict]:
+                              top_k: int = 10,
+                              candidates: Optional[Dict[str, List[int]]] = None,
+                              content_hashes: Optional[List[str]] = None) -> List[Dict]:
     """
     Fallback vector search using simple cosine similarity
     Use this if Atlas Search index is not set up yet
+    
+    candidates optionally restricts scoring to {document_id: [chunk_index, ...]}
+    (e.g. a lexical pre-filter), so only those embeddings are loaded.
     """
     db = get_db()
     
-    # Get all embeddings for this lecture
-    cursor = db.document_embeddings.find({"lecture_id": lecture_id})
+    if candidates:
+        query = _candidate_filter(candidates)
+    else:
+        if content_hashes is None:
+            content_hashes = await get_lecture_content_hashes(lecture_id)
+        query = lecture_scope_filter(lecture_id, content_hashes)
+    
+    # Get all (candidate) embeddings for this lecture
+    cursor = db.document_embeddings.find(query)
     
     results = []
     async for doc in cursor:
@@ -284,13 +537,160 @@ async def simple_vector_search(query_embedding: np.ndarray, lecture_id: str,
             "chunk_id": str(doc["_id"]),
             "chunk_text": doc["chunk_text"],
             "similarity": float(similarity),
-            "document_id": doc["document_id"]
+            "document_id": doc["document_id"],
+            "chunk_index": doc.get("chunk_index"),
+            "metadata": doc.get("metadata", {})
         })
     
     # Sort by similarity and return top_k
     results.sort(key=lambda x: x['similarity'], reverse=True)
     return results[:top_k]
 
+async def get_chunks(keys: List[tuple]) -> Dict[tuple, Dict]:
+    """Fetch chunks (text and metadata) for (document_id, chunk_index) keys"""
+    if not keys:
+        return {}
+    
+    db = get_db()
+    
+    by_document: Dict[str, List[int]] = {}
+    for document_id, chunk_index in keys:
+        by_document.setdefault(document_id, []).append(chunk_index)
+    
+    cursor = db.document_embeddings.find(
+        _candidate_filter(by_document),
+        {"document_id": 1, "chunk_index": 1, "chunk_text": 1, "metadata": 1}
+    )
+    
+    chunks = {}
+    async for doc in cursor:
+        chunks[(doc["document_id"], doc["chunk_index"])] = {
+            "chunk_id": str(doc["_id"]),
+            "chunk_text": doc["chunk_text"],
+            "document_id": doc["document_id"],
+            "chunk_index": doc["chunk_index"],
+            "metadata": doc.get("metadata", {})
+        }
+    return chunks
+
+async def save_lexical_index(document_id: str, shards: List[Dict[str, Any]]) -> None:
+    """Save a document's BM25 postings next to its embeddings, one entry per shard"""
+    db = get_db()
+    
+    await db.lexical_index.delete_many({"document_id": document_id})
+    if not shards:
+        return
+    created_at = datetime.utcnow()
+    await db.lexical_index.insert_many([
+        {
+            "document_id": document_id,
+            "shard": shard["shard"],
+            "chunk_start": shard["chunk_start"],
+            "chunk_lengths": shard["chunk_lengths"],
+            "postings": shard["postings"],
+            "created_at": created_at
+        }
+        for shard in shards
+    ])
+
+async def get_lexical_indexes(lecture_id: str,
+                              content_hashes: Optional[List[str]] = None) -> List[Dict]:
+    """Get the BM25 postings shards of every document linked to a lecture"""
+    db = get_db()
+    
+    if content_hashes is None:
+        content_hashes = await get_lecture_content_hashes(lecture_id)
+    if not content_hashes:
+        return []
+    
+    return await db.lexical_index.find(
+        {"document_id": {"$in": content_hashes}}
+    ).to_list(length=None)
+
+# LLM response cache (keyed by a hash of model, parameters and messages)
+
+async def get_llm_cache_entry(key: str) -> Optional[str]:
+    """Get a cached LLM response that has not expired"""
+    db = get_db()
+    
+    entry = await db.llm_cache.find_one({
+        "_id": key,
+        "created_at": {"$gte": datetime.utcnow() - timedelta(seconds=settings.LLM_CACHE_TTL)}
+    })
+    return entry["response"] if entry else None
+
+async def save_llm_cache_entry(key: str, model: str, response: str) -> None:
+    """Store an LLM response under its cache key"""
+    db = get_db()
+    
+    await db.llm_cache.update_one(
+        {"_id": key},
+        {"$set": {
+            "model": model,
+            "response": response,
+            "created_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
+
+# LLM usage accounting
+
+USAGE_KEY_FIELDS = ("day", "lecture_id", "user_id", "stage", "model", "outcome")
+USAGE_SUM_FIELDS = ("calls", "prompt_tokens", "completion_tokens", "latency_seconds")
+
+async def save_llm_usage(rows: List[Dict[str, Any]]) -> None:
+    """Add aggregated usage rows to the daily totals (one bulk write)"""
+    if not rows:
+        return
+    db = get_db()
+    
+    await db.llm_usage.bulk_write([
+        UpdateOne(
+            {field: row[field] for field in USAGE_KEY_FIELDS},
+            {
+                "$inc": {field: row[field] for field in USAGE_SUM_FIELDS},
+                "$set": {"updated_at": datetime.utcnow()}
+            },
+            upsert=True
+        )
+        for row in rows
+    ], ordered=False)
+
+async def get_llm_usage_summary(group_by: str, since_day: str) -> List[Dict[str, Any]]:
+    """Usage totals since a day (YYYY-MM-DD), grouped by one key field, biggest first"""
+    db = get_db()
+    
+    pipeline = [
+        {"$match": {"day": {"$gte": since_day}}},
+        {"$group": {
+            "_id": f"${group_by}",
+            **{field: {"$sum": f"${field}"} for field in USAGE_SUM_FIELDS}
+        }},
+        {"$addFields": {"total_tokens": {"$add": ["$prompt_tokens", "$completion_tokens"]}}},
+        {"$sort": {"total_tokens": -1}}
+    ]
+    return await db.llm_usage.aggregate(pipeline).to_list(length=None)
+
+async def get_user_llm_tokens(user_id: str, day: str) -> int:
+    """Prompt + completion tokens a user has used on a day"""
+    db = get_db()
+    
+    result = await db.llm_usage.aggregate([
+        {"$match": {"user_id": user_id, "day": day}},
+        {"$group": {"_id": None, "tokens": {"$sum": {"$add": ["$prompt_tokens", "$completion_tokens"]}}}}
+    ]).to_list(length=1)
+    return int(result[0]["tokens"]) if result else 0
+
+async def get_lecture_owner(lecture_id: str) -> Optional[str]:
+    """user_id of the lecture's owner, if the lecture exists"""
+    # Lectures are stored under ObjectIds; offline ids ("lecture-<time>") have no owner
+    if not ObjectId.is_valid(lecture_id):
+        return None
+    db = get_db()
+    
+    lecture = await db.lectures.find_one({"_id": ObjectId(lecture_id)}, {"user_id": 1})
+    return lecture.get("user_id") if lecture else None
+
 async def save_transcription(lecture_id: str, chunk_index: int, text: str,
                             enhanced_notes: str, timestamp: str, 
                             importance: float) -> str:
@@ -425,7 +825,9 @@ async def get_lecture_stats(lecture_id: str) -> Dict:
         "transcription_count": await db.transcriptions.count_documents({"lecture_id": lecture_id}),
         "structured_notes_count": await db.structured_notes.count_documents({"lecture_id": lecture_id}),
         "document_count": await db.documents.count_documents({"lecture_id": lecture_id}),
-        "embedding_count": await db.document_embeddings.count_documents({"lecture_id": lecture_id}),
+        "embedding_count": await db.document_embeddings.count_documents(
+            lecture_scope_filter(lecture_id, await get_lecture_content_hashes(lecture_id))
+        ),
         "has_final_notes": await db.final_notes.count_documents({"lecture_id": lecture_id}) > 0
     }
     
@@ -0,0 +1,346 @@
+"""
+Offline LLM stand-in server for EduScribe
+Speaks the Groq / OpenAI chat-completions API (JSON and SSE streaming) with
+configurable latency, streaming speed and scripted errors, and answers
+every note-pipeline prompt with deterministic canned output, so the real
+code paths (not the _fallback_* ones) can be load-tested without a key.
+
+Usage (from backend/):
+    python mock_llm_server.py --port 8090 --latency-ms 400 --tokens-per-second 250
+    python mock_llm_server.py --script 200,429,200,500 --error-rates 429=0.05,503=0.01
+    LLM_BASE_URL=http://localhost:8090 python optimized_main.py
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Same heuristic as the app's prompt budget fallback
+CHARS_PER_TOKEN = 4
+
+_FALLBACK_VOCABULARY = (
+    "algorithm gradient descent convergence matrix vector eigenvalue probability "
+    "distribution variance regression training validation overfitting network "
+    "activation optimization graph vertex traversal complexity recursion memory"
+).split()
+
+_STOPWORDS = set(
+    "about above after again because before being below between could does doing during "
+    "having other should their there these those through under until which while would "
+    "notes lecture transcription chunk chunks context document previous return create "
+    "points bullet bullets words format rules output section sections title markdown headers "
+    "subheaders organized structured errors write clear whole object number exactly terms "
+    "english grammar issues intended speaker proper wrong repeat accuracy applicable "
+    "concise include formulas fluff focus extract definitions sentence maximum".split()
+)
+
+ERROR_MESSAGES = {
+    400: ("invalid_request_error", "Bad request"),
+    413: ("invalid_request_error", "Request Entity Too Large"),
+    429: ("rate_limit_exceeded", "Rate limit reached for model (tokens per minute). Please try again later."),
+    500: ("internal_server_error", "Internal server error"),
+    502: ("bad_gateway", "Bad gateway"),
+    503: ("service_unavailable", "Service unavailable"),
+}
+
+
+class MockConfig:
+    """Behaviour of the stand-in server"""
+
+    def __init__(self, latency_ms: float = 300.0, latency_jitter_ms: float = 100.0,
+                 latency_dist: str = "normal", tokens_per_second: float = 200.0,
+                 script: Optional[List[int]] = None, error_rates: Optional[Dict[int, float]] = None,
+                 retry_after: float = 1.0, max_prompt_tokens: Optional[int] = None, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.latency_dist = latency_dist
+        self.tokens_per_second = tokens_per_second
+        self.script = script or []
+        self.error_rates = error_rates or {}
+        self.retry_after = retry_after
+        self.max_prompt_tokens = max_prompt_tokens
+        self.seed = seed
+
+
+def _count_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _sample_latency(config: MockConfig, rng: random.Random) -> float:
+    """Time to first token in seconds"""
+    mean = config.latency_ms
+    jitter = config.latency_jitter_ms
+    if config.latency_dist == "fixed" or mean <= 0:
+        value = mean
+    elif config.latency_dist == "uniform":
+        value = rng.uniform(mean - jitter, mean + jitter)
+    elif config.latency_dist == "lognormal":
+        # Long right tail, mean ~ latency_ms
+        sigma = min(jitter / mean, 2.0) if jitter > 0 else 0.5
+        value = mean * rng.lognormvariate(-sigma * sigma / 2, sigma)
+    else:
+        value = rng.gauss(mean, jitter)
+    return max(value, 0.0) / 1000.0
+
+
+# ---------------------------------------------------------------------------
+# Deterministic canned responses
+# ---------------------------------------------------------------------------
+
+def _topic_words(text: str) -> List[str]:
+    words = []
+    seen = set()
+    for word in re.findall(r"[A-Za-z][a-z]{4,}", text):
+        lower = word.lower()
+        if lower not in seen and lower not in _STOPWORDS:
+            seen.add(lower)
+            words.append(lower)
+    return words or list(_FALLBACK_VOCABULARY)
+
+
+def _sentence(rng: random.Random, words: List[str], low: int = 8, high: int = 14) -> str:
+    picked = [rng.choice(words) for _ in range(rng.randint(low, high))]
+    return " ".join(picked).capitalize() + "."
+
+
+def _title(rng: random.Random, words: List[str], count: int = 3) -> str:
+    return " ".join(w.capitalize() for w in rng.sample(words, min(count, len(words))))
+
+
+def _bullets(rng: random.Random, words: List[str], count: int) -> List[str]:
+    return [_sentence(rng, words) for _ in range(count)]
+
+
+def _markdown_notes(rng: random.Random, words: List[str]) -> str:
+    lines = [f"## {_title(rng, words)}", ""]
+    for _ in range(rng.randint(1, 2)):
+        lines.append(f"### {_title(rng, words, 2)}")
+        term = rng.choice(words).capitalize()
+        lines.append(f"- **{term}**: {_sentence(rng, words)}")
+        lines += [f"- {b}" for b in _bullets(rng, words, rng.randint(2, 4))]
+        lines.append("")
+    return "\n".join(lines).strip()
+
+
+def canned_response(messages: List[Dict[str, str]], json_mode: bool, seed: int) -> str:
+    """Deterministic output shaped like what each EduScribe prompt expects"""
+    user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+    rng = random.Random(f"{seed}:{digest}")
+    words = _topic_words(user)
+
+    if "TRANSCRIPTION CHUNKS" in user:
+        # Combined window call (agentic_synthesizer.synthesize_window_notes)
+        match = re.search(r"for each of chunks ([\d, ]+) only", user)
+        numbers = [int(n) for n in re.findall(r"\d+", match.group(1))] if match else []
+        return json.dumps({
+            "chunks": [{"chunk": n, "bullets": _bullets(rng, words, rng.randint(3, 5))} for n in numbers],
+            "structured_notes": _markdown_notes(rng, words)
+        })
+    if "CURRENT LECTURE TITLE" in user:
+        # Running final notes update
+        sections = re.findall(r"^- (.+)$", user.split("CURRENT SECTIONS:", 1)[1].split("CURRENT KEY", 1)[0], re.M)
+        section = rng.choice(sections) if sections and rng.random() < 0.7 else _title(rng, words, 2)
+        return json.dumps({
+            "title": _title(rng, words, 4),
+            "section": section,
+            "bullets": _bullets(rng, words, rng.randint(2, 4)),
+            "glossary": {rng.choice(words).capitalize(): _sentence(rng, words)},
+            "takeaways": _bullets(rng, words, 4)
+        })
+    if "Lecture headings" in user:
+        return json.dumps({
+            "title": _title(rng, words, 4),
+            "sections": [_title(rng, words, 2) for _ in range(rng.randint(2, 4))]
+        })
+    if '"definitions"' in user:
+        match = re.search(r"Define these terms:\n(\[.*?\])", user)
+        terms = json.loads(match.group(1)) if match else []
+        return json.dumps({"definitions": {term: _sentence(rng, words) for term in terms}})
+    if '"takeaways"' in user:
+        return json.dumps({"takeaways": _bullets(rng, words, 4)})
+    if "Raw notes (batch)" in user:
+        return json.dumps({
+            "title": _title(rng, words),
+            "summary": _sentence(rng, words),
+            "subtopics": [{"title": _title(rng, words, 2), "bullets": _bullets(rng, words, 3)}],
+            "key_terms": [rng.choice(words) for _ in range(3)],
+            "key_takeaways": _bullets(rng, words, 2)
+        })
+    if user.startswith("Condense these lecture notes"):
+        headings = re.findall(r"^##\s+(.+)$", user, re.M) or [_title(rng, words)]
+        return "\n\n".join(f"## {h}\n- {_sentence(rng, words)}" for h in dict.fromkeys(headings))
+    if json_mode:
+        return json.dumps({"content": _sentence(rng, words)})
+    if "SPOKEN TRANSCRIPTION" in user or "Point 1" in user:
+        # Per-chunk raw notes / final section bullets
+        return "\n".join(f"- {b}" for b in _bullets(rng, words, rng.randint(3, 5)))
+    return _markdown_notes(rng, words)
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+def create_app(config: MockConfig) -> FastAPI:
+    app = FastAPI(title="EduScribe LLM stand-in")
+    sequence = itertools.count()
+    stats: Counter = Counter()
+    fault_rng = random.Random(config.seed)
+
+    def pick_status(request_number: int, prompt_tokens: int) -> int:
+        if config.max_prompt_tokens and prompt_tokens > config.max_prompt_tokens:
+            return 413
+        if config.script:
+            scripted = config.script[request_number % len(config.script)]
+            if scripted != 200:
+                return scripted
+        roll = fault_rng.random()
+        for status, rate in config.error_rates.items():
+            if roll < rate:
+                return status
+            roll -= rate
+        return 200
+
+    def error_response(status: int) -> JSONResponse:
+        error_type, message = ERROR_MESSAGES.get(status, ("api_error", "Injected error"))
+        headers = {"retry-after": f"{config.retry_after:g}"} if status == 429 else {}
+        return JSONResponse(
+            status_code=status,
+            content={"error": {"message": message, "type": error_type, "code": error_type}},
+            headers=headers
+        )
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        request_number = next(sequence)
+        messages = body.get("messages", [])
+        model = body.get("model", "mock-model")
+        max_tokens = int(body.get("max_tokens") or 1024)
+        json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+        prompt_tokens = sum(_count_tokens(m.get("content", "")) + 4 for m in messages)
+
+        latency_rng = random.Random(f"{config.seed}:latency:{request_number}")
+        await asyncio.sleep(_sample_latency(config, latency_rng))
+
+        status = pick_status(request_number, prompt_tokens)
+        stats[status] += 1
+        if status != 200:
+            return error_response(status)
+
+        text = canned_response(messages, json_mode, config.seed)
+        if not json_mode:
+            text = text[:max_tokens * CHARS_PER_TOKEN]
+        completion_tokens = _count_tokens(text)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+        completion_id = f"chatcmpl-mock-{request_number}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            })
+
+        async def events():
+            def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, **extra) -> str:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                    **extra
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+
+            yield chunk({"role": "assistant", "content": ""})
+            # ~one token per piece, paced at tokens_per_second
+            pieces = re.findall(r"\S+\s*|\s+", text)
+            delay = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+            for piece in pieces:
+                if delay:
+                    await asyncio.sleep(delay * max(_count_tokens(piece), 1))
+                yield chunk({"content": piece})
+            yield chunk({}, "stop", x_groq={"id": completion_id, "usage": usage})
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    # Groq SDK path, and plain OpenAI-style path
+    app.add_api_route("/openai/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+
+    @app.get("/stats")
+    async def get_stats():
+        return {"requests": sum(stats.values()), "by_status": {str(k): v for k, v in stats.items()}}
+
+    return app
+
+
+def _parse_error_rates(value: str) -> Dict[int, float]:
+    rates = {}
+    for item in filter(None, value.split(",")):
+        status, rate = item.split("=")
+        rates[int(status)] = float(rate)
+    return rates
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline Groq/OpenAI-compatible LLM stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Mean time to first token")
+    parser.add_argument("--latency-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--latency-dist", choices=["fixed", "normal", "uniform", "lognormal"], default="normal")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Streaming speed (0 = instant)")
+    parser.add_argument("--script", default="",
+                        help="Statuses applied to requests in order, cycling (e.g. 200,429,200,500)")
+    parser.add_argument("--error-rates", default="",
+                        help="Random error injection, e.g. 429=0.05,503=0.01")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after header on 429s")
+    parser.add_argument("--max-prompt-tokens", type=int, default=None,
+                        help="Reply 413 to larger prompts")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    args = parse_args()
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        latency_dist=args.latency_dist,
+        tokens_per_second=args.tokens_per_second,
+        script=[int(s) for s in args.script.split(",") if s],
+        error_rates=_parse_error_rates(args.error_rates),
+        retry_after=args.retry_after,
+        max_prompt_tokens=args.max_prompt_tokens,
+        seed=args.seed
+    )
+    print(f"🧪 LLM stand-in on http://{args.host}:{args.port} "
+          f"(latency {args.latency_dist} {args.latency_ms:g}ms, {args.tokens_per_second:g} tok/s)")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
@@ -3,8 +3,9 @@ Optimized EduScribe Backend with Agentic Note Synthesis
 - 20-second audio chunks for transcription
 - 60-second synthesis for structured notes
 """
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import json
 import asyncio
 import os
@@ -32,11 +33,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Refuse oversized request bodies before the multipart parser reads them"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        if int(content_length) > settings.MAX_UPLOAD_REQUEST_BYTES:
+            return JSONResponse(status_code=413, content={"detail": "Request body too large"})
+    return await call_next(request)
+
 # Import services
 from app.services.transcribe_whisper import transcribe_local
-from app.services.document_processor_mongodb import query_documents, process_document  # MongoDB version!
-from app.services.agentic_synthesizer import synthesize_structured_notes, detect_topic_shift
+from app.services.document_processor_mongodb import query_documents  # MongoDB version!
+from app.services.ingestion_jobs import ingestion_jobs, public_job_view
+from app.services.agentic_synthesizer import (
+    synthesize_structured_notes,
+    synthesize_window_notes,
+    detect_topic_shift
+)
 from app.services.importance_scorer import score_importance
+from app.services.running_final_notes import RunningFinalNotes
+from app.services.lecture_memory import LectureMemory
+from app.services.transcript_dedup import DuplicateDetector
+from app.core import metrics
+from app.core.config import settings
+from app.services.llm_scheduler import Priority
+from app.services.llm_usage import llm_usage
+from app.services.upload_storage import save_uploads_content_addressed, save_audio_upload
 
 # Initialize MongoDB connection
 from database.mongodb_connection import (
@@ -58,11 +81,35 @@ from app.api.auth import router as auth_router
 from app.api.notes import router as notes_router
 from app.api.subjects_new import router as subjects_router
 from app.api.dashboard import router as dashboard_router
+from app.api.metrics import router as metrics_router
+from app.api.usage import router as usage_router
 
 app.include_router(auth_router)
 app.include_router(notes_router)
 app.include_router(subjects_router)
 app.include_router(dashboard_router)
+app.include_router(metrics_router)
+app.include_router(usage_router)
+
+
+@app.on_event("startup")
+async def probe_retrieval_backend():
+    """Probe vector search capabilities once so queries skip dead backends"""
+    from app.services.vector_search_backend import vector_search_breaker
+    await vector_search_breaker.probe()
+
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    """Close pooled LLM connections"""
+    from app.services.llm_client import llm_client
+    await llm_client.aclose()
+
+
+@app.on_event("shutdown")
+async def flush_llm_usage():
+    """Write token usage not yet flushed"""
+    await llm_usage.flush()
 
 
 class OptimizedAudioProcessor:
@@ -76,6 +123,10 @@ class OptimizedAudioProcessor:
         self.transcription_buffers = defaultdict(list)  # Store transcriptions
         self.last_synthesis_time = defaultdict(float)   # Track synthesis timing
         self.structured_notes_history = defaultdict(list)  # Store generated notes
+        self.running_final_notes: Dict[str, RunningFinalNotes] = {}  # Final notes kept up to date
+        self.lecture_memory: Dict[str, LectureMemory] = {}  # What each lecture has covered (prompt history)
+        self.upgrade_tasks = set()  # Background quality upgrades of live notes
+        self.duplicate_detectors = defaultdict(DuplicateDetector)  # Recent chunks, to reuse notes of repeats
         
         # Processing queues
         self.audio_queues = defaultdict(asyncio.Queue)
@@ -97,11 +148,8 @@ class OptimizedAudioProcessor:
             filename = f"chunk_{lecture_id}_{timestamp}.wav"
             file_path = self.temp_dir / filename
             
-            with open(file_path, "wb") as f:
-                content = await audio_file.read()
-                f.write(content)
-            
-            file_size = len(content)
+            # Streamed to disk in blocks; rejects oversized or non-audio payloads
+            file_size = await save_audio_upload(audio_file, file_path)
             logger.info(f"📥 Received audio chunk for {lecture_id}: {file_size} bytes")
             
             # Add to processing queue
@@ -116,6 +164,8 @@ class OptimizedAudioProcessor:
             
             return {"status": "queued", "size": file_size, "queue_size": queue_size}
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error receiving audio chunk: {e}")
             return {"error": str(e)}
@@ -123,6 +173,7 @@ class OptimizedAudioProcessor:
     async def process_lecture_audio(self, lecture_id: str):
         """Background task to process audio for a lecture"""
         logger.info(f"🎵 Started audio processing task for {lecture_id}")
+        await llm_usage.bind_lecture(lecture_id)
         
         try:
             while True:
@@ -160,19 +211,62 @@ class OptimizedAudioProcessor:
                 self.transcription_buffers[lecture_id].append(transcription_data)
                 
                 # Step 1.5: Generate enhanced notes from transcription using RAG
-                logger.info(f"📝 Generating enhanced notes with document context...")
-                rag_context = await query_documents(transcription_text, lecture_id, top_k=5)
-                
-                from app.services.rag_generator import generate_raw_notes
-                enhanced_notes = await generate_raw_notes(
-                    transcription_text=transcription_text,
-                    context_chunks=rag_context,
-                    lecture_id=lecture_id,
-                    previous_notes=[]  # Can track history if needed
-                )
+                duplicate_of = None
+                if settings.PIPELINE_MODE == "combined":
+                    # Bullets for this chunk come with the window's combined call
+                    enhanced_notes = None
+                else:
+                    duplicate_of = self.duplicate_detectors[lecture_id].find(transcription_text)
+                    if duplicate_of is not None and (
+                        not duplicate_of.get("enhanced_notes") or duplicate_of.get("notes_fallback")
+                    ):
+                        # Never spread fallback notes to repeats
+                        duplicate_of = None
+                
+                if duplicate_of is not None:
+                    # Near-repeat of a recent chunk: reuse its notes, skip retrieval and the LLM
+                    enhanced_notes = duplicate_of["enhanced_notes"]
+                    transcription_data["duplicate_of"] = duplicate_of["chunk_number"]
+                    metrics.increment("notes.duplicate_skips")
+                    llm_usage.record("raw_notes", settings.LLM_MODEL, 0, 0, 0.0, "duplicate")
+                    logger.info(f"♻️  Chunk repeats chunk {duplicate_of['chunk_number']}, reusing its notes")
+                elif settings.PIPELINE_MODE != "combined":
+                    logger.info(f"📝 Generating enhanced notes with document context...")
+                    rag_context = await query_documents(transcription_text, lecture_id, top_k=5)
+                    
+                    from app.services.rag_generator import generate_raw_notes, extractive_raw_notes
+                    memory = self.get_lecture_memory(lecture_id)
+                    previous_notes = list(memory.recent_notes)
+                    lecture_summary = memory.summary()
+                    if settings.LIVE_NOTES_TIERING == "extractive":
+                        # Instant first tier; the quality model upgrades it below
+                        enhanced_notes = extractive_raw_notes(transcription_text)
+                    else:
+                        try:
+                            enhanced_notes = await generate_raw_notes(
+                                transcription_text=transcription_text,
+                                context_chunks=rag_context,
+                                lecture_id=lecture_id,
+                                previous_notes=previous_notes,
+                                lecture_summary=lecture_summary,
+                                model=settings.LLM_FAST_MODEL if settings.LIVE_NOTES_TIERING == "model" else None,
+                                raise_errors=True
+                            )
+                            # Repeats of this chunk may reuse its notes
+                            self.duplicate_detectors[lecture_id].add(transcription_text, transcription_data)
+                        except Exception as notes_error:
+                            logger.warning(f"⚠️  Live notes failed, using transcript bullets: {notes_error}")
+                            metrics.increment("llm.fallbacks")
+                            enhanced_notes = extractive_raw_notes(transcription_text)
+                            transcription_data["notes_fallback"] = True
+                    if settings.LIVE_NOTES_TIERING == "off" and not transcription_data.get("notes_fallback"):
+                        memory.add_live_notes(enhanced_notes)
                 
                 # Save transcription to MongoDB
                 chunk_index = len(self.transcription_buffers[lecture_id]) - 1
+                transcription_data["chunk_index"] = chunk_index
+                transcription_data["chunk_number"] = chunk_index + 1
+                transcription_data["enhanced_notes"] = enhanced_notes
                 
                 # Score importance (pass dict, not string)
                 importance_result = score_importance({
@@ -180,6 +274,7 @@ class OptimizedAudioProcessor:
                     "segments": transcription_result.get("segments", [])
                 })
                 importance = importance_result.get("importance", 0.5)
+                transcription_data["importance"] = importance
                 
                 try:
                     await save_transcription(
@@ -200,11 +295,22 @@ class OptimizedAudioProcessor:
                     "content": transcription_text,
                     "enhanced_notes": enhanced_notes,  # Add enhanced notes
                     "timestamp": chunk_data["timestamp"],
-                    "chunk_number": len(self.transcription_buffers[lecture_id])
+                    "chunk_number": len(self.transcription_buffers[lecture_id]),
+                    "duplicate_of": transcription_data.get("duplicate_of")
                 })
                 
                 logger.info(f"✅ Transcription {len(self.transcription_buffers[lecture_id])}: {transcription_text[:50]}...")
-                logger.info(f"📝 Enhanced notes: {enhanced_notes[:80]}...")
+                if enhanced_notes:
+                    logger.info(f"📝 Enhanced notes: {enhanced_notes[:80]}...")
+                
+                # Tiered live notes: replace the fast version with the quality model's
+                if (settings.PIPELINE_MODE != "combined" and settings.LIVE_NOTES_TIERING != "off"
+                        and duplicate_of is None):
+                    task = asyncio.create_task(self.upgrade_notes(
+                        lecture_id, websocket, transcription_data, rag_context, previous_notes, lecture_summary
+                    ))
+                    self.upgrade_tasks.add(task)
+                    task.add_done_callback(self.upgrade_tasks.discard)
                 
                 # Step 2: Check if it's time to synthesize (every 60 seconds = 3 chunks)
                 buffer_size = len(self.transcription_buffers[lecture_id])
@@ -247,13 +353,83 @@ class OptimizedAudioProcessor:
         except Exception as e:
             logger.error(f"❌ Fatal error in processing task: {e}", exc_info=True)
     
+    async def upgrade_notes(self, lecture_id: str, websocket: WebSocket, transcription: Dict,
+                            rag_context: List[str], previous_notes: List[str], lecture_summary: str):
+        """Regenerate a chunk's live notes with the quality model and replace the fast version"""
+        from app.services.rag_generator import generate_raw_notes
+        started = time.time()
+        try:
+            notes = await generate_raw_notes(
+                transcription_text=transcription["text"],
+                context_chunks=rag_context,
+                lecture_id=lecture_id,
+                previous_notes=previous_notes,
+                lecture_summary=lecture_summary,
+                model=settings.LLM_QUALITY_MODEL,
+                priority=Priority.SYNTHESIS,
+                raise_errors=True,
+                stage="raw_notes_upgrade"
+            )
+        except Exception as e:
+            # The fast version stays
+            logger.warning(f"⚠️  Notes upgrade failed for chunk {transcription['chunk_number']}: {e}")
+            if not transcription.get("notes_fallback"):
+                self.get_lecture_memory(lecture_id).add_live_notes(transcription["enhanced_notes"])
+            return
+        
+        transcription["enhanced_notes"] = notes
+        if transcription.pop("notes_fallback", False) or settings.LIVE_NOTES_TIERING == "extractive":
+            # First LLM notes of this chunk: repeats may reuse them from now on
+            self.duplicate_detectors[lecture_id].add(transcription["text"], transcription)
+        self.get_lecture_memory(lecture_id).add_live_notes(notes)
+        metrics.increment("notes.upgrades")
+        metrics.increment("notes.upgrade_seconds", time.time() - started)
+        
+        try:
+            await save_transcription(
+                lecture_id=lecture_id,
+                chunk_index=transcription["chunk_index"],
+                text=transcription["text"],
+                enhanced_notes=notes,
+                timestamp=transcription["timestamp"],
+                importance=transcription.get("importance", 0.5)
+            )
+        except Exception as db_error:
+            logger.error(f"⚠️  Failed to save upgraded notes to MongoDB: {db_error}")
+        
+        await self.send_delta(websocket, {
+            "type": "notes_upgraded",
+            "enhanced_notes": notes,
+            "timestamp": transcription["timestamp"],
+            "chunk_number": transcription["chunk_number"]
+        })
+    
+    def get_lecture_memory(self, lecture_id: str) -> LectureMemory:
+        if lecture_id not in self.lecture_memory:
+            self.lecture_memory[lecture_id] = LectureMemory(lecture_id)
+        return self.lecture_memory[lecture_id]
+    
+    async def send_delta(self, websocket: WebSocket, message: dict):
+        """Forward a streamed delta; a dropped client must not abort synthesis"""
+        try:
+            await websocket.send_json(message)
+        except Exception:
+            pass
+    
     async def synthesize_notes(self, lecture_id: str, websocket: WebSocket):
         """Synthesize structured notes from accumulated transcriptions"""
+        await llm_usage.bind_lecture(lecture_id)
         try:
             logger.info(f"🤖 Starting agentic synthesis for {lecture_id}")
             
-            # Get transcriptions to synthesize (last 3 chunks = 60 seconds)
-            transcriptions = self.transcription_buffers[lecture_id][-3:]
+            buffer = self.transcription_buffers[lecture_id]
+            if settings.PIPELINE_MODE == "combined":
+                # Every chunk still without bullets, after the last one that has them (context)
+                first_pending = next((i for i, t in enumerate(buffer) if not t.get("enhanced_notes")), len(buffer))
+                transcriptions = buffer[max(first_pending - 1, 0):]
+            else:
+                # Get transcriptions to synthesize (last 3 chunks = 60 seconds)
+                transcriptions = buffer[-3:]
             
             if not transcriptions:
                 return
@@ -262,30 +438,64 @@ class OptimizedAudioProcessor:
             combined_text = " ".join([t["text"] for t in transcriptions])
             rag_context = await query_documents(combined_text, lecture_id, top_k=5)
             
-            # Get previous structured notes for context
+            # Get previous structured notes and what the lecture covered before them
             previous_notes = None
             if self.structured_notes_history[lecture_id]:
                 previous_notes = self.structured_notes_history[lecture_id][-1]
+            memory = self.get_lecture_memory(lecture_id)
             
             # Send "processing" message
+            stream_id = int(time.time() * 1000)
             await websocket.send_json({
                 "type": "synthesis_started",
-                "message": "Generating structured notes..."
+                "message": "Generating structured notes...",
+                "stream_id": stream_id
             })
             
-            # Synthesize structured notes
-            synthesis_result = await synthesize_structured_notes(
-                transcriptions=transcriptions,
-                rag_context=rag_context,
-                lecture_id=lecture_id,
-                previous_structured_notes=previous_notes
-            )
+            async def send_delta(delta: str):
+                await self.send_delta(websocket, {
+                    "type": "structured_notes_delta",
+                    "stream_id": stream_id,
+                    "delta": delta
+                })
+            
+            if settings.PIPELINE_MODE == "combined":
+                # One call for the chunks' bullets and the structured notes
+                synthesis_result = await synthesize_window_notes(
+                    transcriptions=transcriptions,
+                    rag_context=rag_context,
+                    lecture_id=lecture_id,
+                    previous_structured_notes=previous_notes,
+                    lecture_summary=memory.summary()
+                )
+                if synthesis_result["success"]:
+                    await self.send_chunk_notes(
+                        lecture_id, websocket, transcriptions, synthesis_result["chunk_notes"],
+                        synthesis_result["fallback_chunks"]
+                    )
+            else:
+                # Synthesize structured notes (streamed to the client as it is written)
+                synthesis_result = await synthesize_structured_notes(
+                    transcriptions=transcriptions,
+                    rag_context=rag_context,
+                    lecture_id=lecture_id,
+                    previous_structured_notes=previous_notes,
+                    on_delta=send_delta,
+                    lecture_summary=memory.summary()
+                )
             
             if synthesis_result["success"]:
                 structured_notes = synthesis_result["structured_notes"]
                 
                 # Store in history
                 self.structured_notes_history[lecture_id].append(structured_notes)
+                memory.add_structured_notes(structured_notes)
+                
+                # Fold into the running final notes in the background
+                if settings.FINAL_NOTES_MODE == "incremental":
+                    if lecture_id not in self.running_final_notes:
+                        self.running_final_notes[lecture_id] = RunningFinalNotes(lecture_id)
+                    self.running_final_notes[lecture_id].submit(structured_notes, rag_context)
                 
                 # Save structured notes to MongoDB
                 try:
@@ -301,6 +511,7 @@ class OptimizedAudioProcessor:
                 # Send to frontend
                 await websocket.send_json({
                     "type": "structured_notes",
+                    "stream_id": stream_id,
                     "content": structured_notes,
                     "timestamp": int(time.time() * 1000),
                     "transcription_count": len(transcriptions)
@@ -321,8 +532,42 @@ class OptimizedAudioProcessor:
                 "error": str(e)
             })
     
+    async def send_chunk_notes(self, lecture_id: str, websocket: WebSocket,
+                               transcriptions: List[Dict], chunk_notes: Dict[int, str],
+                               fallback_chunks: List[int]):
+        """Persist and send bullets from a combined window call as transcription updates"""
+        for position, notes in chunk_notes.items():
+            transcription = transcriptions[position]
+            transcription["enhanced_notes"] = notes
+            if position in fallback_chunks:
+                transcription["notes_fallback"] = True
+            else:
+                self.get_lecture_memory(lecture_id).add_live_notes(notes)
+            
+            try:
+                await save_transcription(
+                    lecture_id=lecture_id,
+                    chunk_index=transcription["chunk_index"],
+                    text=transcription["text"],
+                    enhanced_notes=notes,
+                    timestamp=transcription["timestamp"],
+                    importance=transcription.get("importance", 0.5)
+                )
+            except Exception as db_error:
+                logger.error(f"⚠️  Failed to save chunk notes to MongoDB: {db_error}")
+            
+            # Same timestamp as the original event, so the client updates that chunk
+            await websocket.send_json({
+                "type": "transcription",
+                "content": transcription["text"],
+                "enhanced_notes": notes,
+                "timestamp": transcription["timestamp"],
+                "chunk_number": transcription["chunk_number"]
+            })
+    
     async def final_synthesis(self, lecture_id: str, websocket: WebSocket):
         """Generate final comprehensive notes from all accumulated structured notes"""
+        await llm_usage.bind_lecture(lecture_id)
         try:
             logger.info(f"🎓 Starting final comprehensive synthesis for {lecture_id}")
             
@@ -339,18 +584,32 @@ class OptimizedAudioProcessor:
                 "message": "Creating comprehensive final notes..."
             })
             
-            # Get RAG context from all transcriptions - use MORE context from PDF
-            all_transcriptions = " ".join([t["text"] for t in self.transcription_buffers[lecture_id]])
-            rag_context = await query_documents(all_transcriptions, lecture_id, top_k=15)  # Increased for more PDF content
+            running_notes = self.running_final_notes.get(lecture_id)
+            if settings.FINAL_NOTES_MODE == "incremental" and running_notes is not None:
+                # Kept up to date during the lecture; only pending windows and assembly remain
+                final_result = await running_notes.finalize()
+            else:
+                # Get RAG context from all transcriptions - use MORE context from PDF
+                all_transcriptions = " ".join([t["text"] for t in self.transcription_buffers[lecture_id]])
+                rag_context = await query_documents(all_transcriptions, lecture_id, top_k=15)  # Increased for more PDF content
             
-            # Import and use final synthesizer
-            from app.services.final_synthesizer import synthesize_final_notes
+                # Import and use final synthesizer
+                from app.services.final_synthesizer import synthesize_final_notes
             
-            final_result = await synthesize_final_notes(
-                lecture_id=lecture_id,
-                structured_notes_list=all_structured_notes,
-                rag_context=rag_context
-            )
+                async def send_section_delta(section: int, title: str, delta: str):
+                    await self.send_delta(websocket, {
+                        "type": "final_notes_delta",
+                        "section": section,
+                        "title": title,
+                        "delta": delta
+                    })
+            
+                final_result = await synthesize_final_notes(
+                    lecture_id=lecture_id,
+                    structured_notes_list=all_structured_notes,
+                    rag_context=rag_context,
+                    on_section_delta=send_section_delta
+                )
             
             if final_result["success"]:
                 # Save final notes to MongoDB
@@ -414,6 +673,9 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
+# Push document ingestion progress to the lecture's WebSocket
+ingestion_jobs.set_notifier(manager.send_message)
+
 
 # API Endpoints
 @app.get("/")
@@ -474,46 +736,39 @@ async def create_lecture_endpoint(data: dict):
 
 @app.post("/api/documents/lecture/{lecture_id}/upload")
 async def upload_documents(lecture_id: str, files: List[UploadFile] = File(...)):
-    """Upload documents for a lecture and process them with MongoDB"""
+    """Upload documents for a lecture; ingestion runs as a background job"""
     try:
-        # Create upload directory
-        upload_dir = Path("storage/uploads") / lecture_id
-        upload_dir.mkdir(parents=True, exist_ok=True)
+        saved_files = []
         
-        processed_files = []
+        # Save files to content-addressed storage (hashed while streaming);
+        # a rejected file stores none of them
+        stored = await save_uploads_content_addressed(files)
         
-        for file in files:
-            # Save file
-            file_path = upload_dir / file.filename
-            with open(file_path, "wb") as f:
-                content = await file.read()
-                f.write(content)
-            
-            logger.info(f"📄 Saved file: {file.filename}")
-            
-            # Process document and store in MongoDB
-            result = await process_document(
-                file_path=str(file_path),
-                lecture_id=lecture_id,
-                filename=file.filename
-            )
+        for file, (file_path, content_hash, file_size) in zip(files, stored):
+            logger.info(f"📄 Saved file: {file.filename} ({content_hash[:12]})")
             
-            processed_files.append({
+            saved_files.append({
                 "filename": file.filename,
-                "status": "success" if result.get("success") else "failed",
-                "document_id": result.get("document_id"),
-                "chunk_count": result.get("chunk_count", 0)
+                "file_path": str(file_path),
+                "content_hash": content_hash,
+                "file_size": file_size
             })
-            
-            logger.info(f"✅ Processed {file.filename}: {result.get('chunk_count', 0)} chunks stored in MongoDB")
+        
+        # Extraction, embedding and indexing happen in the background
+        job = ingestion_jobs.create_job(lecture_id, saved_files)
+        logger.info(f"🗂️  Ingestion job {job['job_id']} queued for {len(saved_files)} files")
         
         return {
-            "message": "Documents uploaded and processed successfully",
+            "message": "Documents uploaded, processing in background",
             "lecture_id": lecture_id,
-            "files": processed_files,
+            "job_id": job["job_id"],
+            "status_url": f"/api/documents/jobs/{job['job_id']}",
+            "files": [{"filename": f["filename"], "content_hash": f["content_hash"]} for f in saved_files],
             "total_files": len(files)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error uploading documents: {e}")
         return {
@@ -522,6 +777,24 @@ async def upload_documents(lecture_id: str, files: List[UploadFile] = File(...))
         }
 
 
+@app.get("/api/documents/jobs/{job_id}")
+async def get_ingestion_job(job_id: str):
+    """Get status and per-file progress of a document ingestion job"""
+    job = ingestion_jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return public_job_view(job)
+
+
+@app.get("/api/documents/lecture/{lecture_id}/jobs")
+async def get_lecture_ingestion_jobs(lecture_id: str):
+    """Get ingestion jobs for a lecture"""
+    return {
+        "lecture_id": lecture_id,
+        "jobs": [public_job_view(job) for job in ingestion_jobs.get_lecture_jobs(lecture_id)]
+    }
+
+
 @app.post("/api/audio/lecture/{lecture_id}/chunk")
 async def receive_audio_chunk(lecture_id: str, audio_file: UploadFile = File(...)):
     """Receive 20-second audio chunk"""
@@ -562,9 +835,12 @@ async def websocket_endpoint(websocket: WebSocket, lecture_id: str):
     
     try:
         # Send connection confirmation
+        # Recording can start while documents are still being ingested
+        active_jobs = ingestion_jobs.get_lecture_jobs(lecture_id, active_only=True)
         await websocket.send_json({
             "type": "connection_confirmed",
-            "message": "WebSocket connected - Ready for optimized audio processing"
+            "message": "WebSocket connected - Ready for optimized audio processing",
+            "pending_ingestion_jobs": [job["job_id"] for job in active_jobs]
         })
         
         # Keep connection alive and handle JSON messages only
@@ -0,0 +1,188 @@
+"""
+Shared fixtures for the backend tests
+Tests run without MongoDB or an LLM: database calls go to an in-memory
+fake that records what was sent, and LLM calls to a scripted provider.
+"""
+import asyncio
+import types
+from typing import Any, Dict, List
+
+import pytest
+
+import app.services.llm_cache as llm_cache_module
+import app.services.llm_client as llm_client_module
+import database.mongodb_connection as mongodb_connection
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_client import LLMClient
+from app.services.llm_resilience import LatencyTracker
+from app.services.llm_scheduler import LLMScheduler
+
+
+class FakeCursor:
+    def __init__(self, docs: List[Dict[str, Any]]):
+        self.docs = docs
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length=None):
+        return self.docs if length is None else self.docs[:length]
+
+
+class FakeCollection:
+    """Records every call; results come from the attributes tests set"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls: List[tuple] = []
+        self.find_one_result = None
+        self.aggregate_result: List[Dict[str, Any]] = []
+        self.aggregate_error = None
+        self.find_result: List[Dict[str, Any]] = []
+        self.update_error = None
+
+    async def find_one(self, *args, **kwargs):
+        self.calls.append(("find_one", args, kwargs))
+        return self.find_one_result
+
+    def find(self, *args, **kwargs):
+        self.calls.append(("find", args, kwargs))
+        return FakeCursor(self.find_result)
+
+    def aggregate(self, pipeline, **kwargs):
+        self.calls.append(("aggregate", (pipeline,), kwargs))
+        if self.aggregate_error:
+            raise self.aggregate_error
+        return FakeCursor(self.aggregate_result)
+
+    async def _write(self, method, *args, **kwargs):
+        self.calls.append((method, args, kwargs))
+        if self.update_error and method == "update_one":
+            raise self.update_error
+
+    async def update_one(self, *args, **kwargs):
+        await self._write("update_one", *args, **kwargs)
+
+    async def insert_many(self, *args, **kwargs):
+        await self._write("insert_many", *args, **kwargs)
+
+    async def delete_many(self, *args, **kwargs):
+        await self._write("delete_many", *args, **kwargs)
+
+    async def bulk_write(self, *args, **kwargs):
+        await self._write("bulk_write", *args, **kwargs)
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections: Dict[str, FakeCollection] = {}
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self.collections.setdefault(name, FakeCollection(name))
+
+
+@pytest.fixture
+def fake_db(monkeypatch) -> FakeDatabase:
+    """In-memory stand-in for get_db()"""
+    db = FakeDatabase()
+    monkeypatch.setattr(mongodb_connection, "get_db", lambda: db)
+    return db
+
+
+class FakeStream:
+    """Streamed response over text, one word per chunk, optionally failing at the end"""
+
+    def __init__(self, text: str, delay: float = 0.0, error: Exception = None):
+        self.words = text.split(" ")
+        self.delay = delay
+        self.error = error
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(self.delay)
+        if not self.words:
+            if self.error is not None:
+                raise self.error
+            raise StopAsyncIteration
+        word = self.words.pop(0)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=word + " "))])
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeProvider:
+    """
+    Chat completions API answering from script, one step per request.
+
+    A step is a string (the response text, streamed word by word when the
+    request asks for a stream) or an exception to raise. Each request
+    first sleeps delay seconds; streams sleep stream_delay before each
+    chunk and raise stream_error (if set) after the text. Opened streams
+    are kept in streams.
+    """
+
+    def __init__(self):
+        self.script: List[Any] = []
+        self.requests: List[Dict[str, Any]] = []
+        self.streams: List[FakeStream] = []
+        self.delay = 0.0
+        self.stream_delay = 0.0
+        self.stream_error = None
+
+    async def create(self, **request):
+        self.requests.append(request)
+        step = self.script.pop(0)
+        await asyncio.sleep(self.delay)
+        if isinstance(step, Exception):
+            raise step
+        if request.get("stream"):
+            self.streams.append(FakeStream(step, self.stream_delay, self.stream_error))
+            return self.streams[-1]
+        return types.SimpleNamespace(
+            usage=types.SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15),
+            choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=f" {step} "))]
+        )
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """
+    A fresh LLMClient on a FakeProvider (as .provider), with its own
+    scheduler, latency statistics and response cache. Usage records
+    land in .usage as (stage, model, prompt, completion, latency, outcome).
+    """
+    client = LLMClient()
+    client.provider = FakeProvider()
+    client.usage = []
+    client._client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=client.provider))
+    client._semaphore = asyncio.Semaphore(2)
+
+    cache_entries: Dict[str, str] = {}
+
+    async def get_llm_cache_entry(key):
+        return cache_entries.get(key)
+
+    async def save_llm_cache_entry(key, model, response):
+        cache_entries[key] = response
+
+    monkeypatch.setattr(LLMClient, "available", property(lambda self: True))
+    monkeypatch.setattr(llm_client_module, "llm_scheduler", LLMScheduler(100_000, 1_000))
+    monkeypatch.setattr(llm_client_module, "latency_tracker", LatencyTracker())
+    monkeypatch.setattr(llm_client_module, "llm_cache", LLMResponseCache(max_entries=10))
+    monkeypatch.setattr(llm_cache_module, "get_llm_cache_entry", get_llm_cache_entry)
+    monkeypatch.setattr(llm_cache_module, "save_llm_cache_entry", save_llm_cache_entry)
+    monkeypatch.setattr(llm_client_module.llm_usage, "record", lambda *args: client.usage.append(args))
+    return client
@@ -0,0 +1,46 @@
+from app.services.chunker import TokenChunker, chunk_pages, split_sentences
+
+
+class WordTokenizer:
+    """One token per word (stands in for the embedding model's tokenizer)"""
+
+    def tokenize(self, text):
+        return text.split()
+
+
+def test_split_sentences_on_ends_and_line_breaks():
+    assert split_sentences("One. Two!  Three?\n- bullet\n\nlast") == ["One.", "Two!", "Three?", "- bullet", "last"]
+
+
+def test_chunks_stay_within_token_limit():
+    text = " ".join(f"Sentence number {n} has six words." for n in range(20))
+    chunks = chunk_pages([(1, text)], WordTokenizer(), max_tokens=20)
+
+    assert all(chunk["token_count"] <= 20 for chunk in chunks)
+    assert all(chunk["token_count"] == len(chunk["text"].split()) for chunk in chunks)
+    assert " ".join(chunk["text"] for chunk in chunks) == text
+
+
+def test_long_sentence_split_on_words():
+    sentence = " ".join(f"w{n}" for n in range(25))
+    chunks = chunk_pages([(1, sentence)], WordTokenizer(), max_tokens=10)
+    assert [chunk["token_count"] for chunk in chunks] == [10, 10, 5]
+
+
+def test_overlap_repeats_trailing_sentences():
+    pages = [(1, "a b c. d e f. g h i. j k l.")]
+    chunks = chunk_pages(pages, WordTokenizer(), max_tokens=6, overlap_tokens=3)
+    assert [chunk["text"] for chunk in chunks] == ["a b c. d e f.", "d e f. g h i.", "g h i. j k l."]
+
+
+def test_page_break_starts_new_chunk_when_half_full():
+    chunker = TokenChunker(WordTokenizer(), max_tokens=10)
+    assert chunker.add_page(1, "one two three four five six.") == []
+    completed = chunker.add_page(2, "seven eight.")
+    assert [(c["page_start"], c["page_end"]) for c in completed] == [(1, 1)]
+    assert [(c["page_start"], c["page_end"]) for c in chunker.finish()] == [(2, 2)]
+
+
+def test_small_pages_are_packed_together():
+    chunks = chunk_pages([(1, "one two."), (2, "three four."), (3, "five.")], WordTokenizer(), max_tokens=10)
+    assert [(c["text"], c["page_start"], c["page_end"]) for c in chunks] == [("one two. three four. five.", 1, 3)]
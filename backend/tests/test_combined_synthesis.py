@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from app.services import agentic_synthesizer
+from app.services.llm_client import LLMClient, llm_client
+
+WINDOW = [
+    {"text": "Last time we defined the loss function for linear regression.", "enhanced_notes": "- Loss function defined"},
+    {"text": "Gradient descent moves the weights against the gradient of the loss function."},
+    {"text": "The learning rate controls how large each gradient descent step is."},
+    {"text": "Too large a learning rate makes the training diverge instead of converging."},
+]
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Available LLM whose chat returns .response (or raises .error); prompts land in .calls"""
+    class FakeLLM:
+        response = None
+        error = None
+        calls = []
+
+    async def chat(messages, **kwargs):
+        FakeLLM.calls.append((messages, kwargs))
+        if FakeLLM.error:
+            raise FakeLLM.error
+        return FakeLLM.response
+    monkeypatch.setattr(LLMClient, "available", property(lambda self: True))
+    monkeypatch.setattr(llm_client, "chat", chat)
+    return FakeLLM
+
+
+async def test_combined_call_covers_every_pending_chunk(llm):
+    llm.response = json.dumps({
+        "chunks": [{"chunk": 2, "bullets": ["Gradient descent follows the negative gradient"]},
+                   {"chunk": 3, "bullets": ["• Learning rate sets the step size"]},
+                   {"chunk": 4, "bullets": ["Large rates diverge"]}],
+        "structured_notes": "## Gradient Descent"
+    })
+    result = await agentic_synthesizer.synthesize_window_notes(WINDOW, [], "lecture")
+
+    assert result["structured_notes"] == "## Gradient Descent"
+    assert result["chunk_notes"] == {
+        1: "- Gradient descent follows the negative gradient",
+        2: "- Learning rate sets the step size",
+        3: "- Large rates diverge",
+    }
+    assert result["fallback_chunks"] == []
+    messages, kwargs = llm.calls[0]
+    assert "2, 3, 4" in messages[1]["content"]
+    assert kwargs["stage"] == "combined"
+
+
+async def test_chunks_missing_from_response_get_extractive_bullets(llm):
+    llm.response = json.dumps({
+        "chunks": [{"chunk": 2, "bullets": ["Gradient descent"]}, {"chunk": 1, "bullets": ["Not pending"]}],
+        "structured_notes": "## Gradient Descent"
+    })
+    result = await agentic_synthesizer.synthesize_window_notes(WINDOW, [], "lecture")
+
+    assert result["fallback_chunks"] == [2, 3]
+    assert 0 not in result["chunk_notes"]
+    assert result["chunk_notes"][1] == "- Gradient descent"
+    assert result["chunk_notes"][2].startswith("- ") and "learning rate" in result["chunk_notes"][2].lower()
+
+
+async def test_failed_call_falls_back_for_every_pending_chunk(llm):
+    llm.error = TimeoutError("LLM timed out")
+    result = await agentic_synthesizer.synthesize_window_notes(WINDOW, [], "lecture")
+
+    assert result["success"] is True
+    assert result["structured_notes"].startswith("## Lecture Notes")
+    assert result["fallback_chunks"] == [1, 2, 3]
+    assert sorted(result["chunk_notes"]) == [1, 2, 3]
+
+
+async def test_unavailable_llm_is_not_called(monkeypatch):
+    monkeypatch.setattr(LLMClient, "available", property(lambda self: False))
+    result = await agentic_synthesizer.synthesize_window_notes(WINDOW[1:], [], "lecture")
+    assert result["fallback_chunks"] == [0, 1, 2]
+
+
+async def test_empty_window():
+    result = await agentic_synthesizer.synthesize_window_notes([{"text": "  "}], [], "lecture")
+    assert result["success"] is False
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+import app.services.context_compressor as context_compressor
+from app.services.context_compressor import SentenceEmbeddingCache, _select, compress_context, split_sentences
+from app.services.prompt_budget import count_tokens
+
+VOCABULARY = ["gradient", "descent", "rate", "pooling", "kernel", "image"]
+
+CHUNKS = [
+    "Gradient descent updates every weight. Pooling layers shrink the image size.",
+    "The kernel slides over the image. The learning rate scales gradient descent steps.",
+]
+
+
+def _embed(text):
+    """Bag-of-words vector over VOCABULARY, normalized"""
+    words = text.lower().split()
+    vector = np.array([sum(word.startswith(term) for word in words) for term in VOCABULARY], dtype=np.float32) + 1e-3
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def embedder(monkeypatch):
+    monkeypatch.setattr(context_compressor.settings, "CONTEXT_COMPRESSION_ENABLED", True)
+    monkeypatch.setattr(
+        context_compressor._sentence_cache, "embed",
+        lambda query, sentences: (_embed(query), np.stack([_embed(s) for s in sentences]))
+    )
+
+
+def test_split_sentences_drops_fragments_and_joins_lines():
+    text = "Page 4\n\nGradient descent follows\nthe negative gradient. Then it stops.\n- Momentum adds velocity to updates"
+    assert split_sentences(text) == [
+        "Gradient descent follows the negative gradient.",
+        "- Momentum adds velocity to updates",
+    ]
+
+
+def test_select_keeps_best_sentences_in_reading_order():
+    chunk_sentences = [["a b c d.", "e f g h."], ["i j k l.", "m n o p."]]
+    scores = np.array([0.1, 0.9, 0.8, 0.2])
+    budget = count_tokens("e f g h.") + count_tokens("i j k l.") + 2
+    assert _select(chunk_sentences, scores, budget) == ["e f g h.", "i j k l."]
+
+
+async def test_compression_keeps_sentences_about_the_query(embedder):
+    budget = count_tokens("Gradient descent updates every weight.") + count_tokens(
+        "The learning rate scales gradient descent steps.") + 2
+    compressed = await compress_context("today gradient descent and the learning rate", CHUNKS, budget)
+
+    assert compressed == [
+        "Gradient descent updates every weight.",
+        "The learning rate scales gradient descent steps.",
+    ]
+    assert sum(count_tokens(chunk) for chunk in compressed) <= budget
+
+
+async def test_context_that_fits_is_unchanged(embedder):
+    assert await compress_context("gradient descent", CHUNKS, 10_000) == CHUNKS
+
+
+async def test_embedding_failure_keeps_context(monkeypatch):
+    def fail(query, sentences):
+        raise RuntimeError("model not loaded")
+    monkeypatch.setattr(context_compressor.settings, "CONTEXT_COMPRESSION_ENABLED", True)
+    monkeypatch.setattr(context_compressor._sentence_cache, "embed", fail)
+    assert await compress_context("gradient descent", CHUNKS, 5) == CHUNKS
+
+
+def test_sentence_cache_embeds_each_sentence_once(monkeypatch):
+    processor = pytest.importorskip("app.services.document_processor_mongodb", exc_type=ImportError)
+    encoded = []
+
+    class Embedder:
+        def encode(self, texts, **kwargs):
+            encoded.append(list(texts))
+            return np.stack([_embed(text) for text in texts])
+    monkeypatch.setattr(processor, "get_embedder", lambda: Embedder())
+
+    cache = SentenceEmbeddingCache(max_entries=2)
+    cache.embed("gradient", ["Gradient descent.", "Pooling layers."])
+    _, matrix = cache.embed("rate", ["Gradient descent.", "Image kernel."])
+
+    assert encoded == [["gradient", "Gradient descent.", "Pooling layers."], ["rate", "Image kernel."]]
+    assert matrix.shape == (2, len(VOCABULARY))
+    assert list(cache._entries) == ["Gradient descent.", "Image kernel."]
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from database.mongodb_connection import (
+    claim_document_content,
+    release_document_content_claim,
+    renew_document_content_claim
+)
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    """document_processor_mongodb with its database calls replaced"""
+    module = pytest.importorskip("app.services.document_processor_mongodb", exc_type=ImportError)
+    monkeypatch.setattr(module.settings, "CONTENT_CLAIM_POLL", 0)
+    return module
+
+
+async def test_claim_upserts_only_unclaimed_unprocessed_content(fake_db):
+    assert await claim_document_content("hash", "worker-a") is True
+
+    (method, (query, update), kwargs), = fake_db.document_contents.calls
+    assert method == "update_one" and kwargs == {"upsert": True}
+    assert query["_id"] == "hash"
+    assert query["processed"] == {"$ne": True}
+    assert {"claimed_by": None} in query["$or"] and {"claimed_by": "worker-a"} in query["$or"]
+    assert update["$set"]["claimed_by"] == "worker-a"
+    assert update["$setOnInsert"]["processed"] is False
+
+
+async def test_claim_held_elsewhere_is_refused(fake_db):
+    fake_db.document_contents.update_error = DuplicateKeyError("E11000 duplicate key")
+    assert await claim_document_content("hash", "worker-b") is False
+
+
+async def test_renew_and_release_only_touch_own_claim(fake_db):
+    await renew_document_content_claim("hash", "worker-a")
+    await release_document_content_claim("hash", "worker-a")
+
+    renew, release = fake_db.document_contents.calls
+    assert renew[1][0] == release[1][0] == {"_id": "hash", "claimed_by": "worker-a"}
+    assert "claim_expires_at" in renew[1][1]["$set"]
+    assert release[1][1] == {"$unset": {"claimed_by": "", "claim_expires_at": ""}}
+
+
+async def test_content_lock_entry_removed_after_last_user(processor):
+    order = []
+
+    async def ingest(name):
+        async with processor._content_lock("hash"):
+            order.append(f"{name} start")
+            await asyncio.sleep(0)
+            order.append(f"{name} end")
+
+    await asyncio.gather(ingest("a"), ingest("b"))
+
+    assert order == ["a start", "a end", "b start", "b end"]
+    assert "hash" not in processor._content_locks
+
+
+async def test_content_claim_waits_for_other_process(processor, monkeypatch):
+    docs = iter([None, {"_id": "hash", "processed": True}])
+    claims, released = [], []
+
+    async def get_document_content(content_hash):
+        return next(docs)
+
+    async def claim(content_hash, owner):
+        claims.append(owner)
+        return False
+
+    async def release(content_hash, owner):
+        released.append(owner)
+    monkeypatch.setattr(processor, "get_document_content", get_document_content)
+    monkeypatch.setattr(processor, "claim_document_content", claim)
+    monkeypatch.setattr(processor, "release_document_content_claim", release)
+
+    async with processor._content_claim("hash") as existing:
+        assert existing == {"_id": "hash", "processed": True}
+    assert len(claims) == 1
+    assert released == []
+
+
+async def test_content_claim_released_on_failure(processor, monkeypatch):
+    released = []
+
+    async def get_document_content(content_hash):
+        return None
+
+    async def claim(content_hash, owner):
+        return True
+
+    async def release(content_hash, owner):
+        released.append(owner)
+    monkeypatch.setattr(processor, "get_document_content", get_document_content)
+    monkeypatch.setattr(processor, "claim_document_content", claim)
+    monkeypatch.setattr(processor, "release_document_content_claim", release)
+
+    with pytest.raises(RuntimeError):
+        async with processor._content_claim("hash") as existing:
+            assert existing is None
+            raise RuntimeError("extraction failed")
+    assert len(released) == 1
@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import app.services.embedding_pool as embedding_pool
+from app.services.embedding_pool import EmbeddingPool
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """Pool whose tasks run in threads with a fake model (text length, task size)"""
+    tasks = []
+
+    def encode_batch(texts, batch_size):
+        tasks.append(list(texts))
+        return np.array([[len(text), len(texts)] for text in texts], dtype=np.float32)
+    monkeypatch.setattr(embedding_pool, "_encode_batch", encode_batch)
+
+    pool = EmbeddingPool(processes=2, model_name="fake", task_size=3, batch_size=8)
+    pool._executor = ThreadPoolExecutor(max_workers=2)
+    pool.tasks = tasks
+    yield pool
+    pool.shutdown()
+
+
+def test_chunks_per_call_gives_every_process_several_tasks(monkeypatch):
+    monkeypatch.setattr(embedding_pool.settings, "EMBEDDING_POOL_TASKS_PER_PROCESS", 4)
+    pool = EmbeddingPool(processes=3, model_name="fake", task_size=16)
+    assert pool.chunks_per_call == 3 * 16 * 4
+    assert pool._executor is None
+
+
+async def test_embed_keeps_input_order(pool):
+    texts = ["x" * n for n in (7, 1, 5, 3, 9, 2, 8)]
+    embeddings = await pool.embed(texts)
+    assert embeddings[:, 0].tolist() == [7, 1, 5, 3, 9, 2, 8]
+
+
+async def test_embed_groups_texts_of_similar_length(pool):
+    await pool.embed(["x" * n for n in (7, 1, 5, 3, 9, 2, 8)])
+    lengths = sorted([len(text) for text in task] for task in pool.tasks)
+    assert lengths == [[1, 2, 3], [5, 7, 8], [9]]
+
+
+async def test_embed_nothing(pool):
+    assert (await pool.embed([])).shape == (0, 0)
+    assert pool.tasks == []
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from app.services.page_extraction import PAGE_ITERATORS
+from benchmarks.fixtures import WRITERS, build_fixture, lecture_sentences
+
+EXTENSIONS = {"pdf": ".pdf", "pptx": ".pptx", "docx": ".docx", "txt": ".txt"}
+
+
+def test_sentences_are_deterministic():
+    assert lecture_sentences(5, seed=3) == lecture_sentences(5, seed=3)
+    assert lecture_sentences(5, seed=3) != lecture_sentences(5, seed=4)
+
+
+@pytest.mark.parametrize("file_type", list(WRITERS))
+def test_fixtures_extract_to_their_text(tmp_path, file_type):
+    path = build_fixture(tmp_path, file_type, units=3, sentences_per_unit=4, seed=1)
+    iter_pages, _ = PAGE_ITERATORS[EXTENSIONS[file_type]]
+    pages = list(iter_pages(str(path)))
+
+    # Word files have no pages; everything else has one unit per page
+    assert len(pages) == (1 if file_type == "docx" else 3)
+    text = " ".join(" ".join(page.split()) for _, page in pages)
+    first_words = lecture_sentences(4, seed=100003)[0].split()[:3]
+    assert " ".join(first_words) in text
+
+
+async def test_benchmark_run_uses_only_the_in_memory_store(tmp_path, monkeypatch, fake_db):
+    benchmark = pytest.importorskip("benchmarks.ingestion_benchmark", exc_type=ImportError)
+    processor = benchmark.processor
+
+    class Embedder:
+        max_seq_length = 128
+        tokenizer = type("Tokenizer", (), {"tokenize": staticmethod(str.split)})()
+    monkeypatch.setattr(processor, "get_embedder", lambda: Embedder())
+    monkeypatch.setattr(processor, "_embed_chunks", benchmark._skip_embedding)
+    # run_once installs its store on the module; undo that after the test
+    for name in ["get_document_content", "claim_document_content", "renew_document_content_claim",
+                 "release_document_content_claim", "save_document_content", "save_document_pages",
+                 "clear_document_content_chunks", "save_document_embeddings",
+                 "save_lexical_index", "mark_document_content_processed", "link_document"]:
+        monkeypatch.setattr(processor, name, getattr(processor, name))
+
+    path = build_fixture(tmp_path, "txt", units=4, sentences_per_unit=10)
+    row = await benchmark.run_once(path, embedding_pool=None, trace_memory=False)
+
+    assert row["pages"] == 4 and row["chunks"] > 0
+    assert set(row["stage_seconds"]) == set(benchmark.STAGES)
+    assert fake_db.collections == {}
+    assert np.isfinite(row["pages_per_s"])
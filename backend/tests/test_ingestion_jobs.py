@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+ingestion_jobs = pytest.importorskip("app.services.ingestion_jobs", exc_type=ImportError)
+
+
+def _files(*names):
+    return [{"filename": name, "file_path": f"/blobs/{name}", "content_hash": f"hash-{name}", "file_size": 10}
+            for name in names]
+
+
+@pytest.fixture
+def processed(monkeypatch):
+    """Fake process_document: files named bad* fail, others succeed after two stages"""
+    running, peak = [0], [0]
+
+    async def process_document(file_path, lecture_id, filename, content_hash, file_size, on_progress):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        try:
+            await on_progress("extracting")
+            await asyncio.sleep(0.01)
+            await on_progress("embedding")
+            if filename.startswith("bad"):
+                raise ValueError("corrupt file")
+            return {"success": True, "document_id": f"doc-{filename}", "chunk_count": 3}
+        finally:
+            running[0] -= 1
+    monkeypatch.setattr(ingestion_jobs, "process_document", process_document)
+    return peak
+
+
+async def _finish(manager, job):
+    await manager._tasks[job["job_id"]]
+
+
+async def test_job_runs_files_with_bounded_concurrency(processed):
+    events = []
+
+    async def notify(lecture_id, message):
+        events.append((lecture_id, message["type"], message.get("stage")))
+    manager = ingestion_jobs.IngestionJobManager(max_workers=2)
+    manager.set_notifier(notify)
+
+    job = manager.create_job("lecture", _files("a.pdf", "b.pdf", "c.pdf"))
+    assert job["status"] == "queued"
+    await _finish(manager, job)
+
+    assert job["status"] == "completed" and job["completed_files"] == 3
+    assert [f["document_id"] for f in job["files"]] == ["doc-a.pdf", "doc-b.pdf", "doc-c.pdf"]
+    assert processed[0] == 2
+    assert events[0] == ("lecture", "ingestion_started", None)
+    assert events[-1][1] == "ingestion_complete"
+    assert ("lecture", "ingestion_progress", "embedding") in events
+
+
+@pytest.mark.parametrize("names,status", [
+    (("a.pdf", "bad.pdf"), "partial"),
+    (("bad1.pdf", "bad2.pdf"), "failed"),
+])
+async def test_failed_files_are_reported(processed, names, status):
+    manager = ingestion_jobs.IngestionJobManager(max_workers=2)
+    job = manager.create_job("lecture", _files(*names))
+    await _finish(manager, job)
+
+    assert job["status"] == status
+    failed = [f for f in job["files"] if f["status"] == "failed"]
+    assert failed and all(f["error"] == "corrupt file" for f in failed)
+
+
+async def test_notifier_errors_do_not_fail_the_job(processed):
+    async def notify(lecture_id, message):
+        raise ConnectionError("socket closed")
+    manager = ingestion_jobs.IngestionJobManager(max_workers=1)
+    manager.set_notifier(notify)
+    job = manager.create_job("lecture", _files("a.pdf"))
+    await _finish(manager, job)
+    assert job["status"] == "completed"
+
+
+async def test_public_view_hides_paths_and_finished_jobs_expire(processed, monkeypatch):
+    manager = ingestion_jobs.IngestionJobManager(max_workers=1)
+    job = manager.create_job("lecture", _files("a.pdf"))
+    await _finish(manager, job)
+
+    assert all("file_path" not in f for f in ingestion_jobs.public_job_view(job)["files"])
+    assert manager.get_lecture_jobs("lecture", active_only=True) == []
+
+    monkeypatch.setattr(ingestion_jobs, "FINISHED_JOB_TTL", -1)
+    second = manager.create_job("other", _files("b.pdf"))
+    assert manager.get_job(job["job_id"]) is None
+    await _finish(manager, second)
@@ -0,0 +1,78 @@
+import pytest
+
+import app.services.lecture_memory as lecture_memory
+from app.services.lecture_memory import LectureMemory
+from app.services.prompt_budget import count_tokens
+
+
+def _window(n):
+    return (f"## Lecture Notes\n\n### Topic {n} about optimization\n"
+            f"- **Term {n}** is explained with a fairly long example sentence about step sizes and momentum\n"
+            f"- second point {n}\n")
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    monkeypatch.setattr(lecture_memory.settings, "LECTURE_MEMORY_TOKENS", 120)
+    monkeypatch.setattr(lecture_memory.settings, "LECTURE_MEMORY_MAX_TERMS", 5)
+    monkeypatch.setattr(lecture_memory.settings, "LECTURE_MEMORY_TERM_TOKENS", 40)
+    monkeypatch.setattr(lecture_memory.settings, "HISTORY_CHUNKS", 2)
+    return LectureMemory("lecture")
+
+
+def test_summary_lists_topics_and_terms(memory):
+    memory.add_structured_notes("## Lecture Notes\n### Gradients\n- **Gradient descent** steps downhill\n")
+    assert memory.summary() == (
+        "Topics covered: Gradients: Gradient descent steps downhill\n"
+        "Key terms already explained: Gradient descent"
+    )
+
+
+def test_summary_stays_within_budget_over_a_long_lecture(memory):
+    for n in range(50):
+        memory.add_structured_notes(_window(n))
+        assert count_tokens(memory.summary()) <= 120
+
+    assert "Topic 49 about optimization" in memory.summary()
+    assert "Topic 0 about optimization" not in memory.summary()
+    assert memory.dropped_topics > 0
+    assert f"({memory.dropped_topics} earlier topics)" in memory.summary()
+    assert list(memory.terms) == [f"Term {n}" for n in range(45, 50)]
+
+
+
+def test_many_long_terms_do_not_crowd_out_topics(memory, monkeypatch):
+    monkeypatch.setattr(lecture_memory.settings, "LECTURE_MEMORY_MAX_TERMS", 30)
+    terms = " ".join(f"**stochastic gradient variant number {n}**" for n in range(30))
+    memory.add_structured_notes(f"### Optimizers\n- {terms}\n")
+
+    assert count_tokens(memory.summary()) <= 120
+    assert count_tokens(memory._terms_line()) <= 40
+    assert list(memory.topics) == ["Optimizers"]
+    assert "stochastic gradient variant number 29" in memory.terms
+    assert "stochastic gradient variant number 0" not in memory.terms
+
+
+def test_oldest_topics_lose_detail_before_being_dropped(memory, monkeypatch):
+    memory.add_structured_notes(_window(1))
+    memory.add_structured_notes(_window(2))
+    monkeypatch.setattr(lecture_memory.settings, "LECTURE_MEMORY_TOKENS", count_tokens(memory.summary()))
+    memory.add_structured_notes(_window(3))
+
+    assert memory.dropped_topics == 0
+    assert memory.topics["Topic 1 about optimization"] == ""
+    assert memory.topics["Topic 3 about optimization"] != ""
+
+
+def test_revisited_topic_moves_to_end(memory):
+    memory.add_structured_notes("## Gradients\n- first\n## Pooling\n- second\n")
+    memory.add_structured_notes("## gradients\n- again\n")
+    assert list(memory.topics) == ["Pooling", "Gradients"]
+    assert memory.topics["Gradients"] == "first"
+
+
+def test_recent_live_notes_are_a_window(memory):
+    for n in range(4):
+        memory.add_live_notes(f"- bullet {n}")
+    memory.add_live_notes("   ")
+    assert list(memory.recent_notes) == ["- bullet 2", "- bullet 3"]
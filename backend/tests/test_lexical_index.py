@@ -0,0 +1,161 @@
+import pytest
+
+import app.services.lexical_index as lexical_index
+from app.services.lexical_index import (
+    DocumentIndexBuilder,
+    LexicalIndex,
+    build_document_index,
+    get_lecture_index,
+    invalidate_lecture_index,
+    reciprocal_rank_fusion,
+    tokenize
+)
+from database.mongodb_connection import save_lexical_index
+
+CHUNKS = [
+    "Gradient descent updates the weights using the gradient of the loss.",
+    "Convolutional layers share weights across positions of the image.",
+    "The learning rate scales each gradient descent step.",
+    "Dropout randomly disables units during training to reduce overfitting.",
+    "Batch normalization rescales activations inside the network.",
+]
+
+
+def _builder(chunks):
+    builder = DocumentIndexBuilder()
+    for i, chunk in enumerate(chunks):
+        builder.add(i, chunk)
+    return builder
+
+
+def test_tokenize_drops_stopwords_and_splits_hyphenated_terms():
+    assert tokenize("The back-propagation of an error") == ["back-propagation", "back", "propagation", "error"]
+
+
+def test_search_ranks_chunks_sharing_query_terms():
+    index = LexicalIndex([dict(build_document_index(CHUNKS), document_id="doc")])
+    ranked = [key for key, _ in index.search("gradient descent learning rate", top_k=3)]
+    assert ranked[:2] == [("doc", 2), ("doc", 0)]
+    assert ("doc", 1) not in ranked
+
+
+@pytest.mark.parametrize("shard_chunks", [1, 2, 5, 100])
+def test_shards_load_into_the_same_index(shard_chunks):
+    builder = _builder(CHUNKS)
+    full = LexicalIndex([dict(builder.build(), document_id="doc")])
+    sharded = LexicalIndex([dict(shard, document_id="doc") for shard in builder.build_shards(shard_chunks)])
+
+    assert sharded.chunk_lengths == full.chunk_lengths
+    assert sharded.search("weights gradient", 5) == full.search("weights gradient", 5)
+
+
+def test_shards_only_hold_their_chunk_range():
+    shards = _builder(CHUNKS).build_shards(2)
+    assert [(s["shard"], s["chunk_start"], len(s["chunk_lengths"])) for s in shards] == [(0, 0, 2), (1, 2, 2), (2, 4, 1)]
+    for shard in shards:
+        for entries in shard["postings"].values():
+            assert all(shard["chunk_start"] <= chunk < shard["chunk_start"] + 2 for chunk, _ in entries)
+
+
+async def test_save_writes_one_entry_per_shard(fake_db):
+    shards = _builder(CHUNKS).build_shards(2)
+    await save_lexical_index("doc", shards)
+
+    (delete, (query,), _), (insert, (entries,), _) = fake_db.lexical_index.calls
+    assert (delete, query) == ("delete_many", {"document_id": "doc"})
+    assert insert == "insert_many"
+    assert [(e["document_id"], e["shard"]) for e in entries] == [("doc", 0), ("doc", 1), ("doc", 2)]
+
+
+async def test_missing_index_is_cached_until_invalidated(monkeypatch):
+    calls = []
+
+    async def get_lexical_indexes(lecture_id, content_hashes=None):
+        calls.append(lecture_id)
+        return []
+    monkeypatch.setattr(lexical_index, "get_lexical_indexes", get_lexical_indexes)
+    invalidate_lecture_index("lecture-1")
+
+    assert await get_lecture_index("lecture-1", ["doc"]) is None
+    assert await get_lecture_index("lecture-1", ["doc"]) is None
+    assert calls == ["lecture-1"]
+
+    invalidate_lecture_index("lecture-1")
+    assert await get_lecture_index("lecture-1", ["doc"]) is None
+    assert calls == ["lecture-1", "lecture-1"]
+
+
+async def test_missing_index_expires(monkeypatch):
+    calls = []
+
+    async def get_lexical_indexes(lecture_id, content_hashes=None):
+        calls.append(lecture_id)
+        return [] if len(calls) == 1 else [dict(build_document_index(CHUNKS), document_id="doc")]
+    monkeypatch.setattr(lexical_index, "get_lexical_indexes", get_lexical_indexes)
+    monkeypatch.setattr(lexical_index.settings, "LEXICAL_MISSING_TTL", 0)
+    invalidate_lecture_index("lecture-2")
+
+    assert await get_lecture_index("lecture-2", ["doc"]) is None
+    index = await get_lecture_index("lecture-2", ["doc"])
+    assert index is not None and index.chunk_count == len(CHUNKS)
+    invalidate_lecture_index("lecture-2")
+
+
+
+async def test_cached_index_is_rebuilt_when_the_lecture_documents_change(monkeypatch):
+    calls = []
+
+    async def get_lexical_indexes(lecture_id, content_hashes=None):
+        calls.append(sorted(content_hashes))
+        return [dict(build_document_index(CHUNKS[:len(content_hashes) + 1]), document_id=h) for h in content_hashes]
+    monkeypatch.setattr(lexical_index, "get_lexical_indexes", get_lexical_indexes)
+    invalidate_lecture_index("lecture-3")
+
+    first = await get_lecture_index("lecture-3", ["doc-a"])
+    assert await get_lecture_index("lecture-3", ["doc-a"]) is first
+
+    # Linked by another process (no invalidate call here)
+    second = await get_lecture_index("lecture-3", ["doc-b", "doc-a"])
+    assert second is not first and second.chunk_count == 6
+    assert calls == [["doc-a"], ["doc-a", "doc-b"]]
+    invalidate_lecture_index("lecture-3")
+
+
+async def test_missing_index_is_retried_when_documents_are_linked(monkeypatch):
+    calls = []
+
+    async def get_lexical_indexes(lecture_id, content_hashes=None):
+        calls.append(sorted(content_hashes))
+        return [] if len(calls) == 1 else [dict(build_document_index(CHUNKS), document_id="doc-b")]
+    monkeypatch.setattr(lexical_index, "get_lexical_indexes", get_lexical_indexes)
+    invalidate_lecture_index("lecture-4")
+
+    assert await get_lecture_index("lecture-4", ["doc-a"]) is None
+    assert await get_lecture_index("lecture-4", ["doc-a", "doc-b"]) is not None
+    assert calls == [["doc-a"], ["doc-a", "doc-b"]]
+    invalidate_lecture_index("lecture-4")
+
+
+async def test_cache_evicts_least_recently_used_lectures(monkeypatch):
+    async def get_lexical_indexes(lecture_id, content_hashes=None):
+        return [dict(build_document_index(CHUNKS), document_id="doc")]
+    monkeypatch.setattr(lexical_index, "get_lexical_indexes", get_lexical_indexes)
+    monkeypatch.setattr(lexical_index.settings, "LEXICAL_INDEX_CACHE_LECTURES", 2)
+    monkeypatch.setattr(lexical_index, "_lecture_indexes", type(lexical_index._lecture_indexes)())
+
+    for lecture_id in ("a", "b", "a", "c"):
+        await get_lecture_index(lecture_id, ["doc"])
+    assert list(lexical_index._lecture_indexes) == ["a", "c"]
+
+
+async def test_lecture_without_documents_skips_the_lookup(monkeypatch):
+    async def get_lexical_indexes(lecture_id, content_hashes=None):
+        raise AssertionError("no documents, nothing to load")
+    monkeypatch.setattr(lexical_index, "get_lexical_indexes", get_lexical_indexes)
+    assert await get_lecture_index("lecture-5", []) is None
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "a", "d"]], [1.0, 1.0])
+    assert [key for key, _ in fused][:2] in (["a", "b"], ["b", "a"])
+    assert [key for key, _ in fused][-1] in ("c", "d")
@@ -0,0 +1,83 @@
+import pytest
+
+import app.services.llm_cache as llm_cache_module
+from app.services.llm_cache import LLMResponseCache, cache_key, is_cacheable
+
+MESSAGES = [
+    {"role": "system", "content": "You write lecture notes."},
+    {"role": "user", "content": "Summarize:\n  gradient   descent  \n"},
+]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Mongo entries of the cache"""
+    entries = {}
+
+    async def get_llm_cache_entry(key):
+        return entries.get(key)
+
+    async def save_llm_cache_entry(key, model, response):
+        entries[key] = response
+    monkeypatch.setattr(llm_cache_module, "get_llm_cache_entry", get_llm_cache_entry)
+    monkeypatch.setattr(llm_cache_module, "save_llm_cache_entry", save_llm_cache_entry)
+    return entries
+
+
+def test_key_ignores_insignificant_whitespace():
+    reformatted = [MESSAGES[0], {"role": "user", "content": "Summarize:\ngradient descent"}]
+    assert cache_key("model", MESSAGES, {"max_tokens": 100}) == cache_key("model", reformatted, {"max_tokens": 100})
+
+
+@pytest.mark.parametrize("model,messages,params", [
+    ("other-model", MESSAGES, {"max_tokens": 100}),
+    ("model", MESSAGES, {"max_tokens": 200}),
+    ("model", [MESSAGES[0], {"role": "user", "content": "Summarize:\nbackpropagation"}], {"max_tokens": 100}),
+    ("model", [{"role": "user", "content": m["content"]} for m in MESSAGES], {"max_tokens": 100}),
+])
+def test_key_changes_with_request(model, messages, params):
+    assert cache_key(model, messages, params) != cache_key("model", MESSAGES, {"max_tokens": 100})
+
+
+def test_only_low_temperature_is_cacheable(monkeypatch):
+    monkeypatch.setattr(llm_cache_module.settings, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_cache_module.settings, "LLM_CACHE_MAX_TEMPERATURE", 0.3)
+    assert is_cacheable(0.2)
+    assert not is_cacheable(0.7)
+
+    monkeypatch.setattr(llm_cache_module.settings, "LLM_CACHE_ENABLED", False)
+    assert not is_cacheable(0.0)
+
+
+async def test_put_then_get(store):
+    cache = LLMResponseCache(max_entries=10)
+    assert await cache.get("k") is None
+    await cache.put("k", "model", "notes")
+
+    assert await cache.get("k") == "notes"
+    assert store == {"k": "notes"}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+async def test_lru_evicts_least_recently_used_and_falls_back_to_store(store):
+    cache = LLMResponseCache(max_entries=2)
+    await cache.put("a", "model", "A")
+    await cache.put("b", "model", "B")
+    await cache.get("a")
+    await cache.put("c", "model", "C")
+
+    assert list(cache._entries) == ["a", "c"]
+    assert await cache.get("b") == "B"
+    assert list(cache._entries) == ["c", "b"]
+
+
+async def test_store_errors_are_misses(monkeypatch):
+    async def failing(*args):
+        raise ConnectionError("mongo down")
+    monkeypatch.setattr(llm_cache_module, "get_llm_cache_entry", failing)
+    monkeypatch.setattr(llm_cache_module, "save_llm_cache_entry", failing)
+
+    cache = LLMResponseCache(max_entries=2)
+    assert await cache.get("k") is None
+    await cache.put("k", "model", "notes")
+    assert await cache.get("k") == "notes"
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+import app.services.llm_client as llm_client_module
+from app.services.llm_client import LLMClient
+
+MESSAGES = [{"role": "system", "content": "You write notes."}, {"role": "user", "content": "Gradient descent"}]
+
+
+@pytest.fixture(autouse=True)
+def cache_low_temperatures(monkeypatch):
+    monkeypatch.setattr(llm_client_module.settings, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_client_module.settings, "LLM_CACHE_MAX_TEMPERATURE", 0.3)
+
+
+async def test_response_text_is_stripped_and_usage_recorded(llm):
+    llm.provider.script = ["- Step against the gradient"]
+    notes = await llm.chat(MESSAGES, temperature=0.7, max_tokens=100, model="m", stage="raw_notes")
+
+    assert notes == "- Step against the gradient"
+    request = llm.provider.requests[0]
+    assert (request["model"], request["max_tokens"], request["temperature"]) == ("m", 100, 0.7)
+    assert llm.usage == [("raw_notes", "m", 10, 5, pytest.approx(0, abs=0.1), "ok")]
+
+
+async def test_repeated_low_temperature_call_is_served_from_cache(llm):
+    llm.provider.script = ["notes"]
+    assert await llm.chat(MESSAGES, temperature=0.2, stage="outline") == "notes"
+    assert await llm.chat(MESSAGES, temperature=0.2, stage="outline") == "notes"
+
+    assert len(llm.provider.requests) == 1
+    assert [args[-1] for args in llm.usage] == ["ok", "cached"]
+
+
+async def test_creative_calls_are_not_cached(llm):
+    llm.provider.script = ["first", "second"]
+    assert await llm.chat(MESSAGES, temperature=0.9) == "first"
+    assert await llm.chat(MESSAGES, temperature=0.9) == "second"
+
+
+async def test_identical_calls_in_flight_share_one_request(llm):
+    llm.provider.script = ["shared notes"]
+    llm.provider.delay = 0.02
+
+    results = await asyncio.gather(*(llm.chat(MESSAGES, temperature=0.0) for _ in range(3)))
+
+    assert results == ["shared notes"] * 3
+    assert len(llm.provider.requests) == 1
+    assert sorted(args[-1] for args in llm.usage) == ["joined", "joined", "ok"]
+    assert llm._inflight == {}
+
+
+async def test_one_caller_giving_up_does_not_cancel_the_shared_request(llm):
+    llm.provider.script = ["shared notes"]
+    llm.provider.delay = 0.05
+
+    impatient = asyncio.ensure_future(llm.chat(MESSAGES, temperature=0.0))
+    patient = asyncio.ensure_future(llm.chat(MESSAGES, temperature=0.0))
+    await asyncio.sleep(0.01)
+    impatient.cancel()
+
+    assert await patient == "shared notes"
+
+
+
+
+async def test_joining_caller_waits_no_longer_than_its_own_deadline(llm):
+    llm.provider.script = ["shared notes"]
+    llm.provider.delay = 0.1
+
+    owner = asyncio.ensure_future(llm.chat(MESSAGES, temperature=0.0, deadline=5.0))
+    await asyncio.sleep(0.01)
+    with pytest.raises(asyncio.TimeoutError):
+        await llm.chat(MESSAGES, temperature=0.0, deadline=0.02)
+
+    assert await owner == "shared notes"
+
+
+def _tokens_left():
+    return llm_client_module.llm_scheduler._tokens.level
+
+
+async def test_successful_call_keeps_only_the_tokens_used(llm):
+    llm.provider.script = ["notes"]
+    await llm.chat(MESSAGES, temperature=0.9, max_tokens=400)
+    assert _tokens_left() == pytest.approx(100_000 - 15, abs=1)
+
+
+async def test_failed_call_gives_its_reservation_back(llm):
+    llm.provider.script = [ValueError("bad request")]
+    with pytest.raises(ValueError):
+        await llm.chat(MESSAGES, temperature=0.9, max_tokens=400)
+    assert _tokens_left() == pytest.approx(100_000, abs=1)
+
+
+async def test_cancelled_call_gives_its_reservation_back(llm):
+    llm.provider.script = ["too late"]
+    llm.provider.delay = 1.0
+
+    call = asyncio.ensure_future(llm.chat(MESSAGES, temperature=0.9, max_tokens=400))
+    await asyncio.sleep(0.01)
+    assert _tokens_left() < 100_000 - 400
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    assert _tokens_left() == pytest.approx(100_000, abs=1)
+    assert llm._semaphore._value == 2
+
+
+async def test_unconfigured_client_raises(monkeypatch):
+    monkeypatch.setattr(LLMClient, "available", property(lambda self: False))
+    with pytest.raises(RuntimeError, match="not available"):
+        await LLMClient().chat(MESSAGES)
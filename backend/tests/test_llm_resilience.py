@@ -0,0 +1,132 @@
+import asyncio
+import types
+
+import httpx
+import pytest
+
+import app.services.llm_resilience as llm_resilience
+from app.services.llm_resilience import (
+    LatencyTracker,
+    RetryPolicy,
+    backoff_delay,
+    deadline_for,
+    is_retryable,
+    outcome_of,
+    retry_after
+)
+from app.services.llm_scheduler import Priority
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = types.SimpleNamespace(headers=headers or {})
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(llm_resilience.settings, "LLM_RETRY_ATTEMPTS", 2)
+    monkeypatch.setattr(llm_resilience.settings, "LLM_RATE_LIMIT_REQUEUES", 1)
+    monkeypatch.setattr(llm_resilience.settings, "LLM_BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(llm_resilience.settings, "LLM_BACKOFF_MAX", 0.02)
+
+
+@pytest.mark.parametrize("error,retryable,outcome", [
+    (StatusError(503), True, "error_503"),
+    (StatusError(400), False, "error_400"),
+    (StatusError(429), False, "rate_limited"),
+    (asyncio.TimeoutError(), True, "timeout"),
+    (httpx.ConnectError("refused"), True, "error"),
+    (ValueError("bad json"), False, "error"),
+])
+def test_error_classification(error, retryable, outcome):
+    assert is_retryable(error) is retryable
+    assert outcome_of(error) == outcome
+
+
+def test_retry_after_header():
+    assert retry_after(StatusError(429, {"retry-after": "7"})) == 7.0
+    assert retry_after(StatusError(429)) == llm_resilience.DEFAULT_RATE_LIMIT_PAUSE
+    assert retry_after(StatusError(503), default=None) is None
+
+
+def test_backoff_is_capped_and_honours_retry_after(fast_retries):
+    assert all(0 <= backoff_delay(attempt) <= 0.02 for attempt in range(10))
+    assert backoff_delay(0, retry_after_seconds=3.0) == 3.0
+
+
+def test_policy_gives_up_after_attempts(fast_retries):
+    policy = RetryPolicy(deadline=None)
+    assert policy.next_delay(StatusError(502)) is not None
+    assert policy.next_delay(StatusError(502)) is not None
+    assert policy.next_delay(StatusError(502)) is None
+    assert policy.next_delay(StatusError(400)) is None
+
+
+def test_policy_requeues_rate_limits_without_extra_delay(fast_retries):
+    policy = RetryPolicy(deadline=None)
+    assert policy.next_delay(StatusError(429)) == 0.0
+    assert policy.next_delay(StatusError(429)) is None
+
+
+def test_policy_stops_retrying_past_deadline(fast_retries):
+    policy = RetryPolicy(deadline=10.0)
+    assert policy.next_delay(StatusError(503, {"retry-after": "30"})) is None
+
+
+def test_deadlines_follow_priority(monkeypatch):
+    monkeypatch.setattr(llm_resilience.settings, "CHUNK_DURATION", 20)
+    monkeypatch.setattr(llm_resilience.settings, "SYNTHESIS_INTERVAL", 60)
+    assert deadline_for(Priority.LIVE) == 20.0
+    assert deadline_for(Priority.SYNTHESIS) == 60.0
+    assert deadline_for(Priority.BATCH) is None
+
+
+def test_hedge_delay_needs_samples(monkeypatch):
+    monkeypatch.setattr(llm_resilience.settings, "LLM_HEDGING", True)
+    monkeypatch.setattr(llm_resilience.settings, "LLM_HEDGE_MAX_PRIORITY", Priority.SYNTHESIS)
+    monkeypatch.setattr(llm_resilience.settings, "LLM_HEDGE_MIN_DELAY", 0.5)
+    tracker = LatencyTracker()
+    for n in range(llm_resilience.MIN_HEDGE_SAMPLES - 1):
+        tracker.record(Priority.LIVE, 1.0)
+    assert tracker.hedge_delay(Priority.LIVE) is None
+
+    for seconds in [1.0] * 80 + [4.0] * 20:
+        tracker.record(Priority.LIVE, seconds)
+    assert tracker.hedge_delay(Priority.LIVE) == 4.0
+    assert tracker.hedge_delay(Priority.FINAL) is None
+
+
+MESSAGES = [{"role": "user", "content": "Summarize gradient descent."}]
+
+
+async def test_transient_errors_are_retried(llm, fast_retries):
+    llm.provider.script = [StatusError(503), httpx.ConnectError("reset"), "notes"]
+    assert await llm.chat(MESSAGES, cache=False, priority=Priority.BATCH, stage="raw_notes") == "notes"
+    assert [(args[0], args[-1]) for args in llm.usage] == [
+        ("raw_notes", "error_503"), ("raw_notes", "error"), ("raw_notes", "ok")
+    ]
+
+
+async def test_permanent_errors_are_raised(llm, fast_retries):
+    llm.provider.script = [StatusError(400)]
+    with pytest.raises(StatusError):
+        await llm.chat(MESSAGES, cache=False, priority=Priority.BATCH)
+    assert llm.provider.script == []
+
+
+async def test_retries_are_bounded(llm, fast_retries):
+    llm.provider.script = [StatusError(503)] * 5
+    with pytest.raises(StatusError):
+        await llm.chat(MESSAGES, cache=False, priority=Priority.BATCH)
+    assert len(llm.provider.script) == 2
+
+
+async def test_deadline_bounds_slow_calls(llm):
+    llm.provider.script = ["late notes"]
+    llm.provider.delay = 10
+
+    with pytest.raises(asyncio.TimeoutError):
+        await llm.chat(MESSAGES, cache=False, deadline=0.05)
+    assert llm.usage[-1][-1] == "cancelled"
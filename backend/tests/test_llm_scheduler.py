@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_scheduler import LLMScheduler, Priority, TokenBucket
+
+
+def test_bucket_waits_for_refill():
+    bucket = TokenBucket(capacity=600, per_minute=600)
+    bucket._updated = 0.0
+    bucket.consume(500, now=0.0)
+
+    assert bucket.wait_time(100, now=0.0) == 0.0
+    assert bucket.wait_time(200, now=0.0) == pytest.approx(10.0)
+    assert bucket.wait_time(200, now=10.0) == 0.0
+
+
+def test_bucket_caps_requests_above_capacity_and_refunds():
+    bucket = TokenBucket(capacity=100, per_minute=60)
+    bucket._updated = 0.0
+    assert bucket.wait_time(1000, now=0.0) == 0.0
+
+    bucket.consume(150, now=0.0)
+    assert bucket.level == -50
+    bucket.refund(500)
+    assert bucket.level == 100
+
+
+async def test_waiting_calls_are_admitted_by_priority():
+    scheduler = LLMScheduler(tokens_per_minute=100_000, requests_per_minute=1_000)
+    scheduler.pause(0.05)
+    admitted = []
+
+    async def call(priority):
+        await scheduler.acquire(10, priority)
+        admitted.append(priority)
+
+    await asyncio.gather(*(call(p) for p in (Priority.BATCH, Priority.FINAL, Priority.LIVE, Priority.SYNTHESIS)))
+    assert admitted == [Priority.LIVE, Priority.SYNTHESIS, Priority.FINAL, Priority.BATCH]
+
+
+async def test_token_budget_delays_admission():
+    scheduler = LLMScheduler(tokens_per_minute=6_000, requests_per_minute=1_000)
+    await scheduler.acquire(6_000)
+
+    # 6000 tokens/minute refills 5 tokens in 50 ms
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(scheduler.acquire(100), timeout=0.05)
+    await asyncio.wait_for(scheduler.acquire(4), timeout=0.5)
+
+
+async def test_settle_returns_unused_reservation():
+    scheduler = LLMScheduler(tokens_per_minute=1_000, requests_per_minute=1_000)
+    await scheduler.acquire(1_000)
+    scheduler.settle(reserved=1_000, actual=200)
+    assert scheduler._tokens.level == pytest.approx(800, abs=5)
+
+
+async def test_call_cancelled_right_after_admission_is_refunded():
+    scheduler = LLMScheduler(tokens_per_minute=1_000, requests_per_minute=1_000)
+    call = asyncio.ensure_future(scheduler.acquire(600))
+    while scheduler._tokens.level > 500:
+        await asyncio.sleep(0)
+    assert not call.done()
+
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    assert scheduler._tokens.level == pytest.approx(1_000, abs=5)
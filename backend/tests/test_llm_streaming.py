@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+import app.services.llm_client as llm_client_module
+import app.services.llm_resilience as llm_resilience
+
+MESSAGES = [{"role": "user", "content": "Write the structured notes."}]
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    monkeypatch.setattr(llm_client_module.settings, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_client_module.settings, "LLM_CACHE_MAX_TEMPERATURE", 0.3)
+    monkeypatch.setattr(llm_resilience.settings, "LLM_BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(llm_resilience.settings, "LLM_BACKOFF_MAX", 0.02)
+
+
+async def test_deltas_reach_the_callback_as_they_arrive(llm):
+    llm.provider.script = ["## Gradient Descent\n- Step downhill"]
+    deltas = []
+
+    async def on_delta(delta):
+        deltas.append(delta)
+    notes = await llm.chat(MESSAGES, temperature=0.7, on_delta=on_delta, stage="synthesis")
+
+    assert notes == "## Gradient Descent\n- Step downhill"
+    assert deltas == ["## ", "Gradient ", "Descent\n- ", "Step ", "downhill "]
+    assert llm.provider.requests[0]["stream"] is True
+    assert llm.usage[-1][0] == "synthesis" and llm.usage[-1][-1] == "ok"
+    assert llm._semaphore._value == 2
+
+
+async def test_completed_stream_is_cached_and_replayed_whole(llm):
+    llm.provider.script = ["## Notes\n- point"]
+    first = [delta async for delta in llm.chat_stream(MESSAGES, temperature=0.1)]
+    second = [delta async for delta in llm.chat_stream(MESSAGES, temperature=0.1)]
+
+    assert len(first) > 1
+    assert second == ["## Notes\n- point"]
+    assert len(llm.provider.requests) == 1
+
+
+async def test_errors_before_the_stream_opens_are_retried(llm):
+    llm.provider.script = [StatusError(503), "recovered notes"]
+    deltas = [delta async for delta in llm.chat_stream(MESSAGES, temperature=0.7)]
+    assert "".join(deltas).strip() == "recovered notes"
+    assert len(llm.provider.requests) == 2
+
+
+async def test_errors_mid_stream_are_passed_through(llm):
+    llm.provider.script = ["## Part"]
+    llm.provider.stream_error = ConnectionError("connection reset")
+
+    received = []
+    with pytest.raises(ConnectionError):
+        async for delta in llm.chat_stream(MESSAGES, temperature=0.7):
+            received.append(delta)
+    assert received == ["## ", "Part "]
+    assert llm._semaphore._value == 2
+    assert llm.provider.streams[0].closed
+    assert llm.usage[-1][-1] == "error"
+    tokens = llm_client_module.llm_scheduler._tokens
+    assert tokens.level == pytest.approx(tokens.capacity - len(MESSAGES[0]["content"]) // 4, abs=15)
+
+
+async def test_stream_failing_to_open_gives_its_reservation_back(llm):
+    llm.provider.script = [StatusError(400)]
+    with pytest.raises(StatusError):
+        async for _ in llm.chat_stream(MESSAGES, temperature=0.7, max_tokens=400):
+            pass
+    tokens = llm_client_module.llm_scheduler._tokens
+    assert tokens.level == pytest.approx(tokens.capacity, abs=1)
+    assert llm._semaphore._value == 2
+
+
+async def test_stalled_stream_body_times_out_and_is_closed(llm):
+    llm.provider.script = ["## Notes\n- point"]
+    llm.provider.stream_delay = 0.03
+
+    received = []
+    with pytest.raises(asyncio.TimeoutError):
+        async for delta in llm.chat_stream(MESSAGES, temperature=0.7, deadline=0.05):
+            received.append(delta)
+    assert 0 < len(received) < 3
+    assert llm.provider.streams[0].closed
+    assert llm._semaphore._value == 2
+    assert llm.usage[-1][-1] == "timeout"
+
+
+async def test_stream_opening_past_the_deadline_is_closed(llm):
+    llm.provider.script = ["late notes"]
+    llm.provider.delay = 0.05
+
+    with pytest.raises(asyncio.TimeoutError):
+        async for _ in llm.chat_stream(MESSAGES, temperature=0.7, deadline=0.01):
+            pass
+    await asyncio.sleep(0.01)
+    assert llm._semaphore._value == 2
+    tokens = llm_client_module.llm_scheduler._tokens
+    assert tokens.level == pytest.approx(tokens.capacity, abs=1)
+
+
+async def test_stream_that_opens_as_its_caller_gives_up_is_released(llm):
+    llm.provider.script = ["notes"]
+    provider_create = llm.provider.create
+    consumers = []
+
+    async def create(**request):
+        stream = await provider_create(**request)
+        consumers[0].cancel()  # the caller gives up just as the stream opens
+        return stream
+    llm.provider.create = create
+
+    consumers.append(asyncio.ensure_future(llm.chat_stream(MESSAGES, temperature=0.7).__anext__()))
+    with pytest.raises(asyncio.CancelledError):
+        await consumers[0]
+    await asyncio.sleep(0.01)
+
+    assert llm._semaphore._value == 2
+    assert llm.provider.streams[0].closed
+    tokens = llm_client_module.llm_scheduler._tokens
+    assert tokens.level == pytest.approx(tokens.capacity, abs=1)
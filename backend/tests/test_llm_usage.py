@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+import app.services.llm_usage as llm_usage_module
+from app.services.llm_usage import LLMBudgetExceeded, LLMUsageTracker, _scope
+from database.mongodb_connection import get_lecture_owner
+
+LECTURE_ID = str(ObjectId())
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Usage rows written, stored tokens per user and lecture owners"""
+    class Store:
+        rows = []
+        stored_tokens = {}
+        owners = {LECTURE_ID: "user-1"}
+        save_error = None
+
+    async def save_llm_usage(rows):
+        if Store.save_error:
+            raise Store.save_error
+        Store.rows.extend(rows)
+
+    async def get_user_llm_tokens(user_id, day):
+        return Store.stored_tokens.get(user_id, 0)
+
+    async def get_lecture_owner(lecture_id):
+        return Store.owners.get(lecture_id)
+    monkeypatch.setattr(llm_usage_module, "save_llm_usage", save_llm_usage)
+    monkeypatch.setattr(llm_usage_module, "get_user_llm_tokens", get_user_llm_tokens)
+    monkeypatch.setattr(llm_usage_module, "get_lecture_owner", get_lecture_owner)
+    monkeypatch.setattr(llm_usage_module.settings, "LLM_USAGE_FLUSH_INTERVAL", 60)
+    return Store
+
+
+def _in_scope(coroutine_fn):
+    """Run in a copy of the context, as each lecture's task does"""
+    return asyncio.ensure_future(coroutine_fn())
+
+
+async def test_owner_is_looked_up_by_object_id(fake_db):
+    fake_db.lectures.find_one_result = {"user_id": "user-1"}
+    assert await get_lecture_owner(LECTURE_ID) == "user-1"
+
+    (method, (query, projection), _), = fake_db.lectures.calls
+    assert query == {"_id": ObjectId(LECTURE_ID)}
+
+
+async def test_offline_lecture_ids_have_no_owner(fake_db):
+    assert await get_lecture_owner("lecture-1712345678") is None
+    assert fake_db.lectures.calls == []
+
+
+async def test_calls_are_summed_per_lecture_user_and_stage(store):
+    tracker = LLMUsageTracker()
+
+    async def lecture():
+        await tracker.bind_lecture(LECTURE_ID)
+        tracker.record("raw_notes", "model", 100, 20, 0.5, "ok")
+        tracker.record("raw_notes", "model", 50, 10, 0.25, "ok")
+        tracker.record("synthesis", "model", 0, 0, 0.0, "cached")
+    await _in_scope(lecture)
+    tracker.record("outline", "model", 5, 5, 0.1, "ok")
+    await tracker.flush()
+
+    rows = {(r["lecture_id"], r["user_id"], r["stage"], r["outcome"]): r for r in store.rows}
+    raw = rows[(LECTURE_ID, "user-1", "raw_notes", "ok")]
+    assert (raw["calls"], raw["prompt_tokens"], raw["completion_tokens"], raw["latency_seconds"]) == (2, 150, 30, 0.75)
+    assert rows[(LECTURE_ID, "user-1", "synthesis", "cached")]["calls"] == 1
+    assert ("none", "none", "outline", "ok") in rows
+    assert tracker.snapshot()["pending"] == []
+
+
+async def test_failed_flush_keeps_rows(store):
+    tracker = LLMUsageTracker()
+    tracker.record("raw_notes", "model", 100, 20, 0.5, "ok")
+    store.save_error = ConnectionError("mongo down")
+    await tracker.flush()
+    tracker.record("raw_notes", "model", 1, 1, 0.5, "ok")
+
+    store.save_error = None
+    await tracker.flush()
+    (row,) = store.rows
+    assert (row["calls"], row["prompt_tokens"], row["completion_tokens"]) == (2, 101, 21)
+
+
+async def test_budget_counts_stored_and_new_tokens(store, monkeypatch):
+    monkeypatch.setattr(llm_usage_module.settings, "LLM_USER_DAILY_TOKENS", 1_000)
+    store.stored_tokens["user-1"] = 900
+    tracker = LLMUsageTracker()
+
+    async def lecture():
+        await tracker.bind_lecture(LECTURE_ID)
+        await tracker.check_budget()
+        tracker.record("raw_notes", "model", 80, 20, 0.5, "ok")
+        with pytest.raises(LLMBudgetExceeded):
+            await tracker.check_budget()
+    await _in_scope(lecture)
+
+    # Calls outside a lecture are never limited
+    await tracker.check_budget()
+    assert _scope.get() == (None, None)
+
+
+async def test_unresolvable_owner_is_untagged(store):
+    tracker = LLMUsageTracker()
+
+    async def lecture():
+        await tracker.bind_lecture("lecture-offline")
+        tracker.record("raw_notes", "model", 1, 1, 0.1, "ok")
+    await _in_scope(lecture)
+    await tracker.flush()
+    assert (store.rows[0]["lecture_id"], store.rows[0]["user_id"]) == ("lecture-offline", "none")
+
+
+@pytest.mark.parametrize("configured,sent,status", [
+    (None, "secret", 503),
+    ("secret", None, 403),
+    ("secret", "wrong", 403),
+    ("secret", "secret", None),
+])
+async def test_admin_usage_endpoint_needs_the_key(monkeypatch, configured, sent, status):
+    pytest.importorskip("jwt")
+    from fastapi import HTTPException
+    import app.api.usage as usage_api
+
+    monkeypatch.setattr(usage_api.settings, "ADMIN_API_KEY", configured)
+    if status is None:
+        await usage_api.require_admin(sent)
+        return
+    with pytest.raises(HTTPException) as error:
+        await usage_api.require_admin(sent)
+    assert error.value.status_code == status
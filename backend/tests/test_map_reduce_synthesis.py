@@ -0,0 +1,89 @@
+import pytest
+
+import app.services.final_synthesizer as final_synthesizer
+from app.services.final_synthesizer import FinalSynthesizer
+from app.services.prompt_budget import count_tokens
+
+
+class FakeLLM:
+    """Condenses a group to its headings (the map step keeps every topic)"""
+
+    def __init__(self, available=True, error=None):
+        self.available = available
+        self.error = error
+        self.calls = []
+
+    async def chat(self, messages, **kwargs):
+        self.calls.append(kwargs)
+        if self.error:
+            raise self.error
+        notes = messages[1]["content"].split("NOTES:\n", 1)[1]
+        return "\n".join(line for line in notes.splitlines() if line.startswith("## "))
+
+
+def _window(n):
+    return f"## Topic {n}\n" + "\n".join(f"- point {n}.{i} about gradient descent and step sizes" for i in range(8))
+
+
+@pytest.fixture
+def synthesizer(monkeypatch):
+    """FinalSynthesizer whose last step just returns the summaries it was given"""
+    monkeypatch.setattr(final_synthesizer.settings, "MAP_REDUCE_GROUP_TOKENS", 300)
+    monkeypatch.setattr(final_synthesizer.settings, "MAP_REDUCE_SUMMARY_TOKENS", 60)
+    synth = FinalSynthesizer("lecture")
+    synth.llm = FakeLLM()
+
+    async def synthesize(summaries, rag_context=None, on_section_delta=None):
+        return {"summaries": list(summaries)}
+    synth.synthesize = synthesize
+    return synth
+
+
+def test_groups_keep_order_and_token_limit():
+    synth = FinalSynthesizer("lecture")
+    texts = [_window(n) for n in range(6)]
+    groups = synth._group_by_tokens(texts, count_tokens(texts[0]) * 2 + 1)
+    assert groups == [texts[0:2], texts[2:4], texts[4:6]]
+
+
+async def test_every_window_reaches_the_final_step(synthesizer):
+    windows = [_window(n) for n in range(30)]
+    result = await synthesizer.synthesize_map_reduce(windows)
+
+    summaries = "\n".join(result["summaries"])
+    assert all(f"## Topic {n}\n" in summaries + "\n" for n in range(30))
+    assert sum(count_tokens(s) for s in result["summaries"]) <= 300
+    assert synthesizer.llm.calls and all(call["stage"] == "map" for call in synthesizer.llm.calls)
+
+
+async def test_short_lectures_need_no_map_calls(synthesizer):
+    windows = [_window(0)]
+    assert (await synthesizer.synthesize_map_reduce(windows))["summaries"] == windows
+    assert synthesizer.llm.calls == []
+
+
+@pytest.mark.parametrize("llm", [FakeLLM(available=False), FakeLLM(error=TimeoutError("LLM timed out"))])
+async def test_failed_map_keeps_topic_headings(synthesizer, llm):
+    synthesizer.llm = llm
+    result = await synthesizer.synthesize_map_reduce([_window(n) for n in range(6)])
+
+    summaries = "\n".join(result["summaries"])
+    assert all(f"## Topic {n}" in summaries for n in range(6))
+
+
+async def test_no_notes_gives_empty_result():
+    result = await FinalSynthesizer("lecture").synthesize_map_reduce([])
+    assert result["success"] is False
+
+
+async def test_mode_selects_map_reduce(monkeypatch):
+    called = []
+
+    async def synthesize_map_reduce(self, notes, rag_context=None, on_section_delta=None):
+        called.append(notes)
+        return {"success": True}
+    monkeypatch.setattr(FinalSynthesizer, "synthesize_map_reduce", synthesize_map_reduce)
+    monkeypatch.setattr(final_synthesizer.settings, "FINAL_NOTES_MODE", "map_reduce")
+
+    await final_synthesizer.synthesize_final_notes("lecture", ["## Topic"])
+    assert called == [["## Topic"]]
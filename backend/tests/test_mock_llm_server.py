@@ -0,0 +1,80 @@
+import httpx
+import pytest
+
+from app.services import agentic_synthesizer
+from mock_llm_server import MockConfig, canned_response, create_app
+
+groq = pytest.importorskip("groq")
+
+MESSAGES = [{"role": "system", "content": "You write notes."},
+            {"role": "user", "content": "SPOKEN TRANSCRIPTION:\ngradient descent convergence matrix"}]
+
+
+def _client(config):
+    """Groq SDK client talking to the stand-in app in-process"""
+    app = create_app(config)
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://mock")
+    return groq.AsyncGroq(api_key="offline", base_url="http://mock", http_client=http_client, max_retries=0), http_client
+
+
+def test_canned_responses_are_deterministic():
+    assert canned_response(MESSAGES, False, seed=1) == canned_response(MESSAGES, False, seed=1)
+    assert canned_response(MESSAGES, False, seed=1) != canned_response(MESSAGES, False, seed=2)
+    assert all(line.startswith("- ") for line in canned_response(MESSAGES, False, seed=1).splitlines())
+
+
+async def test_completion_through_the_groq_sdk():
+    client, http_client = _client(MockConfig(latency_ms=0, latency_jitter_ms=0))
+    response = await client.chat.completions.create(model="mock", messages=MESSAGES, max_tokens=200)
+
+    assert response.choices[0].message.content.startswith("- ")
+    assert response.usage.total_tokens == response.usage.prompt_tokens + response.usage.completion_tokens
+    assert (await http_client.get("/stats")).json() == {"requests": 1, "by_status": {"200": 1}}
+
+
+async def test_stream_ends_with_usage():
+    client, _ = _client(MockConfig(latency_ms=0, latency_jitter_ms=0, tokens_per_second=0))
+    stream = await client.chat.completions.create(model="mock", messages=MESSAGES, max_tokens=200, stream=True)
+
+    text, usage = "", None
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            text += chunk.choices[0].delta.content
+        usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+    assert text == canned_response(MESSAGES, False, seed=0)
+    assert usage is not None and usage.completion_tokens > 0
+
+
+async def test_scripted_errors():
+    client, _ = _client(MockConfig(latency_ms=0, latency_jitter_ms=0, script=[429, 200, 503], retry_after=2))
+
+    with pytest.raises(groq.RateLimitError) as error:
+        await client.chat.completions.create(model="mock", messages=MESSAGES)
+    assert error.value.response.headers["retry-after"] == "2"
+    await client.chat.completions.create(model="mock", messages=MESSAGES)
+    with pytest.raises(groq.InternalServerError):
+        await client.chat.completions.create(model="mock", messages=MESSAGES)
+
+
+async def test_oversized_prompts_are_rejected():
+    client, _ = _client(MockConfig(latency_ms=0, latency_jitter_ms=0, max_prompt_tokens=5))
+    with pytest.raises(groq.APIStatusError) as error:
+        await client.chat.completions.create(model="mock", messages=MESSAGES)
+    assert error.value.status_code == 413
+
+
+async def test_combined_window_prompt_gets_bullets_for_pending_chunks(llm, monkeypatch):
+    client, _ = _client(MockConfig(latency_ms=0, latency_jitter_ms=0))
+    llm._client = client
+    monkeypatch.setattr(agentic_synthesizer, "llm_client", llm)
+
+    window = [
+        {"text": "we defined the loss", "enhanced_notes": "- Loss defined"},
+        {"text": "gradient descent moves the weights"},
+        {"text": "the learning rate sets the step"},
+    ]
+    result = await agentic_synthesizer.synthesize_window_notes(window, [], "lecture")
+
+    assert result["fallback_chunks"] == []
+    assert sorted(result["chunk_notes"]) == [1, 2]
+    assert result["structured_notes"].startswith("## ")
@@ -0,0 +1,55 @@
+import pytest
+
+import app.services.page_extraction as page_extraction
+from app.services.page_extraction import get_file_type, iter_pages_from_txt, stream_document_pages
+
+
+async def _collect(path):
+    return [page async for page in stream_document_pages(str(path))]
+
+
+def test_txt_form_feeds_split_pages(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("first page\n\fsecond\fthird\n\f\n")
+    assert list(iter_pages_from_txt(str(path))) == [(1, "first page\n"), (2, "second"), (3, "third\n")]
+
+
+def test_file_types():
+    assert get_file_type("slides.PPT") == "pptx"
+    assert get_file_type("paper.pdf") == "pdf"
+    assert get_file_type("image.png") is None
+
+
+async def test_stream_yields_pages_in_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(page_extraction, "STREAM_BUFFER_PAGES", 2)
+    path = tmp_path / "long.txt"
+    path.write_text("\f".join(f"page {n}" for n in range(1, 11)))
+
+    pages = await _collect(path)
+    assert pages == [(n, f"page {n}") for n in range(1, 11)]
+
+
+async def test_stream_skips_unsupported_files(tmp_path):
+    assert await _collect(tmp_path / "image.png") == []
+
+
+async def test_stream_raises_extraction_errors(tmp_path, monkeypatch):
+    def failing_pages(path):
+        yield 1, "readable page"
+        raise ValueError("corrupt page 2")
+    monkeypatch.setitem(page_extraction.PAGE_ITERATORS, ".txt", (failing_pages, "txt"))
+
+    received = []
+    with pytest.raises(ValueError, match="corrupt page 2"):
+        async for page in stream_document_pages(str(tmp_path / "broken.txt")):
+            received.append(page)
+    assert received == [(1, "readable page")]
+
+
+async def test_stream_can_stop_early(tmp_path):
+    path = tmp_path / "long.txt"
+    path.write_text("\f".join(f"page {n}" for n in range(1, 100)))
+
+    stream = stream_document_pages(str(path))
+    assert await stream.__anext__() == (1, "page 1")
+    await stream.aclose()
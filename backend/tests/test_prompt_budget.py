@@ -0,0 +1,68 @@
+from app.services.prompt_budget import (
+    MESSAGE_OVERHEAD_TOKENS,
+    PromptBudget,
+    count_message_tokens,
+    count_tokens,
+    pack_items,
+    trim_to_tokens
+)
+
+TEXT = ("Gradient descent minimizes the loss. The learning rate sets the step size. "
+        "Momentum smooths the updates. Adam adapts the rate per parameter.")
+
+
+def test_message_tokens_include_overhead():
+    messages = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": TEXT}]
+    assert count_message_tokens(messages) == count_tokens("Be brief.") + count_tokens(TEXT) + 2 * MESSAGE_OVERHEAD_TOKENS
+
+
+def test_trim_keeps_whole_sentences():
+    limit = count_tokens("Gradient descent minimizes the loss. The learning rate sets the step size.") + 2
+    assert trim_to_tokens(TEXT, limit) == "Gradient descent minimizes the loss. The learning rate sets the step size."
+    assert trim_to_tokens(TEXT, limit, keep_tail=True) == "Momentum smooths the updates. Adam adapts the rate per parameter."
+    assert trim_to_tokens(TEXT, 10_000) == TEXT
+
+
+def test_trim_cuts_a_single_long_sentence_on_words():
+    sentence = " ".join(["backpropagation"] * 50)
+    trimmed = trim_to_tokens(sentence, 20)
+    assert 0 < count_tokens(trimmed) <= 20
+    assert set(trimmed.split()) == {"backpropagation"}
+
+
+def test_pack_items_in_order_until_full():
+    items = ["First chunk about loss functions.", "Second chunk about optimizers.", "Third chunk " * 40]
+    budget = count_tokens(items[0]) + count_tokens("\n\n") + count_tokens(items[1])
+    assert pack_items(items, budget) == f"{items[0]}\n\n{items[1]}"
+    assert pack_items(items, budget, keep_tail=True) == ""
+
+
+def test_pack_items_trims_first_overflowing_item_when_room_is_useful():
+    items = ["Short opening chunk.", TEXT * 5]
+    packed = pack_items(items, count_tokens(items[0]) + 40)
+    assert packed.startswith("Short opening chunk.\n\nGradient descent minimizes the loss.")
+    assert count_tokens(packed) <= count_tokens(items[0]) + 40
+
+    recent = pack_items(["Old notes. " * 50, "Latest notes."], 30, keep_tail=True)
+    assert recent.endswith("Latest notes.")
+
+
+def test_budget_serves_parts_by_priority_within_total():
+    budget = PromptBudget("test", total_tokens=120)
+    budget.charge("You write lecture notes.")
+    budget.add("history", [TEXT] * 10, priority=2, keep_tail=True)
+    budget.add("transcript", TEXT, priority=0)
+    budget.add("context", [TEXT] * 10, priority=1, max_tokens=40)
+
+    parts = budget.fit()
+    assert parts["transcript"] == TEXT
+    assert count_tokens(parts["context"]) <= 40
+    used = budget.fixed_tokens + sum(count_tokens(text) for text in parts.values())
+    assert used <= 120
+
+
+def test_budget_smaller_than_fixed_text_leaves_parts_empty():
+    budget = PromptBudget("test", total_tokens=5)
+    budget.charge(TEXT)
+    budget.add("transcript", TEXT, priority=0)
+    assert budget.fit() == {"transcript": ""}
@@ -0,0 +1,75 @@
+import pytest
+
+from app.services import rag_generator
+from app.services.llm_client import LLMClient, llm_client
+from app.services.llm_scheduler import Priority
+from app.services.rag_generator import EXTRACTIVE_BULLET_WORDS, EXTRACTIVE_BULLETS, extractive_raw_notes, generate_raw_notes
+
+TRANSCRIPT = "Today we look at gradient descent. It moves the weights downhill. OK. So the learning rate matters a lot."
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Available LLM recording its calls; set .error to make it fail"""
+    class FakeLLM:
+        error = None
+        calls = []
+
+    async def chat(messages, **kwargs):
+        FakeLLM.calls.append(kwargs)
+        if FakeLLM.error:
+            raise FakeLLM.error
+        return "- Gradient descent moves weights downhill"
+    monkeypatch.setattr(LLMClient, "available", property(lambda self: True))
+    monkeypatch.setattr(llm_client, "chat", chat)
+    return FakeLLM
+
+
+def test_extractive_bullets_are_transcript_sentences():
+    assert extractive_raw_notes(TRANSCRIPT) == (
+        "- Today we look at gradient descent.\n"
+        "- It moves the weights downhill.\n"
+        "- So the learning rate matters a lot."
+    )
+
+
+def test_extractive_bullets_split_long_unpunctuated_speech():
+    words = [f"w{n}" for n in range(EXTRACTIVE_BULLET_WORDS * 10)]
+    bullets = extractive_raw_notes(" ".join(words)).splitlines()
+    assert len(bullets) == EXTRACTIVE_BULLETS
+    assert all(len(bullet.split()) == EXTRACTIVE_BULLET_WORDS + 1 for bullet in bullets)
+
+
+def test_extractive_placeholder_for_silence():
+    assert extractive_raw_notes("  um.  ") == "- (listening...)"
+
+
+async def test_tier_model_and_stage_reach_the_llm(llm):
+    notes = await generate_raw_notes(TRANSCRIPT, [], "lecture", model="fast-model",
+                                     priority=Priority.SYNTHESIS, stage="raw_notes_upgrade")
+    assert notes == "- Gradient descent moves weights downhill"
+    assert llm.calls[0]["model"] == "fast-model"
+    assert llm.calls[0]["priority"] == Priority.SYNTHESIS
+    assert llm.calls[0]["stage"] == "raw_notes_upgrade"
+
+
+async def test_errors_raised_when_requested(llm):
+    llm.error = TimeoutError("LLM timed out")
+    with pytest.raises(TimeoutError):
+        await generate_raw_notes(TRANSCRIPT, [], "lecture", raise_errors=True)
+
+
+async def test_errors_fall_back_to_transcript_bullets(llm):
+    llm.error = TimeoutError("LLM timed out")
+    notes = await generate_raw_notes(TRANSCRIPT, [], "lecture")
+    assert notes.startswith("- Today we look at gradient descent")
+
+
+async def test_unavailable_llm_gives_transcript_bullets(monkeypatch):
+    monkeypatch.setattr(LLMClient, "available", property(lambda self: False))
+    notes = await generate_raw_notes(TRANSCRIPT, ["Gradient descent is an optimizer."], "lecture")
+    assert notes == extractive_raw_notes(TRANSCRIPT)
+
+
+def test_fallback_without_transcript_section():
+    assert rag_generator._fallback_note_generation("no transcript here") == "- No content generated (fallback mode)"
@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+import app.services.running_final_notes as running_final_notes
+from app.services.running_final_notes import RunningFinalNotes
+
+
+class FakeLLM:
+    """Answers each update after delay seconds, filing it under section"""
+    available = True
+
+    def __init__(self, delay=0.0, section="Optimization", error=None, bullets=None):
+        self.delay = delay
+        self.section = section
+        self.error = error
+        self.bullets = bullets
+        self.calls = 0
+
+    async def chat(self, messages, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return json.dumps({
+            "title": "Training Neural Networks",
+            "section": self.section,
+            "bullets": self.bullets if self.bullets is not None else [f"LLM point {self.calls}"],
+            "glossary": {"Learning rate": "Step size of gradient descent."},
+            "takeaways": ["Tune the learning rate first"]
+        })
+
+
+def _notes(window, llm):
+    notes = RunningFinalNotes("lecture")
+    notes.llm = llm
+    for i in range(window):
+        notes.submit(f"## Topic {i}\n- raw bullet {i}\n- **Learning rate** matters\n")
+    return notes
+
+
+def _answer(text):
+    async def chat(messages, **kwargs):
+        return text
+    return chat
+
+
+async def test_windows_are_merged_in_order():
+    notes = _notes(3, FakeLLM())
+    result = await notes.finalize()
+
+    assert result["title"] == "Training Neural Networks"
+    assert notes.sections == {"Optimization": ["LLM point 1", "LLM point 2", "LLM point 3"]}
+    assert result["glossary"] == {"Learning rate": "Step size of gradient descent."}
+    assert result["key_takeaways"] == ["Tune the learning rate first"]
+    assert notes.window_count == 3
+
+
+async def test_finalize_files_pending_windows_without_waiting(monkeypatch):
+    monkeypatch.setattr(running_final_notes.settings, "FINAL_NOTES_FINALIZE_TIMEOUT", 0.05)
+    llm = FakeLLM(delay=0.04)
+    notes = _notes(5, llm)
+
+    result = await asyncio.wait_for(notes.finalize(), timeout=1)
+
+    assert notes.window_count == 5
+    assert llm.calls < 5
+    assert notes.sections["Optimization"] == [f"LLM point {n}" for n in range(1, llm.calls)]
+    assert "Topic 4" in notes.sections and notes.sections["Topic 4"] == ["raw bullet 4", "**Learning rate** matters"]
+    assert "raw bullet 4" in result["markdown"]
+
+    # The cancelled update does not land after finalize
+    await asyncio.sleep(0.1)
+    assert notes.window_count == 5
+
+
+async def test_failed_update_files_window_from_its_own_text():
+    notes = _notes(1, FakeLLM(error=TimeoutError("LLM timed out")))
+    await notes.finalize()
+    assert notes.sections == {"Topic 0": ["raw bullet 0", "**Learning rate** matters"]}
+
+
+
+async def test_malformed_bullets_file_window_from_its_own_text():
+    for bullets in ("a single string", {"point": "a dict"}):
+        notes = _notes(2, FakeLLM(bullets=bullets))
+        await notes.finalize()
+        assert notes.window_count == 2
+        assert notes.sections == {
+            "Topic 0": ["raw bullet 0", "**Learning rate** matters"],
+            "Topic 1": ["raw bullet 1", "**Learning rate** matters"]
+        }
+
+
+async def test_null_bullets_do_not_stop_the_worker():
+    notes = _notes(1, FakeLLM())
+    notes.llm.chat = _answer('{"section": "Optimization", "bullets": null}')
+    notes.submit("## Topic 1\n- raw bullet 1\n")
+    await notes.finalize()
+    assert notes.window_count == 2
+    assert notes.sections == {
+        "Topic 0": ["raw bullet 0", "**Learning rate** matters"],
+        "Topic 1": ["raw bullet 1"]
+    }
+
+
+async def test_sections_match_case_insensitively_and_skip_repeats():
+    notes = RunningFinalNotes("lecture")
+    notes._merge({"section": "Optimization", "bullets": ["Momentum", "Adam"]})
+    notes._merge({"section": "optimization", "bullets": ["- adam", "Nesterov"]})
+    assert notes.sections == {"Optimization": ["Momentum", "Adam", "Nesterov"]}
+
+
+async def test_no_windows_gives_empty_result():
+    result = await RunningFinalNotes("lecture").finalize()
+    assert result["success"] is False and result["sections"] == []
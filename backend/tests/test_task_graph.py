@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from app.services.task_graph import run_task_graph
+
+
+async def test_results_flow_along_dependencies():
+    async def outline():
+        return ["intro", "body"]
+
+    async def section(outline):
+        return [f"## {title}" for title in outline]
+
+    async def notes(outline, section):
+        return "\n".join(section) + f" ({len(outline)})"
+
+    results = await run_task_graph({
+        "outline": ([], outline),
+        "section": (["outline"], section),
+        "notes": (["outline", "section"], notes),
+    })
+    assert results["notes"] == "## intro\n## body (2)"
+
+
+async def test_independent_nodes_run_concurrently():
+    running, peak = 0, 0
+
+    async def work():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return True
+
+    async def join(a, b, c):
+        return a and b and c
+
+    results = await run_task_graph({
+        "a": ([], work), "b": ([], work), "c": ([], work),
+        "join": (["a", "b", "c"], join),
+    })
+    assert results["join"] is True
+    assert peak == 3
+
+
+async def test_failure_cancels_remaining_nodes():
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def broken():
+        raise RuntimeError("LLM down")
+
+    with pytest.raises(RuntimeError, match="LLM down"):
+        await run_task_graph({"slow": ([], slow), "broken": ([], broken)})
+    await asyncio.sleep(0)
+    assert cancelled.is_set()
+
+
+@pytest.mark.parametrize("graph,message", [
+    ({"a": (["missing"], None)}, "unknown tasks"),
+    ({"a": (["b"], None), "b": (["a"], None)}, "cycle"),
+])
+async def test_invalid_graphs_are_rejected(graph, message):
+    with pytest.raises(ValueError, match=message):
+        await run_task_graph(graph)
@@ -0,0 +1,65 @@
+import pytest
+
+import app.services.transcript_dedup as transcript_dedup
+from app.services.transcript_dedup import DuplicateDetector, MinHasher, shingles
+
+EXPLANATION = ("So the gradient tells us the direction of steepest ascent and we step the weights "
+               "in the opposite direction scaled by the learning rate which we pick by hand")
+REPEAT = ("So the gradient tells us the direction of steepest ascent, and we step the weights "
+          "in the opposite direction, scaled by the learning rate which we pick by hand.")
+OTHER = ("Convolutional layers slide a small kernel across the image and share the same weights "
+         "at every position which keeps the number of parameters small")
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(transcript_dedup.settings, "DUPLICATE_DETECTION_ENABLED", True)
+    monkeypatch.setattr(transcript_dedup.settings, "DUPLICATE_SIMILARITY", 0.8)
+
+
+def test_shingles_ignore_case_and_punctuation():
+    assert sorted(shingles(EXPLANATION)) == sorted(shingles(REPEAT.upper()))
+    assert len(shingles("one two three four")) == 2
+
+
+def test_minhash_estimates_jaccard_similarity():
+    first = set(shingles(EXPLANATION))
+    second = set(shingles(EXPLANATION + " and then we repeat this many times until the loss stops going down"))
+    jaccard = len(first & second) / len(first | second)
+
+    hasher = MinHasher(256)
+    estimate = MinHasher.similarity(hasher.signature(list(first)), hasher.signature(list(second)))
+    assert estimate == pytest.approx(jaccard, abs=0.15)
+    assert MinHasher.similarity(hasher.signature(list(first)), hasher.signature(list(first))) == 1.0
+
+
+def test_repeated_explanation_matches_earlier_chunk():
+    detector = DuplicateDetector()
+    earlier = {"chunk_index": 3, "enhanced_notes": "- Step against the gradient"}
+    detector.add(EXPLANATION, earlier)
+    detector.add(OTHER, {"chunk_index": 4})
+
+    assert detector.find(REPEAT) is earlier
+    assert detector.find("Today we start a completely new topic about recurrent networks and sequence models") is None
+
+
+def test_short_chunks_never_match():
+    detector = DuplicateDetector()
+    detector.add("yes okay so", {"chunk_index": 1})
+    assert detector.find("yes okay so") is None
+
+
+def test_only_recent_chunks_are_compared(monkeypatch):
+    monkeypatch.setattr(transcript_dedup.settings, "DUPLICATE_WINDOW_CHUNKS", 2)
+    detector = DuplicateDetector()
+    detector.add(EXPLANATION, {"chunk_index": 1})
+    detector.add(OTHER, {"chunk_index": 2})
+    detector.add(OTHER + " again", {"chunk_index": 3})
+    assert detector.find(REPEAT) is None
+
+
+def test_disabled_detection(monkeypatch):
+    detector = DuplicateDetector()
+    detector.add(EXPLANATION, {"chunk_index": 1})
+    monkeypatch.setattr(transcript_dedup.settings, "DUPLICATE_DETECTION_ENABLED", False)
+    assert detector.find(REPEAT) is None
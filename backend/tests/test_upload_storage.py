@@ -0,0 +1,82 @@
+import hashlib
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+import app.services.upload_storage as upload_storage
+from app.services.upload_storage import (
+    hash_file,
+    save_upload_content_addressed,
+    save_uploads_content_addressed,
+    store_file_content_addressed,
+    stream_upload_to_file
+)
+
+PDF = b"%PDF-1.4\n" + b"x" * 5000
+
+
+def _upload(name, data):
+    return UploadFile(file=io.BytesIO(data), filename=name)
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_storage.settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(upload_storage, "UPLOAD_BLOCK_SIZE", 1024)
+    return tmp_path
+
+
+async def test_stream_hashes_and_sizes(tmp_path):
+    dest = tmp_path / "out.pdf"
+    digest, size = await stream_upload_to_file(_upload("a.pdf", PDF), dest, len(PDF), (b"%PDF-",))
+    assert (digest, size) == (hashlib.sha256(PDF).hexdigest(), len(PDF))
+    assert dest.read_bytes() == PDF
+
+
+@pytest.mark.parametrize("name,data,status", [
+    ("big.pdf", PDF, 413),
+    ("fake.pdf", b"GIF89a" + b"x" * 100, 415),
+    ("binary.txt", b"text\x00more", 415),
+    ("empty.pdf", b"", 400),
+])
+async def test_rejected_uploads_leave_no_file(tmp_path, name, data, status):
+    dest = tmp_path / name
+    signatures = None if name.endswith(".txt") else (b"%PDF-",)
+    with pytest.raises(HTTPException) as error:
+        await stream_upload_to_file(_upload(name, data), dest, 4096, signatures)
+    assert error.value.status_code == status
+    assert not dest.exists()
+
+
+async def test_same_content_stored_once(upload_dir):
+    first_path, first_hash, _ = await save_upload_content_addressed(_upload("a.pdf", PDF))
+    second_path, second_hash, _ = await save_upload_content_addressed(_upload("renamed.PDF", PDF))
+
+    assert first_path == second_path and first_hash == second_hash
+    assert first_path.parent.name == first_hash[:2]
+    assert list((upload_dir / "blobs" / "tmp").iterdir()) == []
+
+
+async def test_unsupported_extension():
+    with pytest.raises(HTTPException) as error:
+        await save_upload_content_addressed(_upload("image.png", b"\x89PNG"))
+    assert error.value.status_code == 415
+
+
+
+async def test_rejected_file_stores_none_of_the_batch(upload_dir):
+    uploads = [_upload("a.pdf", PDF), _upload("b.txt", b"notes"), _upload("c.pdf", b"GIF89a")]
+    with pytest.raises(HTTPException) as error:
+        await save_uploads_content_addressed(uploads)
+
+    assert error.value.status_code == 415
+    assert [p for p in (upload_dir / "blobs").rglob("*") if p.is_file()] == []
+
+
+def test_store_local_file(tmp_path):
+    source = tmp_path / "notes.txt"
+    source.write_text("lecture notes")
+    path, digest, size = store_file_content_addressed(str(source))
+    assert digest == hash_file(str(source)) == hash_file(str(path))
+    assert size == len("lecture notes")
@@ -0,0 +1,55 @@
+import numpy as np
+
+import app.services.vector_search_backend as vector_search_backend
+from app.services.vector_search_backend import ATLAS, FALLBACK, VectorSearchCircuitBreaker
+from database.mongodb_connection import probe_vector_search, vector_search
+
+
+def _search_filter(pipeline):
+    return pipeline[0]["$search"]["knnBeta"]["filter"]
+
+
+async def test_probe_uses_the_vector_search_pipeline(fake_db):
+    await vector_search(np.ones(384), "lecture-1", top_k=5, content_hashes=["abc"])
+    assert await probe_vector_search()
+
+    (_, (query_pipeline,), _), (_, (probe_pipeline,), _) = fake_db.document_embeddings.calls
+    assert [list(stage) for stage in probe_pipeline] == [list(stage) for stage in query_pipeline]
+    assert list(_search_filter(probe_pipeline)) == list(_search_filter(query_pipeline)) == ["compound"]
+    assert probe_pipeline[0]["$search"]["index"] == query_pipeline[0]["$search"]["index"]
+
+
+async def test_probe_reports_server_errors(fake_db):
+    fake_db.document_embeddings.aggregate_error = RuntimeError("index not found")
+    assert not await probe_vector_search()
+
+
+async def test_breaker_opens_after_threshold_and_closes_on_probe(monkeypatch):
+    breaker = VectorSearchCircuitBreaker(failure_threshold=2, reprobe_interval=300)
+
+    async def available():
+        return True
+    monkeypatch.setattr(vector_search_backend, "probe_vector_search", available)
+
+    assert await breaker.probe()
+    assert breaker.backend == ATLAS
+
+    breaker.record_failure(RuntimeError("boom"))
+    assert breaker.backend == ATLAS
+    breaker.record_failure(RuntimeError("boom"))
+    assert breaker.circuit_open
+    assert breaker.select_backend() == FALLBACK  # re-probe not due yet
+
+    await breaker.probe()
+    assert not breaker.circuit_open
+    assert breaker.backend == ATLAS
+
+
+async def test_success_resets_failure_count():
+    breaker = VectorSearchCircuitBreaker(failure_threshold=2, reprobe_interval=300)
+    breaker.atlas_available = True
+
+    breaker.record_failure(RuntimeError("boom"))
+    breaker.record_success()
+    breaker.record_failure(RuntimeError("boom"))
+    assert not breaker.circuit_open
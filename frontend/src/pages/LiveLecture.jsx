@@ -73,6 +73,9 @@ export default function LiveLecture() {
   const [rawNotes, setRawNotes] = useState([])
   const [liveNotes, setLiveNotes] = useState([])
   const [finalNotes, setFinalNotes] = useState(null)  // Final comprehensive notes
+  const [streamingNote, setStreamingNote] = useState(null)  // Structured notes while they stream in
+  const [finalNotesDraft, setFinalNotesDraft] = useState(null)  // Final note sections while they stream in
+  const seenChunkIdsRef = useRef(new Set())  // Transcription chunks already received
   const [audioLevel, setAudioLevel] = useState(0)
   const [lectureTitle, setLectureTitle] = useState('')
   const [connectionStatus, setConnectionStatus] = useState('disconnected')
@@ -170,25 +173,56 @@ export default function LiveLecture() {
         console.log('📝 Transcription received:', data.content)
         console.log('📝 Enhanced notes received:', data.enhanced_notes)
         
-        setTranscriptionChunks(prev => [...prev, {
-          id: data.timestamp,
-          timestamp: new Date(data.timestamp).toLocaleTimeString(),
-          text: data.content,
-          enhanced_notes: data.enhanced_notes || data.content,  // Use enhanced notes if available
-          chunk_number: data.chunk_number,
-          processed: false
-        }])
+        const enhancedNotes = data.enhanced_notes || data.content  // Use enhanced notes if available
+        // Combined pipeline mode sends a chunk's bullets later, under the same timestamp
+        const isUpdate = seenChunkIdsRef.current.has(data.timestamp)
+        seenChunkIdsRef.current.add(data.timestamp)
+        
+        setTranscriptionChunks(prev => {
+          if (prev.some(chunk => chunk.id === data.timestamp)) {
+            return prev.map(chunk => chunk.id === data.timestamp
+              ? { ...chunk, enhanced_notes: enhancedNotes }
+              : chunk)
+          }
+          return [...prev, {
+            id: data.timestamp,
+            timestamp: new Date(data.timestamp).toLocaleTimeString(),
+            text: data.content,
+            enhanced_notes: enhancedNotes,
+            chunk_number: data.chunk_number,
+            duplicate_of: data.duplicate_of,
+            processed: false
+          }]
+        })
         
-        toast.success(`Transcription ${data.chunk_number} complete`, { duration: 2000 })
+        if (!isUpdate) {
+          toast.success(`Transcription ${data.chunk_number} complete`, { duration: 2000 })
+        }
         
+      } else if (data.type === 'notes_upgraded') {
+        // Higher-quality notes replace the fast first version of a chunk
+        setTranscriptionChunks(prev => prev.map(chunk => chunk.id === data.timestamp
+          ? { ...chunk, enhanced_notes: data.enhanced_notes, upgraded: true }
+          : chunk))
+
       } else if (data.type === 'synthesis_started') {
         console.log('🤖 Synthesis started')
         toast.loading('Generating structured notes...', { id: 'synthesis' })
         
+      } else if (data.type === 'structured_notes_delta') {
+        // Append streamed text to the note being written
+        setStreamingNote(prev => ({
+          id: data.stream_id,
+          content: (prev && prev.id === data.stream_id ? prev.content : '') + data.delta
+        }))
+        
       } else if (data.type === 'structured_notes') {
         // Structured notes (every 60 seconds)
         console.log('📚 Structured notes received:', data.content)
         
+        // The consolidated message replaces the streamed draft
+        setStreamingNote(null)
+        
         const newNote = {
           id: data.timestamp,
           timestamp: new Date(data.timestamp).toLocaleTimeString(),
@@ -209,6 +243,7 @@ export default function LiveLecture() {
         
       } else if (data.type === 'synthesis_error') {
         console.error('Synthesis error:', data.error)
+        setStreamingNote(null)
         toast.error('Error generating notes', { id: 'synthesis' })
         
       } else if (data.type === 'connection_confirmed') {
@@ -225,8 +260,18 @@ export default function LiveLecture() {
         console.log('🎓 Final synthesis started')
         toast.loading('Creating comprehensive final notes...', { id: 'final-synthesis', duration: 10000 })
         
+      } else if (data.type === 'final_notes_delta') {
+        // Sections stream in concurrently; append to the right one
+        setFinalNotesDraft(prev => {
+          const sections = prev ? [...prev.sections] : []
+          const section = sections[data.section] || { title: data.title, content: '' }
+          sections[data.section] = { ...section, content: section.content + data.delta }
+          return { sections }
+        })
+        
       } else if (data.type === 'final_notes') {
         console.log('📚 Final comprehensive notes received:', data)
+        setFinalNotesDraft(null)
         
         // Store final notes separately
         setFinalNotes({
@@ -242,6 +287,7 @@ export default function LiveLecture() {
         
       } else if (data.type === 'final_synthesis_error') {
         console.error('Final synthesis error:', data.error)
+        setFinalNotesDraft(null)
         toast.error('Error creating final notes', { id: 'final-synthesis' })
       }
     }
@@ -573,7 +619,7 @@ export default function LiveLecture() {
           </div>
           
           <div className="h-96 overflow-y-auto p-4 bg-secondary-50 rounded-lg">
-            {liveNotes.length === 0 ? (
+            {liveNotes.length === 0 && !streamingNote && !finalNotesDraft ? (
               <div className="flex items-center justify-center h-full text-secondary-500">
                 <div className="text-center">
                   <FileText className="w-12 h-12 mx-auto mb-4 opacity-50" />
@@ -609,6 +655,12 @@ export default function LiveLecture() {
                             {!chunk.processed && (
                               <span className="text-xs text-blue-500 animate-pulse">Processing...</span>
                             )}
+                            {chunk.upgraded && (
+                              <span className="text-xs text-green-600">✨ Refined</span>
+                            )}
+                            {chunk.duplicate_of && (
+                              <span className="text-xs text-secondary-500">♻️ Repeats chunk #{chunk.duplicate_of}</span>
+                            )}
                           </div>
                           {/* Display enhanced notes instead of raw transcription */}
                           <div className="text-sm text-secondary-700 whitespace-pre-line">
@@ -684,6 +736,35 @@ export default function LiveLecture() {
                   </div>
                 )}
                 
+                {/* Final notes while sections are still streaming in */}
+                {!finalNotes && finalNotesDraft && (
+                  <div className="bg-gradient-to-br from-amber-50 to-orange-50 p-8 rounded-xl border-4 border-amber-300 shadow-2xl mb-6">
+                    <h2 className="text-2xl font-bold text-amber-900 mb-4 flex items-center">
+                      🎓 Writing final notes...
+                    </h2>
+                    {finalNotesDraft.sections.filter(Boolean).map((section) => (
+                      <div key={section.title} className="mb-6 p-4 bg-white rounded-lg border border-amber-200">
+                        <h3 className="text-xl font-bold text-gray-900 mb-3">{section.title}</h3>
+                        <div className="prose prose-sm max-w-none text-gray-700 whitespace-pre-line">
+                          {section.content}
+                        </div>
+                      </div>
+                    ))}
+                  </div>
+                )}
+                
+                {/* Structured notes while they stream in */}
+                {streamingNote && (
+                  <div className="bg-gradient-to-br from-white to-secondary-50 p-6 rounded-lg border-2 border-primary-200 shadow-md">
+                    <div className="flex items-center justify-between mb-3">
+                      <span className="text-xs text-blue-500 animate-pulse">Writing notes...</span>
+                    </div>
+                    <div className="text-sm text-secondary-800 whitespace-pre-line">
+                      {streamingNote.content}
+                    </div>
+                  </div>
+                )}
+                
                 {/* Structured Notes Section (60s synthesis) */}
                 {liveNotes.map((note) => (
                   <div key={note.id} className="bg-gradient-to-br from-white to-secondary-50 p-6 rounded-lg border-2 border-primary-200 shadow-md">